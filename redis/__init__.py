@@ -12,6 +12,7 @@ from redis.exceptions import (
     AuthenticationWrongNumberOfArgsError,
     BusyLoadingError,
     ChildDeadlockedError,
+    CircuitBreakerOpenError,
     ConnectionError,
     DataError,
     InvalidResponse,
@@ -49,6 +50,7 @@ __all__ = [
     "BlockingConnectionPool",
     "BusyLoadingError",
     "ChildDeadlockedError",
+    "CircuitBreakerOpenError",
     "Connection",
     "ConnectionError",
     "ConnectionPool",
@@ -0,0 +1,227 @@
+import os
+import threading
+from binascii import hexlify
+from time import monotonic
+
+from redis.exceptions import ResponseError, TimeoutError
+
+
+class BulkLoadStats:
+    """
+    Progress of a bulk load.
+
+    ``commands`` is the number of commands sent so far (it stays 0 when
+    loading pre-generated RESP), ``replies`` the number of replies read and
+    ``error_count`` the number of error replies among them. The first
+    ``max_errors`` errors are kept in ``errors`` as ``(index, error)``
+    tuples, where ``index`` is the position of the failed command.
+    """
+
+    def __init__(self):
+        self.commands = 0
+        self.bytes_sent = 0
+        self.replies = 0
+        self.error_count = 0
+        self.errors = []
+        self.started = monotonic()
+        self.finished = None
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}<replies={self.replies}, "
+            f"errors={self.error_count}, "
+            f"replies_per_second={self.replies_per_second:.0f}>"
+        )
+
+    @property
+    def elapsed(self):
+        "Seconds spent loading so far"
+        return (self.finished or monotonic()) - self.started
+
+    @property
+    def replies_per_second(self):
+        elapsed = self.elapsed
+        return self.replies / elapsed if elapsed else 0.0
+
+
+class BulkLoader:
+    """
+    Mass insertion of data, similar to ``redis-cli --pipe``.
+
+    Commands are packed and streamed to the server over a dedicated
+    connection while a reader thread consumes the replies, only counting
+    them and collecting errors. The server is never waited for between two
+    commands, so loading runs at the speed of the network.
+
+    The connection is created with the settings of the ``client``'s
+    connection pool, without a socket timeout as the reader may have to
+    wait for more commands to be produced. Use ``timeout`` to limit the
+    time waited for the remaining replies once everything was sent.
+
+    ``progress_callback`` is called with a :py:class:`BulkLoadStats` at
+    most every ``progress_interval`` seconds while loading, and once at the
+    end.
+
+    Every command is expected to produce exactly one reply, so commands
+    such as SUBSCRIBE, MONITOR or CLIENT REPLY must not be loaded.
+    """
+
+    def __init__(
+        self,
+        client,
+        chunk_size=65536,
+        max_errors=100,
+        timeout=None,
+        progress_callback=None,
+        progress_interval=1.0,
+    ):
+        pool = client.connection_pool
+        kwargs = dict(pool.connection_kwargs)
+        kwargs["socket_timeout"] = None
+        self.connection_class = pool.connection_class
+        self.connection_kwargs = kwargs
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.timeout = timeout
+        self.progress_callback = progress_callback
+        self.progress_interval = progress_interval
+
+    def load(self, commands):
+        """
+        Send each command of the iterable ``commands``, a tuple of the
+        command name and its arguments, and return a
+        :py:class:`BulkLoadStats` once all replies were read.
+        """
+
+        def write(connection, stats):
+            pieces = []
+            size = 0
+            for args in commands:
+                for chunk in connection.pack_command(*args):
+                    pieces.append(chunk)
+                    size += len(chunk)
+                stats.commands += 1
+                if size >= self.chunk_size:
+                    self._send(connection, stats, pieces)
+                    pieces = []
+                    size = 0
+            if pieces:
+                self._send(connection, stats, pieces)
+
+        return self._run(write)
+
+    def load_file(self, file):
+        """
+        Send the content of ``file``, a path or a binary file object holding
+        commands already encoded in the Redis protocol, and return a
+        :py:class:`BulkLoadStats` once all replies were read.
+        """
+
+        def write(connection, stats):
+            if isinstance(file, (str, bytes, os.PathLike)):
+                with open(file, "rb") as f:
+                    write_from(connection, stats, f)
+            else:
+                write_from(connection, stats, file)
+
+        def write_from(connection, stats, f):
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+                self._send(connection, stats, [chunk])
+
+        return self._run(write)
+
+    def _run(self, write):
+        stats = BulkLoadStats()
+        connection = self.connection_class(**self.connection_kwargs)
+        # the reply to this ECHO marks the end of the replies to our commands
+        marker = hexlify(os.urandom(20))
+        reader_errors = []
+        self._last_report = stats.started
+        try:
+            connection.connect()
+            reader = threading.Thread(
+                target=self._read_replies,
+                args=(connection, stats, marker, reader_errors),
+                name="redis-py-bulk-reader",
+                daemon=True,
+            )
+            reader.start()
+            try:
+                write(connection, stats)
+                self._send(connection, stats, connection.pack_command("ECHO", marker))
+            except BaseException:
+                # unblock the reader before giving up
+                connection.disconnect()
+                reader.join()
+                raise
+
+            deadline = None if self.timeout is None else monotonic() + self.timeout
+            while reader.is_alive():
+                wait = self.progress_interval
+                if deadline is not None:
+                    wait = min(wait, deadline - monotonic())
+                    if wait <= 0:
+                        connection.disconnect()
+                        reader.join()
+                        raise TimeoutError("Timeout reading bulk load replies")
+                reader.join(wait)
+                self._report(stats)
+            if reader_errors:
+                raise reader_errors[0]
+        finally:
+            connection.disconnect()
+            stats.finished = monotonic()
+        if self.progress_callback is not None:
+            self.progress_callback(stats)
+        return stats
+
+    def _send(self, connection, stats, pieces):
+        data = b"".join(pieces)
+        # health checks would read a reply in place of the reader thread
+        connection.send_packed_command([data], check_health=False)
+        stats.bytes_sent += len(data)
+        self._report(stats)
+
+    def _report(self, stats):
+        if self.progress_callback is None:
+            return
+        now = monotonic()
+        if now - self._last_report >= self.progress_interval:
+            self._last_report = now
+            self.progress_callback(stats)
+
+    def _read_replies(self, connection, stats, marker, reader_errors):
+        while True:
+            try:
+                response = connection.read_response(disable_decoding=True)
+            except ResponseError as e:
+                if len(stats.errors) < self.max_errors:
+                    stats.errors.append((stats.replies, e))
+                stats.error_count += 1
+                stats.replies += 1
+                continue
+            except Exception as e:
+                reader_errors.append(e)
+                return
+            if response == marker:
+                return
+            stats.replies += 1
+
+
+def bulk_load(client, commands, **kwargs):
+    """
+    Load the iterable of command tuples ``commands`` with a
+    :py:class:`BulkLoader` built from ``kwargs``
+    """
+    return BulkLoader(client, **kwargs).load(commands)
+
+
+def bulk_load_file(client, file, **kwargs):
+    """
+    Load a file of commands encoded in the Redis protocol with a
+    :py:class:`BulkLoader` built from ``kwargs``
+    """
+    return BulkLoader(client, **kwargs).load_file(file)
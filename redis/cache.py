@@ -0,0 +1,545 @@
+import copy
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+from redis.exceptions import ConnectionError, RedisError
+from redis.utils import str_if_bytes
+
+INVALIDATION_CHANNEL = "__redis__:invalidate"
+
+# returned by ClientSideCache.get on cache misses
+MISSING = object()
+
+
+class ClientSideCache:
+    """
+    A client side cache of the responses to read commands, invalidated by
+    the server using CLIENT TRACKING.
+
+    Up to ``max_size`` responses are kept, the least recently used ones
+    being evicted first. Only the ``commands`` reading a single key given
+    as their first argument are cached, and only when they are called
+    without extra options.
+
+    A dedicated connection subscribed to the ``__redis__:invalidate``
+    channel receives the invalidation messages, and every connection of the
+    pool enables tracking with a redirection to it. By default the server
+    remembers the keys read by each connection. With ``bcast``, it instead
+    broadcasts the modifications of all keys, or of the keys starting with
+    one of the ``prefixes``; only these keys are cached then.
+
+    Invalidations are asynchronous: a write from another client followed by
+    a read of the same key may briefly return the previous value. The keys
+    written through the clients of the pool are evicted right away instead,
+    found with a lazy :py:class:`~redis.commands.CommandsParser`, or
+    everything is when they can't be determined. The whole cache is flushed
+    whenever invalidation messages might have been missed, that is when a
+    connection of the pool or the invalidation connection is closed.
+
+    A cache is bound to a single connection pool. Pass it as
+    ``client_cache`` to :py:class:`~redis.Redis` and call :py:meth:`close`
+    to stop the invalidation listener once done with it.
+    """
+
+    COMMANDS = frozenset(
+        [
+            "GET",
+            "GETRANGE",
+            "HEXISTS",
+            "HGET",
+            "HGETALL",
+            "HKEYS",
+            "HLEN",
+            "HMGET",
+            "HSTRLEN",
+            "HVALS",
+            "LINDEX",
+            "LLEN",
+            "LRANGE",
+            "SCARD",
+            "SISMEMBER",
+            "SMEMBERS",
+            "STRLEN",
+            "ZCARD",
+            "ZSCORE",
+        ]
+    )
+
+    def __init__(self, max_size=10000, bcast=False, prefixes=None, commands=None):
+        if not isinstance(max_size, int) or max_size < 1:
+            raise ValueError("max_size must be a positive integer")
+        if prefixes and not bcast:
+            raise ValueError("prefixes can only be used in bcast mode")
+        self.max_size = max_size
+        self.bcast = bcast
+        self.prefixes = list(prefixes or [])
+        self.commands = self.COMMANDS if commands is None else frozenset(commands)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._listener_lock = threading.Lock()
+        self._entries = OrderedDict()
+        # cache keys of the entries of each Redis key
+        self._keys = {}
+        # tokens of the responses being read for each Redis key
+        self._pending = {}
+        # generation of the redirection set on each tracking connection
+        self._tracking = weakref.WeakKeyDictionary()
+        self._pool = None
+        self._encoder = None
+        self._prefixes = ()
+        self._pubsub = None
+        self._thread = None
+        self._redirect = None
+        self._generation = 0
+        self._parser = None
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}<entries={len(self)}, "
+            f"hits={self.hits}, misses={self.misses}>"
+        )
+
+    def __len__(self):
+        return len(self._entries)
+
+    def bind(self, pool):
+        "Attach the cache to the connection ``pool`` using it"
+        current = self._pool and self._pool()
+        if current is not None and current is not pool:
+            raise ValueError("A ClientSideCache can only be used by a single pool")
+        self._pool = weakref.ref(pool)
+        self._encoder = pool.get_encoder()
+        self._prefixes = tuple(self._encoder.encode(p) for p in self.prefixes)
+
+    def command_key(self, args):
+        """
+        Return the key caching the response to the command ``args``, or
+        None if it can't be cached
+        """
+        if args[0] not in self.commands or len(args) < 2:
+            return None
+        encode = self._encoder.encode
+        cache_key = tuple(encode(arg) for arg in args)
+        if self._prefixes and not cache_key[1].startswith(self._prefixes):
+            return None
+        return cache_key
+
+    def get(self, cache_key):
+        "Return the cached response for ``cache_key``, or MISSING"
+        with self._lock:
+            try:
+                response = self._entries[cache_key]
+            except KeyError:
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(cache_key)
+            self.hits += 1
+        return copy_response(response)
+
+    def reserve(self, connection, cache_key):
+        """
+        Return a token allowing to :py:meth:`put` the response to
+        ``cache_key`` about to be read from ``connection``, or None if
+        ``connection`` isn't being tracked. An invalidation of the key
+        received in the meantime revokes the token.
+        """
+        if not self.ensure_tracking(connection):
+            return None
+        token = object()
+        with self._lock:
+            if self._tracking.get(connection) != self._generation:
+                # the invalidation connection was lost in the meantime
+                return None
+            self._pending.setdefault(cache_key[1], set()).add(token)
+        return token
+
+    def put(self, cache_key, token, response):
+        "Cache ``response`` unless ``token`` was revoked"
+        if token is None:
+            return
+        key = cache_key[1]
+        with self._lock:
+            tokens = self._pending.get(key)
+            if tokens is None or token not in tokens:
+                return
+            tokens.discard(token)
+            if not tokens:
+                del self._pending[key]
+            self._entries[cache_key] = copy_response(response)
+            self._entries.move_to_end(cache_key)
+            self._keys.setdefault(key, set()).add(cache_key)
+            while len(self._entries) > self.max_size:
+                evicted, _ = self._entries.popitem(last=False)
+                self._unindex(evicted)
+
+    def cancel(self, cache_key, token):
+        "Revoke ``token`` after failing to read the response"
+        with self._lock:
+            tokens = self._pending.get(cache_key[1])
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._pending[cache_key[1]]
+
+    def invalidate(self, keys):
+        "Remove the responses of the Redis ``keys``"
+        with self._lock:
+            for key in keys:
+                key = self._encoder.encode(key)
+                self._pending.pop(key, None)
+                for cache_key in self._keys.pop(key, ()):
+                    self._entries.pop(cache_key, None)
+
+    def invalidate_command(self, args):
+        """
+        Remove the responses of the keys the command ``args`` may have
+        written to, without waiting for the server to invalidate them
+        """
+        if args[0] in self.commands or not (self._entries or self._pending):
+            return
+        from redis.client import Redis
+        from redis.commands import CommandsParser
+
+        if self._parser is None:
+            self._parser = CommandsParser(lazy=True)
+        name = str_if_bytes(args[0]).lower().split()[0]
+        command = self._parser.commands.get(name)
+        if command is not None and not {"write", "movablekeys"} & set(command["flags"]):
+            # e.g. SCAN or PING
+            return
+        pool = self._pool and self._pool()
+        keys = None
+        if pool is not None:
+            try:
+                # a client of its own, as the parser may use it from a thread
+                keys = self._parser.get_keys(Redis(connection_pool=pool), *args)
+            except RedisError:
+                pass
+        if keys is None:
+            self.flush()
+        else:
+            self.invalidate(keys)
+
+    def flush(self):
+        "Remove all the responses"
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        self._entries.clear()
+        self._keys.clear()
+        self._pending.clear()
+
+    def _unindex(self, cache_key):
+        cache_keys = self._keys.get(cache_key[1])
+        if cache_keys is not None:
+            cache_keys.discard(cache_key)
+            if not cache_keys:
+                del self._keys[cache_key[1]]
+
+    def on_connect(self, connection):
+        "Enable tracking on a new ``connection`` of the pool"
+        self._enable_tracking(connection)
+
+    def on_disconnect(self, connection):
+        "Flush the cache as the keys read by ``connection`` are no longer tracked"
+        self._tracking.pop(connection, None)
+        self.flush()
+
+    def ensure_tracking(self, connection):
+        """
+        Return whether the keys read by ``connection`` are tracked, enabling
+        tracking again if the invalidation connection changed since
+        """
+        connection.connect()
+        if self._tracking.get(connection) == self._generation:
+            return True
+        return self._enable_tracking(connection)
+
+    def _enable_tracking(self, connection):
+        self._ensure_listener()
+        with self._lock:
+            redirect, generation = self._redirect, self._generation
+        if redirect is None:
+            self._tracking.pop(connection, None)
+            return False
+        pieces = ["CLIENT", "TRACKING", "ON", "REDIRECT", redirect]
+        if self.bcast:
+            pieces.append("BCAST")
+            for prefix in self._prefixes:
+                pieces.extend(["PREFIX", prefix])
+        connection.send_command(*pieces)
+        if str_if_bytes(connection.read_response()) != "OK":
+            raise ConnectionError("Error enabling client tracking")
+        self._tracking[connection] = generation
+        return True
+
+    def _ensure_listener(self):
+        if self._pubsub is not None:
+            return
+        from redis.client import PubSub
+        from redis.connection import ConnectionPool
+
+        with self._listener_lock:
+            if self._pubsub is not None:
+                return
+            pool = self._pool and self._pool()
+            if pool is None:
+                raise ConnectionError("The connection pool of the cache was closed")
+            kwargs = dict(pool.connection_kwargs)
+            kwargs.pop("client_cache", None)
+            # invalidated keys are looked up by their encoded name
+            kwargs["decode_responses"] = False
+            listener_pool = ConnectionPool(
+                connection_class=pool.connection_class, max_connections=1, **kwargs
+            )
+            pubsub = PubSub(listener_pool, ignore_subscribe_messages=True)
+            connection = listener_pool.get_connection("pubsub")
+            self._on_listener_connect(connection)
+            # runs before the resubscription callback of the PubSub so that
+            # the new client id can be read after a reconnection
+            connection.register_connect_callback(self._on_listener_connect)
+            connection.register_connect_callback(pubsub.on_connect)
+            pubsub.connection = connection
+            pubsub.subscribe(**{INVALIDATION_CHANNEL: self._on_invalidation})
+            self._thread = pubsub.run_in_thread(
+                sleep_time=1.0, daemon=True, exception_handler=self._on_listener_error
+            )
+            self._pubsub = pubsub
+
+    def _on_listener_connect(self, connection):
+        connection.send_command("CLIENT", "ID")
+        redirect = connection.read_response()
+        with self._lock:
+            self._redirect = redirect
+            self._generation += 1
+            self._flush()
+
+    def _on_listener_error(self, error, pubsub, thread):
+        # the PubSub reconnects on the next read, nothing can be cached
+        # meanwhile as invalidations would be missed
+        with self._lock:
+            self._redirect = None
+            self._generation += 1
+            self._flush()
+        time.sleep(1.0)
+
+    def _on_invalidation(self, message):
+        keys = message["data"]
+        if keys is None:
+            # the server flushed its tracking table
+            self.flush()
+        else:
+            self.invalidate(keys)
+
+    def close(self):
+        """
+        Stop listening to invalidations and flush the cache. The listener
+        is started again if the client is used afterwards.
+        """
+        with self._listener_lock:
+            if self._thread is not None:
+                # the thread closes the PubSub once stopped
+                self._thread.stop()
+                self._thread = None
+            self._pubsub = None
+        with self._lock:
+            self._redirect = None
+            self._generation += 1
+            self._flush()
+
+
+class Singleflight:
+    """
+    Coalesces identical concurrent calls: while a call for a key is in
+    flight, the threads making a call for the same key wait for its result
+    instead of making their own.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def __len__(self):
+        return len(self._calls)
+
+    def call(self, key, func):
+        """
+        Return the result of ``func()``, or of the call in flight for
+        ``key``. Errors are raised in every waiting thread.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy_response(call.result)
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        # the waiters copy the result concurrently
+        return copy_response(call.result)
+
+
+class RequestCache:
+    """
+    Memoizes the responses to the read commands executed by a client in
+    the current thread, for the duration of a ``with`` block. Returned by
+    ``Redis.request_cache()``; nested blocks share the outermost cache.
+    Like the coalescing of reads, it leaves out the commands replying at
+    random, and GEORADIUS and GEORADIUSBYMEMBER, which write with STORE.
+
+    The keys of the commands are determined with the client's
+    :py:class:`~redis.commands.CommandsParser`. Commands writing to keys
+    through the client, or through its pipelines, remove the responses for
+    these keys, and all the responses are removed when a command may write
+    to keys that can't be determined. The modifications made by other
+    clients are not seen until the end of the block.
+    """
+
+    def __init__(self, client):
+        from redis.client import COALESCED_COMMANDS
+
+        self.client = client
+        self.read_commands = COALESCED_COMMANDS
+        self.hits = 0
+        self.misses = 0
+        self._encoder = client.get_encoder()
+        self._entries = {}
+        # call keys of the entries of each Redis key
+        self._keys = {}
+        # set while looking the keys of a command up with the client
+        self._resolving = False
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}<entries={len(self)}, "
+            f"hits={self.hits}, misses={self.misses}>"
+        )
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __enter__(self):
+        scope = self.client._request_cache
+        current = getattr(scope, "current", None)
+        if current is not None:
+            return current
+        # the command table is fetched before the block starts
+        self.client._get_commands_parser()
+        scope.current = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        scope = self.client._request_cache
+        if getattr(scope, "current", None) is self:
+            scope.current = None
+            self.clear()
+
+    def execute_command(self, args, options, execute, memoize=True):
+        """
+        Return the memoized response to the command ``args``, or the
+        response returned by ``execute()``
+        """
+        if self._resolving:
+            return execute()
+        if args[0] not in self.read_commands:
+            keys = self._written_keys(args)
+            try:
+                return execute()
+            finally:
+                self._invalidate(keys)
+        try:
+            call_key = (args, frozenset(options.items()))
+            hash(call_key)
+        except TypeError:
+            # unhashable arguments or options
+            memoize = False
+        if not memoize:
+            return execute()
+        try:
+            response = self._entries[call_key]
+        except KeyError:
+            self.misses += 1
+        else:
+            self.hits += 1
+            return copy_response(response)
+        keys = self._get_keys(args)
+        response = execute()
+        if keys:
+            self._entries[call_key] = copy_response(response)
+            for key in keys:
+                self._keys.setdefault(key, set()).add(call_key)
+        return response
+
+    def invalidate_command(self, args):
+        "Remove the responses for the keys the command ``args`` writes to"
+        if args[0] not in self.read_commands:
+            self._invalidate(self._written_keys(args))
+
+    def clear(self):
+        "Remove all the responses"
+        self._entries.clear()
+        self._keys.clear()
+
+    def _invalidate(self, keys):
+        if keys is None:
+            self.clear()
+            return
+        for key in keys:
+            for call_key in self._keys.pop(key, ()):
+                self._entries.pop(call_key, None)
+
+    def _get_keys(self, args):
+        "Return the encoded keys of the command ``args``, or None"
+        parser = self.client._get_commands_parser()
+        self._resolving = True
+        try:
+            keys = parser.get_keys(self.client, *args)
+        except RedisError:
+            return None
+        finally:
+            self._resolving = False
+        if keys is None:
+            return None
+        return [self._encoder.encode(key) for key in keys]
+
+    def _written_keys(self, args):
+        "Return the keys the command ``args`` may write to, or None if unknown"
+        keys = self._get_keys(args)
+        if keys:
+            return keys
+        parser = self.client._get_commands_parser()
+        name = str_if_bytes(args[0]).lower().split()[0]
+        command = parser.commands.get(name)
+        if command is not None and not {"write", "movablekeys"} & set(command["flags"]):
+            # e.g. PING or INFO
+            return []
+        return None
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def copy_response(response):
+    "Return a copy of mutable responses, so that every caller gets its own"
+    if isinstance(response, (list, dict, set)):
+        return copy.copy(response)
+    return response
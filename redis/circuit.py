@@ -0,0 +1,152 @@
+import threading
+from collections import deque
+from time import monotonic
+
+from redis.exceptions import CircuitBreakerOpenError
+
+
+class CircuitBreaker:
+    """
+    Fail fast when talking to a Redis server that is known to be down.
+
+    The breaker starts ``closed`` and keeps the outcome of the last
+    ``window_size`` calls. Once at least ``minimum_calls`` outcomes were
+    recorded and the ratio of failures reaches ``failure_threshold``, the
+    breaker trips ``open`` and every call is rejected immediately with a
+    :py:class:`~redis.exceptions.CircuitBreakerOpenError`.
+
+    After ``recovery_timeout`` seconds the breaker becomes ``half-open`` and
+    lets up to ``half_open_max_calls`` probe calls through. A successful probe
+    closes the breaker again, a failed probe opens it for another
+    ``recovery_timeout`` seconds.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(
+        self,
+        failure_threshold=0.5,
+        minimum_calls=10,
+        window_size=100,
+        recovery_timeout=5,
+        half_open_max_calls=1,
+    ):
+        if not 0 < failure_threshold <= 1:
+            raise ValueError('"failure_threshold" must be in the range (0, 1]')
+        if minimum_calls < 1 or window_size < minimum_calls:
+            raise ValueError(
+                '"minimum_calls" must be positive and not exceed "window_size"'
+            )
+        if half_open_max_calls < 1:
+            raise ValueError('"half_open_max_calls" must be a positive integer')
+        self.failure_threshold = failure_threshold
+        self.minimum_calls = minimum_calls
+        self.window_size = window_size
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._lock = threading.Lock()
+        self.reset()
+
+    def __repr__(self):
+        return f"{type(self).__name__}<state={self.state}>"
+
+    def __deepcopy__(self, memo):
+        # a breaker guards a single server, so a copy starts with a clean
+        # state instead of sharing (or cloning) the one of the original
+        return type(self)(
+            failure_threshold=self.failure_threshold,
+            minimum_calls=self.minimum_calls,
+            window_size=self.window_size,
+            recovery_timeout=self.recovery_timeout,
+            half_open_max_calls=self.half_open_max_calls,
+        )
+
+    def reset(self):
+        "Close the breaker and forget all recorded outcomes"
+        with self._lock:
+            self._close()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def allow_request(self):
+        "Return True if a call to the server may be attempted"
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN:
+                now = monotonic()
+                if now >= self._probes_started + self.recovery_timeout:
+                    # the previous probes never reported back, allow new ones
+                    self._probes = 0
+                    self._probes_started = now
+                if self._probes < self.half_open_max_calls:
+                    self._probes += 1
+                    return True
+            return False
+
+    def before_request(self):
+        "Raise ``CircuitBreakerOpenError`` if no call may be attempted"
+        if not self.allow_request():
+            raise CircuitBreakerOpenError(
+                "Circuit breaker is open, the server is considered unavailable"
+            )
+
+    def record_success(self):
+        "Record a call that reached the server"
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._close()
+            elif self._state == self.CLOSED:
+                self._record(False)
+
+    def record_failure(self):
+        "Record a call that failed with a connection or timeout error"
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._open()
+            elif self._state == self.CLOSED:
+                self._record(True)
+                calls = len(self._outcomes)
+                if (
+                    calls >= self.minimum_calls
+                    and self._failures / calls >= self.failure_threshold
+                ):
+                    self._open()
+
+    def _current_state(self):
+        if (
+            self._state == self.OPEN
+            and monotonic() >= self._opened_at + self.recovery_timeout
+        ):
+            self._state = self.HALF_OPEN
+            self._probes = 0
+            self._probes_started = monotonic()
+        return self._state
+
+    def _record(self, failed):
+        outcomes = self._outcomes
+        if len(outcomes) == outcomes.maxlen:
+            # the oldest outcome is about to drop out of the window
+            self._failures -= outcomes[0]
+        outcomes.append(failed)
+        self._failures += failed
+
+    def _close(self):
+        self._state = self.CLOSED
+        self._outcomes = deque(maxlen=self.window_size)
+        self._failures = 0
+        self._opened_at = 0
+        self._probes = 0
+        self._probes_started = 0
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = monotonic()
+        self._outcomes.clear()
+        self._failures = 0
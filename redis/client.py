@@ -1,12 +1,16 @@
 import copy
 import datetime
 import re
+import socket
 import threading
 import time
 import warnings
+from contextlib import ExitStack
 from itertools import chain
 
+from redis.cache import MISSING, RequestCache, Singleflight
 from redis.commands import (
+    CommandsParser,
     CoreCommands,
     RedisModuleCommands,
     SentinelCommands,
@@ -15,8 +19,10 @@ from redis.commands import (
 from redis.connection import ConnectionPool, SSLConnection, UnixDomainSocketConnection
 from redis.exceptions import (
     ConnectionError,
+    DataError,
     ExecAbortError,
     ModuleError,
+    NoScriptError,
     PubSubError,
     RedisError,
     ResponseError,
@@ -32,6 +38,67 @@ EMPTY_RESPONSE = "EMPTY_RESPONSE"
 # some responses (ie. dump) are binary, and just meant to never be decoded
 NEVER_DECODE = "NEVER_DECODE"
 
+# commands sent with this option don't get a reply from the server, they
+# are preceded by CLIENT REPLY SKIP and return None
+NOREPLY = "NOREPLY"
+
+# Not complete, but covers the major ones
+# https://redis.io/commands
+READ_COMMANDS = frozenset(
+    [
+        "BITCOUNT",
+        "BITPOS",
+        "EXISTS",
+        "FCALL_RO",
+        "GEODIST",
+        "GEOHASH",
+        "GEOPOS",
+        "GEORADIUS",
+        "GEORADIUSBYMEMBER",
+        "GET",
+        "GETBIT",
+        "GETRANGE",
+        "HEXISTS",
+        "HGET",
+        "HGETALL",
+        "HKEYS",
+        "HLEN",
+        "HMGET",
+        "HSTRLEN",
+        "HVALS",
+        "KEYS",
+        "LINDEX",
+        "LLEN",
+        "LRANGE",
+        "MGET",
+        "PTTL",
+        "RANDOMKEY",
+        "SCARD",
+        "SDIFF",
+        "SINTER",
+        "SISMEMBER",
+        "SMEMBERS",
+        "SRANDMEMBER",
+        "STRLEN",
+        "SUNION",
+        "TTL",
+        "ZCARD",
+        "ZCOUNT",
+        "ZRANGE",
+        "ZSCORE",
+    ]
+)
+
+# The read commands whose reply only depends on their arguments and the data,
+# so that concurrent identical calls can share it. RANDOMKEY and SRANDMEMBER
+# reply at random, GEORADIUS and GEORADIUSBYMEMBER write with STORE.
+COALESCED_COMMANDS = READ_COMMANDS - {
+    "GEORADIUS",
+    "GEORADIUSBYMEMBER",
+    "RANDOMKEY",
+    "SRANDMEMBER",
+}
+
 
 def timestamp_to_datetime(response):
     "Converts a unix timestamp to a Python datetime object"
@@ -534,6 +601,9 @@ def parse_command(response, **options):
         cmd_dict["first_key_pos"] = command[3]
         cmd_dict["last_key_pos"] = command[4]
         cmd_dict["step_count"] = command[5]
+        if len(command) > 8:
+            # Redis 7 key specifications
+            cmd_dict["key_specifications"] = command[8]
         commands[cmd_name] = cmd_dict
     return commands
 
@@ -745,6 +815,11 @@ class Redis(RedisModuleCommands, CoreCommands, SentinelCommands):
         "CONFIG RESETSTAT": bool_ok,
         "CONFIG SET": bool_ok,
         "DEBUG OBJECT": parse_debug_object,
+        "FUNCTION DELETE": bool_ok,
+        "FUNCTION FLUSH": bool_ok,
+        "FUNCTION KILL": bool_ok,
+        "FUNCTION LOAD": str_if_bytes,
+        "FUNCTION RESTORE": bool_ok,
         "GEOHASH": lambda r: list(map(str_if_bytes, r)),
         "GEOPOS": lambda r: list(
             map(lambda ll: (float(ll[0]), float(ll[1])) if ll is not None else None, r)
@@ -881,11 +956,26 @@ class Redis(RedisModuleCommands, CoreCommands, SentinelCommands):
         username=None,
         retry=None,
         redis_connect_func=None,
+        circuit_breaker=None,
+        noreply=False,
+        script_registry=None,
+        client_cache=None,
+        coalesce_reads=False,
     ):
         """
         Initialize a new Redis client.
         To specify a retry policy, first set `retry_on_timeout` to `True`
-        then set `retry` to a valid `Retry` object
+        then set `retry` to a valid `Retry` object.
+        To fail fast while the server is unavailable, set `circuit_breaker`
+        to a `CircuitBreaker` object
+        With `noreply` set, commands are sent without waiting for a reply
+        and always return None, this is meant for write-only clients
+        To keep track of the Lua scripts loaded on the server, set
+        `script_registry` to a `ScriptRegistry` object
+        To cache the responses to read commands on the client side, set
+        `client_cache` to a `ClientSideCache` object
+        With `coalesce_reads` set, identical read commands executed
+        concurrently by several threads share a single request
         """
         if not connection_pool:
             if charset is not None:
@@ -917,6 +1007,9 @@ class Redis(RedisModuleCommands, CoreCommands, SentinelCommands):
                 "health_check_interval": health_check_interval,
                 "client_name": client_name,
                 "redis_connect_func": redis_connect_func,
+                "circuit_breaker": circuit_breaker,
+                "script_registry": script_registry,
+                "client_cache": client_cache,
             }
             # based on input, setup appropriate connection args
             if unix_socket_path is not None:
@@ -956,6 +1049,10 @@ class Redis(RedisModuleCommands, CoreCommands, SentinelCommands):
             self.connection = self.connection_pool.get_connection("_")
 
         self.response_callbacks = CaseInsensitiveDict(self.__class__.RESPONSE_CALLBACKS)
+        self.noreply = noreply
+        self.singleflight = Singleflight() if coalesce_reads else None
+        self._request_cache = threading.local()
+        self._commands_parser = None
 
     def __repr__(self):
         return f"{type(self).__name__}<{repr(self.connection_pool)}>"
@@ -1003,18 +1100,65 @@ class Redis(RedisModuleCommands, CoreCommands, SentinelCommands):
         """
         setattr(self, funcname, func)
 
-    def pipeline(self, transaction=True, shard_hint=None):
+    def pipeline(
+        self,
+        transaction=True,
+        shard_hint=None,
+        max_batch=None,
+        max_bytes=None,
+        result_callback=None,
+        encode_on_append=False,
+        noreply=None,
+        concurrent_write_threshold=None,
+    ):
         """
         Return a new pipeline object that can queue multiple commands for
         later execution. ``transaction`` indicates whether all commands
         should be executed atomically. Apart from making a group of operations
         atomic, pipelines are useful for reducing the back-and-forth overhead
         between the client and server.
+
+        ``max_batch`` and ``max_bytes`` turn a non-transactional pipeline into
+        an auto-flushing one, ``encode_on_append`` makes the pipeline encode
+        commands as they are queued and ``noreply`` sends the commands of a
+        non-transactional pipeline without waiting for their replies. It
+        defaults to the ``noreply`` of the client for non-transactional
+        pipelines.
+        Requests of at least ``concurrent_write_threshold`` bytes are written
+        while their replies are being read. See :py:class:`Pipeline` for
+        details.
         """
+        if noreply is None:
+            noreply = self.noreply and not transaction
         return Pipeline(
-            self.connection_pool, self.response_callbacks, transaction, shard_hint
+            self.connection_pool,
+            self.response_callbacks,
+            transaction,
+            shard_hint,
+            max_batch=max_batch,
+            max_bytes=max_bytes,
+            result_callback=result_callback,
+            encode_on_append=encode_on_append,
+            noreply=noreply,
+            concurrent_write_threshold=concurrent_write_threshold,
+            request_cache=getattr(self._request_cache, "current", None),
         )
 
+    def request_cache(self):
+        """
+        Return a context manager memoizing the responses to the read
+        commands executed by this client in the current thread until the
+        end of the ``with`` block. Writes made through this client remove
+        the responses for the keys they modify. See
+        :py:class:`~redis.cache.RequestCache` for details.
+        """
+        return RequestCache(self)
+
+    def _get_commands_parser(self):
+        if self._commands_parser is None:
+            self._commands_parser = CommandsParser(self)
+        return self._commands_parser
+
     def transaction(self, func, *watches, **kwargs):
         """
         Convenience method for executing the callable `func` as a transaction
@@ -1138,6 +1282,14 @@ class Redis(RedisModuleCommands, CoreCommands, SentinelCommands):
         conn.send_command(*args)
         return self.parse_response(conn, command_name, **options)
 
+    def _send_command_noreply(self, conn, *args):
+        """
+        Send a command the server won't reply to
+        """
+        conn.send_packed_command(
+            conn.pack_commands([("CLIENT", "REPLY", "SKIP"), args])
+        )
+
     def _disconnect_raise(self, conn, error):
         """
         Close the connection and raise an exception
@@ -1148,14 +1300,99 @@ class Redis(RedisModuleCommands, CoreCommands, SentinelCommands):
         if not (conn.retry_on_timeout and isinstance(error, TimeoutError)):
             raise error
 
+    def _send_command_cached(self, conn, cache, cache_key, *args):
+        """
+        Send a cacheable command and cache its response if the key
+        wasn't modified in the meantime
+        """
+        token = cache.reserve(conn, cache_key)
+        try:
+            response = self._send_command_parse_response(conn, args[0], *args)
+        except BaseException:
+            cache.cancel(cache_key, token)
+            raise
+        cache.put(cache_key, token, response)
+        return response
+
     # COMMAND EXECUTION AND PROTOCOL PARSING
     def execute_command(self, *args, **options):
         "Execute a command and return a parsed response"
+        noreply = options.pop(NOREPLY, self.noreply)
+        request_cache = getattr(self._request_cache, "current", None)
+        if request_cache is not None:
+            return request_cache.execute_command(
+                args,
+                options,
+                lambda: self._execute_command_cached(args, options, noreply),
+                memoize=not noreply,
+            )
+        return self._execute_command_cached(args, options, noreply)
+
+    def _execute_command_cached(self, args, options, noreply):
+        """
+        Execute a command through the client side cache and the coalescing
+        of concurrent reads, if enabled
+        """
         pool = self.connection_pool
         command_name = args[0]
+        cache = getattr(pool, "client_cache", None)
+        cache_key = None
+        if cache is not None and not (options or noreply):
+            cache_key = cache.command_key(args)
+            if cache_key is not None:
+                response = cache.get(cache_key)
+                if response is not MISSING:
+                    return response
+        if (
+            cache is not None
+            and cache_key is None
+            and command_name not in COALESCED_COMMANDS
+        ):
+            # evict the keys the command writes to
+            try:
+                return self._execute_command(
+                    pool, command_name, args, options, noreply, None, None
+                )
+            finally:
+                cache.invalidate_command(args)
+        if (
+            self.singleflight is not None
+            and not noreply
+            and command_name in COALESCED_COMMANDS
+        ):
+            try:
+                call_key = (args, frozenset(options.items()))
+                hash(call_key)
+            except TypeError:
+                # unhashable arguments or options
+                call_key = None
+            if call_key is not None:
+                return self.singleflight.call(
+                    call_key,
+                    lambda: self._execute_command(
+                        pool, command_name, args, options, noreply, cache, cache_key
+                    ),
+                )
+        return self._execute_command(
+            pool, command_name, args, options, noreply, cache, cache_key
+        )
+
+    def _execute_command(
+        self, pool, command_name, args, options, noreply, cache, cache_key
+    ):
         conn = self.connection or pool.get_connection(command_name, **options)
 
         try:
+            if noreply:
+                return conn.retry.call_with_retry(
+                    lambda: self._send_command_noreply(conn, *args),
+                    lambda error: self._disconnect_raise(conn, error),
+                )
+            if cache_key is not None:
+                return conn.retry.call_with_retry(
+                    lambda: self._send_command_cached(conn, cache, cache_key, *args),
+                    lambda error: self._disconnect_raise(conn, error),
+                )
             return conn.retry.call_with_retry(
                 lambda: self._send_command_parse_response(
                     conn, command_name, *args, **options
@@ -1625,6 +1862,51 @@ class PubSubWorkerThread(threading.Thread):
         self._running.clear()
 
 
+class PipelineWriterThread(threading.Thread):
+    """
+    Write the packed commands of a pipeline while their replies are read
+    by the thread executing the pipeline. Used as a context manager around
+    the reading of the replies: leaving it waits for the write to finish.
+    Leaving it with an exception while the write is still in progress
+    disconnects the connection, so that the write doesn't block forever.
+    """
+
+    def __init__(self, connection, packed_commands):
+        super().__init__(daemon=True)
+        self.connection = connection
+        self.packed_commands = packed_commands
+        self.error = None
+
+    def run(self):
+        try:
+            # a health check would read a reply meant for the reading thread
+            self.connection.send_packed_command(
+                self.packed_commands, check_health=False
+            )
+        except BaseException as e:
+            self.error = e
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None and self.is_alive():
+            # unblock the write, the writing thread disconnects on failure
+            # so only shut the socket down to not race with it
+            sock = self.connection._sock
+            if sock is not None:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+            self.join()
+            self.connection.disconnect()
+            return
+        self.join()
+        if exc_type is None and self.error is not None:
+            raise self.error
+
+
 class Pipeline(Redis):
     """
     Pipelines provide a way to transmit multiple commands to the Redis server
@@ -1642,16 +1924,76 @@ class Pipeline(Redis):
     instance of an exception as a potential value. In general, these will be
     ResponseError exceptions, such as those raised when issuing a command
     on a key of a different datatype.
+
+    Non-transactional pipelines can flush themselves automatically: once
+    ``max_batch`` commands or roughly ``max_bytes`` bytes of arguments are
+    queued, the queued commands are sent to the server and their replies
+    are read before the next command is queued. The results of flushed
+    commands are not kept, each one is passed to
+    ``result_callback(index, result)`` instead, where ``index`` is the
+    position of the command since the pipeline was last executed or reset.
+    Without a ``result_callback`` the results are discarded and the first
+    error, if any, is raised. ``execute()`` flushes the remaining commands
+    the same way and returns an empty list.
+
+    With ``encode_on_append`` the commands are encoded into a single buffer
+    as they are queued instead of keeping all of their arguments around
+    until ``execute()``. Only the command names and options are kept to
+    parse the replies, so errors are annotated with the command name only.
+
+    Commands of a non-transactional pipeline created with ``noreply`` are
+    sent between CLIENT REPLY OFF and CLIENT REPLY ON, so that the server
+    only acknowledges the latter. Single commands are sent without a reply
+    when they are queued with the ``NOREPLY`` option, e.g.
+    ``pipe.execute_command("INCR", "hits", NOREPLY=True)``. The result of
+    those commands is always None, errors are not reported by the server.
+
+    By default the whole request is written before any reply is read. When
+    both the request and the replies exceed the socket buffers, the server
+    and the client can block each other until the socket times out. Requests
+    of at least ``concurrent_write_threshold`` bytes are written from a
+    separate thread instead, while the replies are being read, so that
+    pipelines of any size keep making progress.
     """
 
     UNWATCH_COMMANDS = {"DISCARD", "EXEC", "UNWATCH"}
 
-    def __init__(self, connection_pool, response_callbacks, transaction, shard_hint):
+    def __init__(
+        self,
+        connection_pool,
+        response_callbacks,
+        transaction,
+        shard_hint,
+        max_batch=None,
+        max_bytes=None,
+        result_callback=None,
+        encode_on_append=False,
+        noreply=False,
+        concurrent_write_threshold=None,
+        request_cache=None,
+    ):
+        if (max_batch or max_bytes) and transaction:
+            raise DataError(
+                "max_batch and max_bytes are only supported by "
+                "non-transactional pipelines"
+            )
+        if noreply and transaction:
+            raise DataError("noreply is only supported by non-transactional pipelines")
         self.connection_pool = connection_pool
         self.connection = None
         self.response_callbacks = response_callbacks
         self.transaction = transaction
         self.shard_hint = shard_hint
+        self.max_batch = max_batch
+        self.max_bytes = max_bytes
+        self.result_callback = result_callback
+        self.auto_flush = bool(max_batch or max_bytes)
+        self.encode_on_append = encode_on_append
+        self.noreply = noreply
+        self.concurrent_write_threshold = concurrent_write_threshold
+        self.request_cache = request_cache
+        if encode_on_append:
+            self.encoder = connection_pool.get_encoder()
 
         self.watching = False
         self.reset()
@@ -1676,8 +2018,14 @@ class Pipeline(Redis):
         return True
 
     def reset(self):
+        self._invalidate_caches(getattr(self, "command_stack", []))
         self.command_stack = []
         self.scripts = set()
+        # scripts already checked by a flush of the pipeline
+        self._checked_scripts = set()
+        self._stack_bytes = 0
+        self._flushed = 0
+        self._packed_commands = bytearray() if self.encode_on_append else None
         # make sure to reset the connection state in the event that we were
         # watching something
         if self.watching and self.connection:
@@ -1711,7 +2059,19 @@ class Pipeline(Redis):
             )
         self.explicit_transaction = True
 
+    def _invalidate_caches(self, stack):
+        "Remove the responses the commands of ``stack`` made out of date"
+        if self.request_cache is not None:
+            for args, _ in stack:
+                self.request_cache.invalidate_command(args)
+        cache = getattr(self.connection_pool, "client_cache", None)
+        if cache is not None:
+            for args, _ in stack:
+                cache.invalidate_command(args)
+
     def execute_command(self, *args, **kwargs):
+        if self.request_cache is not None:
+            self.request_cache.invalidate_command(args)
         if (self.watching or args[0] == "WATCH") and not self.explicit_transaction:
             return self.immediate_execute_command(*args, **kwargs)
         return self.pipeline_execute_command(*args, **kwargs)
@@ -1771,44 +2131,179 @@ class Pipeline(Redis):
         At some other point, you can then run: pipe.execute(),
         which will execute all commands queued in the pipe.
         """
-        self.command_stack.append((args, options))
+        # only the commands sent without a reply of their own keep the option
+        if options.pop(NOREPLY, self.noreply) and not self.noreply:
+            if self.transaction or self.explicit_transaction:
+                raise DataError("NOREPLY is not supported within transactions")
+            options[NOREPLY] = True
+        if self._packed_commands is not None:
+            if not (
+                EMPTY_RESPONSE in options
+                and (self.transaction or self.explicit_transaction)
+            ):
+                if NOREPLY in options and not self.noreply:
+                    self._pack_command(("CLIENT", "REPLY", "SKIP"))
+                self._pack_command(args)
+            # the arguments are not needed anymore to parse the reply
+            self.command_stack.append(((args[0],), options))
+        else:
+            self.command_stack.append((args, options))
+        if self.auto_flush and not self.explicit_transaction:
+            if self._packed_commands is not None:
+                self._stack_bytes = len(self._packed_commands)
+            elif self.max_bytes:
+                self._stack_bytes += sum(
+                    len(arg) if isinstance(arg, (bytes, str, memoryview)) else 8
+                    for arg in args
+                )
+            if (self.max_batch and len(self.command_stack) >= self.max_batch) or (
+                self.max_bytes and self._stack_bytes >= self.max_bytes
+            ):
+                self.flush()
         return self
 
+    def flush(self):
+        """
+        Send the queued commands of an auto-flushing pipeline and hand their
+        results to ``result_callback``. Commands queued afterwards keep
+        their position numbering, until the pipeline is executed or reset.
+        """
+        if not self.auto_flush:
+            raise RedisError("Only auto-flushing pipelines can be flushed")
+        stack = self.command_stack
+        if not stack:
+            return
+        offset = self._flushed
+        try:
+            if self.scripts:
+                self.load_scripts()
+            conn = self.connection
+            if not conn:
+                conn = self.connection_pool.get_connection("MULTI", self.shard_hint)
+                self.connection = conn
+            response = conn.retry.call_with_retry(
+                lambda: self._execute_pipeline(conn, stack, False),
+                lambda error: self._disconnect_raise_reset(conn, error),
+            )
+        finally:
+            # don't hold on to a connection between two flushes
+            if self.connection:
+                self.connection_pool.release(self.connection)
+                self.connection = None
+            # the commands are not sent again, even if they failed
+            self.command_stack = []
+            self._stack_bytes = 0
+            if self._packed_commands is not None:
+                self._packed_commands = bytearray()
+            self._flushed += len(stack)
+            self._invalidate_caches(stack)
+        if self.result_callback is None:
+            for i, r in enumerate(response):
+                if isinstance(r, ResponseError):
+                    self.annotate_exception(r, offset + i + 1, stack[i][0])
+                    raise r
+            return
+        for i, r in enumerate(response):
+            if isinstance(r, ResponseError):
+                self.annotate_exception(r, offset + i + 1, stack[i][0])
+            self.result_callback(offset + i, r)
+
+    def _pack_command(self, args):
+        "Encode a command into the buffer of an encode-on-append pipeline"
+        # split literal arguments in the command name, see pack_command()
+        if isinstance(args[0], str):
+            args = tuple(args[0].encode().split()) + args[1:]
+        elif b" " in args[0]:
+            args = tuple(args[0].split()) + args[1:]
+        # encode everything first so a bad argument leaves the buffer intact
+        encoded = [self.encoder.encode(arg) for arg in args]
+        buff = self._packed_commands
+        buff += b"*%d\r\n" % len(encoded)
+        for arg in encoded:
+            buff += b"$%d\r\n" % len(arg)
+            buff += arg
+            buff += b"\r\n"
+
+    def _pack_stack(self, connection, commands):
+        if self._packed_commands is not None:
+            all_cmds = [self._packed_commands]
+        elif self.noreply:
+            all_cmds = connection.pack_commands([args for args, _ in commands])
+        else:
+            cmds = []
+            for args, options in commands:
+                if NOREPLY in options:
+                    cmds.append(("CLIENT", "REPLY", "SKIP"))
+                cmds.append(args)
+            all_cmds = connection.pack_commands(cmds)
+        if self.noreply:
+            all_cmds = (
+                connection.pack_command("CLIENT", "REPLY", "OFF")
+                + all_cmds
+                + connection.pack_command("CLIENT", "REPLY", "ON")
+            )
+        return all_cmds
+
+    def _send_packed_commands(self, connection, all_cmds):
+        """
+        Send the packed commands of the pipeline and return a context
+        manager to read their replies in, see PipelineWriterThread
+        """
+        threshold = self.concurrent_write_threshold
+        if threshold is None or sum(map(len, all_cmds)) < threshold:
+            connection.send_packed_command(all_cmds)
+            # nothing to wait for, ExitStack is an empty context manager
+            return ExitStack()
+        # connect and check the connection before reading from it
+        if not connection._sock:
+            connection.connect()
+        connection.check_health()
+        writer = PipelineWriterThread(connection, all_cmds)
+        writer.start()
+        return writer
+
     def _execute_transaction(self, connection, commands, raise_on_error):
-        cmds = chain([(("MULTI",), {})], commands, [(("EXEC",), {})])
-        all_cmds = connection.pack_commands(
-            [args for args, options in cmds if EMPTY_RESPONSE not in options]
-        )
-        connection.send_packed_command(all_cmds)
-        errors = []
+        if self._packed_commands is not None:
+            all_cmds = (
+                connection.pack_command("MULTI")
+                + [self._packed_commands]
+                + connection.pack_command("EXEC")
+            )
+        else:
+            cmds = chain([(("MULTI",), {})], commands, [(("EXEC",), {})])
+            all_cmds = connection.pack_commands(
+                [args for args, options in cmds if EMPTY_RESPONSE not in options]
+            )
+        with self._send_packed_commands(connection, all_cmds):
+            errors = []
 
-        # parse off the response for MULTI
-        # NOTE: we need to handle ResponseErrors here and continue
-        # so that we read all the additional command messages from
-        # the socket
-        try:
-            self.parse_response(connection, "_")
-        except ResponseError as e:
-            errors.append((0, e))
-
-        # and all the other commands
-        for i, command in enumerate(commands):
-            if EMPTY_RESPONSE in command[1]:
-                errors.append((i, command[1][EMPTY_RESPONSE]))
-            else:
-                try:
-                    self.parse_response(connection, "_")
-                except ResponseError as e:
-                    self.annotate_exception(e, i + 1, command[0])
-                    errors.append((i, e))
+            # parse off the response for MULTI
+            # NOTE: we need to handle ResponseErrors here and continue
+            # so that we read all the additional command messages from
+            # the socket
+            try:
+                self.parse_response(connection, "_")
+            except ResponseError as e:
+                errors.append((0, e))
 
-        # parse the EXEC.
-        try:
-            response = self.parse_response(connection, "_")
-        except ExecAbortError:
-            if errors:
-                raise errors[0][1]
-            raise
+            # and all the other commands
+            for i, command in enumerate(commands):
+                if EMPTY_RESPONSE in command[1]:
+                    errors.append((i, command[1][EMPTY_RESPONSE]))
+                else:
+                    try:
+                        self.parse_response(connection, "_")
+                    except ResponseError as e:
+                        self.annotate_exception(e, i + 1, command[0])
+                        errors.append((i, e))
+
+            # parse the EXEC.
+            try:
+                response = self.parse_response(connection, "_")
+            except ExecAbortError:
+                if errors:
+                    raise errors[0][1]
+                raise
 
         # EXEC clears any watched keys
         self.watching = False
@@ -1826,6 +2321,9 @@ class Pipeline(Redis):
                 "Wrong number of response items from " "pipeline execution"
             )
 
+        # the next execution loads the scripts that were missing
+        self._forget_missing_scripts(response)
+
         # find any errors in the response and raise if necessary
         if raise_on_error:
             self.raise_first_error(commands, response)
@@ -1843,20 +2341,44 @@ class Pipeline(Redis):
 
     def _execute_pipeline(self, connection, commands, raise_on_error):
         # build up all commands into a single request to increase network perf
-        all_cmds = connection.pack_commands([args for args, _ in commands])
-        connection.send_packed_command(all_cmds)
+        all_cmds = self._pack_stack(connection, commands)
+        with self._send_packed_commands(connection, all_cmds):
+            if self.noreply:
+                # only CLIENT REPLY ON is acknowledged
+                connection.read_response()
+                return [None] * len(commands)
+
+            response = []
+            for args, options in commands:
+                if NOREPLY in options:
+                    response.append(None)
+                    continue
+                try:
+                    response.append(self.parse_response(connection, args[0], **options))
+                except ResponseError as e:
+                    response.append(e)
 
-        response = []
-        for args, options in commands:
-            try:
-                response.append(self.parse_response(connection, args[0], **options))
-            except ResponseError as e:
-                response.append(e)
+        # the next execution loads the scripts that were missing
+        self._forget_missing_scripts(response)
 
         if raise_on_error:
             self.raise_first_error(commands, response)
         return response
 
+    def _forget_missing_scripts(self, response):
+        """
+        Record the pipeline's scripts as not loaded if a command of the
+        pipeline failed with NOSCRIPT. Some commands that followed may have
+        run, so the error is raised rather than running the failed commands
+        again out of order.
+        """
+        if not self.scripts or not any(isinstance(r, NoScriptError) for r in response):
+            return
+        self._checked_scripts.clear()
+        registry = self._get_script_registry()
+        if registry is not None:
+            registry.discard(*(s.sha for s in self.scripts))
+
     def raise_first_error(self, commands, response):
         for i, r in enumerate(response):
             if isinstance(r, ResponseError):
@@ -1881,7 +2403,13 @@ class Pipeline(Redis):
 
     def load_scripts(self):
         # make sure all scripts that are about to be run on this pipeline exist
-        scripts = list(self.scripts)
+        scripts = [s for s in self.scripts if s not in self._checked_scripts]
+        registry = self._get_script_registry()
+        if registry is not None:
+            # no need to check for the scripts known to be loaded
+            scripts = [s for s in scripts if s.sha not in registry]
+        if not scripts:
+            return
         immediate = self.immediate_execute_command
         shas = [s.sha for s in scripts]
         # we can't use the normal script_* methods because they would just
@@ -1891,6 +2419,9 @@ class Pipeline(Redis):
             for s, exist in zip(scripts, exists):
                 if not exist:
                     s.sha = immediate("SCRIPT LOAD", s.script)
+        self._checked_scripts.update(scripts)
+        if registry is not None:
+            registry.add(*(s.sha for s in scripts))
 
     def _disconnect_raise_reset(self, conn, error):
         """
@@ -1914,6 +2445,12 @@ class Pipeline(Redis):
 
     def execute(self, raise_on_error=True):
         "Execute all the commands in the current pipeline"
+        if self.auto_flush and not self.explicit_transaction:
+            try:
+                self.flush()
+            finally:
+                self.reset()
+            return []
         stack = self.command_stack
         if not stack and not self.watching:
             return []
@@ -1939,6 +2476,74 @@ class Pipeline(Redis):
         finally:
             self.reset()
 
+    def execute_iter(self, raise_on_error=True):
+        """
+        Execute all the commands in the current pipeline, yielding an
+        ``(index, result)`` tuple as soon as the reply of each command has
+        been parsed, so that the first results can be processed while the
+        later ones are still being received.
+
+        Response callbacks are applied and errors are annotated per item.
+        With ``raise_on_error`` the first error is raised once all the
+        remaining replies were read, otherwise errors are yielded as
+        results. If the generator is closed before all replies were read,
+        the connection is disconnected.
+
+        The results of transactions are only available once EXEC returned,
+        they are yielded after the whole transaction was executed.
+        """
+        if self.transaction or self.explicit_transaction:
+            yield from enumerate(self.execute(raise_on_error))
+            return
+        stack = self.command_stack
+        if not stack:
+            self.reset()
+            return
+        if self.scripts:
+            self.load_scripts()
+        # auto-flushing pipelines keep numbering the commands
+        offset = self._flushed
+
+        conn = self.connection
+        if not conn:
+            conn = self.connection_pool.get_connection("MULTI", self.shard_hint)
+            self.connection = conn
+
+        read = 0
+        try:
+            writer = conn.retry.call_with_retry(
+                lambda: self._send_packed_commands(conn, self._pack_stack(conn, stack)),
+                lambda error: self._disconnect_raise_reset(conn, error),
+            )
+            with writer:
+                if self.noreply:
+                    conn.read_response()
+                error = None
+                for args, options in stack:
+                    try:
+                        if self.noreply or NOREPLY in options:
+                            result = None
+                        else:
+                            result = self.parse_response(conn, args[0], **options)
+                    except ResponseError as e:
+                        self.annotate_exception(e, offset + read + 1, args)
+                        result = e
+                    read += 1
+                    if error is not None:
+                        continue
+                    if raise_on_error and isinstance(result, ResponseError):
+                        # keep reading so the connection can be reused
+                        error = result
+                        continue
+                    yield offset + read - 1, result
+                if error is not None:
+                    raise error
+        finally:
+            if read < len(stack) and self.connection is conn:
+                # unread replies are left on the connection
+                conn.disconnect()
+            self.reset()
+
     def discard(self):
         """Flushes all previously queued commands
         See: https://redis.io/commands/DISCARD
@@ -1,22 +1,31 @@
 import copy
+import functools
 import logging
 import random
 import socket
 import sys
 import threading
 import time
+import weakref
+from array import array
 from collections import OrderedDict
+from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
 
-from redis.client import CaseInsensitiveDict, PubSub, Redis
+from redis.client import READ_COMMANDS, CaseInsensitiveDict, PubSub, Redis
 from redis.commands import CommandsParser, RedisClusterCommands
 from redis.connection import ConnectionPool, DefaultParser, Encoder, parse_url
 from redis.crc import REDIS_CLUSTER_HASH_SLOTS, key_slot
 from redis.exceptions import (
     AskError,
     BusyLoadingError,
+    CircuitBreakerOpenError,
     ClusterCrossSlotError,
     ClusterDownError,
     ClusterError,
+)
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import (
     DataError,
     MasterDownError,
     MovedError,
@@ -92,6 +101,7 @@ SLOT_ID = "slot-id"
 
 REDIS_ALLOWED_KEYS = (
     "charset",
+    "circuit_breaker",
     "connection_class",
     "connection_pool",
     "client_name",
@@ -125,52 +135,6 @@ KWARGS_DISABLED_KEYS = (
     "port",
 )
 
-# Not complete, but covers the major ones
-# https://redis.io/commands
-READ_COMMANDS = frozenset(
-    [
-        "BITCOUNT",
-        "BITPOS",
-        "EXISTS",
-        "GEODIST",
-        "GEOHASH",
-        "GEOPOS",
-        "GEORADIUS",
-        "GEORADIUSBYMEMBER",
-        "GET",
-        "GETBIT",
-        "GETRANGE",
-        "HEXISTS",
-        "HGET",
-        "HGETALL",
-        "HKEYS",
-        "HLEN",
-        "HMGET",
-        "HSTRLEN",
-        "HVALS",
-        "KEYS",
-        "LINDEX",
-        "LLEN",
-        "LRANGE",
-        "MGET",
-        "PTTL",
-        "RANDOMKEY",
-        "SCARD",
-        "SDIFF",
-        "SINTER",
-        "SISMEMBER",
-        "SMEMBERS",
-        "SRANDMEMBER",
-        "STRLEN",
-        "SUNION",
-        "TTL",
-        "ZCARD",
-        "ZCOUNT",
-        "ZRANGE",
-        "ZSCORE",
-    ]
-)
-
 
 def cleanup_kwargs(**kwargs):
     """
@@ -294,6 +258,15 @@ class RedisCluster(RedisClusterCommands):
             ],
             SLOT_ID,
         ),
+        list_keys_to_dict(
+            [
+                "FUNCTION DELETE",
+                "FUNCTION FLUSH",
+                "FUNCTION LOAD",
+                "FUNCTION RESTORE",
+            ],
+            PRIMARIES,
+        ),
     )
 
     CLUSTER_COMMANDS_RESPONSE_CALLBACKS = {
@@ -350,9 +323,18 @@ class RedisCluster(RedisClusterCommands):
                 "MEMORY PURGE",
                 "CLIENT PAUSE",
                 "CLIENT UNPAUSE",
+                "FUNCTION DELETE",
+                "FUNCTION FLUSH",
+                "FUNCTION RESTORE",
             ],
             lambda command, res: all(res.values()) if isinstance(res, dict) else res,
         ),
+        list_keys_to_dict(
+            [
+                "FUNCTION LOAD",
+            ],
+            lambda command, res: list(res.values()).pop(),
+        ),
         list_keys_to_dict(
             [
                 "DBSIZE",
@@ -387,6 +369,10 @@ class RedisCluster(RedisClusterCommands):
         url=None,
         retry_on_timeout=False,
         retry=None,
+        max_workers=None,
+        commands_parser=None,
+        topology_refresh_interval=None,
+        probe_all_startup_nodes=False,
         **kwargs,
     ):
         """
@@ -432,6 +418,31 @@ class RedisCluster(RedisClusterCommands):
             reinitialize_steps to 1.
             To avoid reinitializing the cluster on moved errors, set
             reinitialize_steps to 0.
+        :circuit_breaker: 'CircuitBreaker'
+            A template for the circuit breakers of the cluster's nodes. Every
+            node gets its own copy of it, and commands to a node whose breaker
+            is open fail immediately with CircuitBreakerOpenError instead of
+            waiting for the node to come back.
+        :max_workers: 'int'
+            The size of the thread pool running a command on several nodes,
+            like the commands sent to all primaries, concurrently. Defaults
+            to ThreadPoolExecutor's default. The pool is created on first use.
+        :commands_parser: 'CommandsParser'
+            The parser finding the keys of the commands. By default a parser
+            sending COMMAND to the cluster is created. Pass
+            CommandsParser(lazy=True) to start from the bundled command table
+            instead, or a parser shared with other clients of the cluster.
+        :topology_refresh_interval: 'float'
+            When set, the layout of the cluster is refreshed by a background
+            thread every topology_refresh_interval seconds, and as soon as a
+            MOVED error or a failing node hints at a change. Commands then
+            retry on the node of the redirection instead of waiting for a
+            full reinitialization, and reinitialize_steps is not used.
+        :probe_all_startup_nodes: 'bool'
+            The startup nodes are asked for the cluster's slots concurrently,
+            and the layout is built as soon as the answers cover all the
+            slots. Set to True to wait for the answers of all the reachable
+            startup nodes, and check that they agree.
 
          :**kwargs:
              Extra arguments that will be sent into Redis instance when created
@@ -514,6 +525,8 @@ class RedisCluster(RedisClusterCommands):
             from_url=from_url,
             require_full_coverage=require_full_coverage,
             skip_full_coverage_check=skip_full_coverage_check,
+            refresh_interval=topology_refresh_interval,
+            probe_all_startup_nodes=probe_all_startup_nodes,
             **kwargs,
         )
 
@@ -521,8 +534,13 @@ class RedisCluster(RedisClusterCommands):
             self.__class__.CLUSTER_COMMANDS_RESPONSE_CALLBACKS
         )
         self.result_callbacks = CaseInsensitiveDict(self.__class__.RESULT_CALLBACKS)
-        self.commands_parser = CommandsParser(self)
+        if commands_parser is None:
+            commands_parser = CommandsParser(self)
+        self.commands_parser = commands_parser
         self._lock = threading.Lock()
+        self.max_workers = max_workers
+        self._executor = None
+        self._worker = threading.local()
 
     def __enter__(self):
         return self
@@ -717,6 +735,7 @@ class RedisCluster(RedisClusterCommands):
             cluster_error_retry_attempts=self.cluster_error_retry_attempts,
             read_from_replicas=self.read_from_replicas,
             reinitialize_steps=self.reinitialize_steps,
+            commands_parser=self.commands_parser,
         )
 
     def _determine_nodes(self, *args, **kwargs):
@@ -788,8 +807,16 @@ class RedisCluster(RedisClusterCommands):
             # The command contains the slot ID
             return args[1]
 
-        # Get the keys in the command
-        keys = self._get_command_keys(*args)
+        if args[0] in ("FCALL", "FCALL_RO"):
+            # FCALL function numkeys key [key ...] arg [arg ...]
+            keys = args[3 : 3 + int(args[2])]
+            if not keys:
+                # keyless functions can run on any primary as the libraries
+                # are loaded on all of them
+                return random.randrange(0, REDIS_CLUSTER_HASH_SLOTS)
+        else:
+            # Get the keys in the command
+            keys = self._get_command_keys(*args)
         if keys is None or len(keys) == 0:
             raise RedisClusterException(
                 "No way to dispatch this command to Redis Cluster. "
@@ -893,8 +920,14 @@ class RedisCluster(RedisClusterCommands):
                         raise RedisClusterException(
                             f"No targets were found to execute {args} command on"
                         )
-                for node in target_nodes:
-                    res[node.name] = self._execute_command(node, *args, **kwargs)
+                responses = self._run_in_parallel(
+                    [
+                        functools.partial(self._execute_command, node, *args, **kwargs)
+                        for node in target_nodes
+                    ]
+                )
+                for node, response in zip(target_nodes, responses):
+                    res[node.name] = response
                 # Return the processed result
                 return self._process_result(args[0], res, **kwargs)
             except (ClusterDownError, ConnectionError) as e:
@@ -922,6 +955,7 @@ class RedisCluster(RedisClusterCommands):
 
         while ttl > 0:
             ttl -= 1
+            connection = None
             try:
                 if asking:
                     target_node = self.get_node(node_name=redirect_addr)
@@ -956,6 +990,13 @@ class RedisCluster(RedisClusterCommands):
             except (RedisClusterException, BusyLoadingError):
                 log.exception("RedisClusterException || BusyLoadingError")
                 raise
+            except CircuitBreakerOpenError:
+                # The node is known to be down, fail fast instead of waiting
+                # for it. If it has just failed on us again, its slots may
+                # have been failed over, so refresh the cluster layout.
+                if connection_error_retry_counter:
+                    self.nodes_manager.refresh()
+                raise
             except ConnectionError:
                 log.exception("ConnectionError")
                 # ConnectionError can also be raised if we couldn't get a
@@ -974,7 +1015,7 @@ class RedisCluster(RedisClusterCommands):
                 else:
                     # Hard force of reinitialize of the node/slots setup
                     # and try again with the new setup
-                    self.nodes_manager.initialize()
+                    self.nodes_manager.refresh()
                     raise
             except TimeoutError:
                 log.exception("TimeoutError")
@@ -994,7 +1035,13 @@ class RedisCluster(RedisClusterCommands):
                 # RedisCluster constructor.
                 log.exception("MovedError")
                 self.reinitialize_counter += 1
-                if self._should_reinitialized():
+                if self.nodes_manager.refresh_interval is not None:
+                    # retry on the redirected node while the layout is
+                    # refreshed in the background
+                    self.nodes_manager.update_moved_exception(e)
+                    self.nodes_manager.refresh()
+                    moved = True
+                elif self._should_reinitialized():
                     self.nodes_manager.initialize()
                 else:
                     self.nodes_manager.update_moved_exception(e)
@@ -1015,7 +1062,7 @@ class RedisCluster(RedisClusterCommands):
                 # self-healed, we will try to reinitialize the cluster layout
                 # and retry executing the command
                 time.sleep(0.05)
-                self.nodes_manager.initialize()
+                self.nodes_manager.refresh()
                 raise e
             except ResponseError as e:
                 message = e.__str__()
@@ -1032,11 +1079,45 @@ class RedisCluster(RedisClusterCommands):
 
         raise ClusterError("TTL exhausted.")
 
+    def _run_in_parallel(self, calls):
+        """
+        Run the calls on the client's thread pool and return their results
+        in order. When a call fails, the first error is raised once all the
+        calls are done.
+
+        A single call, or calls made from the pool itself, run in the
+        current thread.
+        """
+        if len(calls) < 2 or getattr(self._worker, "active", False):
+            return [call() for call in calls]
+
+        def run(call):
+            self._worker.active = True
+            return call()
+
+        executor = self._get_executor()
+        futures = [executor.submit(run, call) for call in calls]
+        wait(futures)
+        return [future.result() for future in futures]
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="redis-cluster",
+                    )
+        return self._executor
+
     def close(self):
         try:
             with self._lock:
                 if self.nodes_manager:
                     self.nodes_manager.close()
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                    self._executor = None
         except AttributeError:
             # RedisCluster's __init__ can fail before nodes_manager is set
             pass
@@ -1109,6 +1190,106 @@ class LoadBalancer:
         self.primary_to_idx.clear()
 
 
+class SlotTable(MutableMapping):
+    """
+    Maps the hash slots to the nodes serving them, the primary first.
+
+    Every slot holds an index into a small table of shards, so the whole
+    table takes a few kilobytes and a range of slots is set at once. The
+    node lists are shared by all the slots of a shard and must not be
+    modified: assign a new list to a slot instead.
+    """
+
+    def __init__(self):
+        # shard 0 marks the slots that are not covered
+        self.shards = [None]
+        self._shard_indexes = {}
+        self._slots = array("H", [0]) * REDIS_CLUSTER_HASH_SLOTS
+
+    def _get_shard_index(self, nodes):
+        key = tuple(map(id, nodes))
+        index = self._shard_indexes.get(key)
+        if index is None:
+            if len(self.shards) > 0xFFFF:
+                self._compact()
+            index = len(self.shards)
+            self.shards.append(list(nodes))
+            self._shard_indexes[key] = index
+        return index
+
+    def _compact(self):
+        "Drop the shards no slot points to anymore"
+        shards = self.shards
+        used = sorted(set(self._slots) - {0})
+        self.shards = [None] + [shards[index] for index in used]
+        self._shard_indexes = {
+            tuple(map(id, shards[index])): new_index
+            for new_index, index in enumerate(used, 1)
+        }
+        new_indexes = dict(zip(used, range(1, len(used) + 1)))
+        new_indexes[0] = 0
+        self._slots = array("H", [new_indexes[index] for index in self._slots])
+
+    def set_range(self, start, end, nodes):
+        "Assign the slots from ``start`` to ``end``, inclusive, to ``nodes``"
+        index = self._get_shard_index(nodes)
+        self._slots[start : end + 1] = array("H", [index]) * (end - start + 1)
+
+    def range_nodes(self, start, end):
+        """
+        Return the nodes of the slots from ``start`` to ``end`` when they are
+        all served by the same nodes, None if they are not, or an empty list
+        if none of them is covered.
+        """
+        indexes = self._slots[start : end + 1]
+        index = indexes[0]
+        if indexes.count(index) != len(indexes):
+            return None
+        if index == 0:
+            return []
+        return self.shards[index]
+
+    def get(self, slot, default=None):
+        try:
+            index = self._slots[slot]
+        except (IndexError, TypeError):
+            return default
+        if index == 0:
+            return default
+        return self.shards[index]
+
+    def __getitem__(self, slot):
+        nodes = self.get(slot)
+        if nodes is None:
+            raise KeyError(slot)
+        return nodes
+
+    def __setitem__(self, slot, nodes):
+        self._slots[slot] = self._get_shard_index(nodes)
+
+    def __delitem__(self, slot):
+        if self.get(slot) is None:
+            raise KeyError(slot)
+        self._slots[slot] = 0
+
+    def __contains__(self, slot):
+        return self.get(slot) is not None
+
+    def __iter__(self):
+        for slot, index in enumerate(self._slots):
+            if index:
+                yield slot
+
+    def __len__(self):
+        return REDIS_CLUSTER_HASH_SLOTS - self._slots.count(0)
+
+    def items(self):
+        shards = self.shards
+        return [
+            (slot, shards[index]) for slot, index in enumerate(self._slots) if index
+        ]
+
+
 class NodesManager:
     def __init__(
         self,
@@ -1117,10 +1298,12 @@ class NodesManager:
         require_full_coverage=True,
         skip_full_coverage_check=False,
         lock=None,
+        refresh_interval=None,
+        probe_all_startup_nodes=False,
         **kwargs,
     ):
         self.nodes_cache = {}
-        self.slots_cache = {}
+        self.slots_cache = SlotTable()
         self.startup_nodes = {}
         self.default_node = None
         self.populate_startup_nodes(startup_nodes)
@@ -1129,11 +1312,68 @@ class NodesManager:
         self._skip_full_coverage_check = skip_full_coverage_check
         self._moved_exception = None
         self.connection_kwargs = kwargs
+        self._circuit_breakers = {}
         self.read_load_balancer = LoadBalancer()
         if lock is None:
             lock = threading.Lock()
         self._lock = lock
+        self._probe_all_startup_nodes = probe_all_startup_nodes
+        self.refresh_interval = refresh_interval
+        self._refresh_event = threading.Event()
+        self._refresher = None
+        self._refresh_pending = False
         self.initialize()
+        if refresh_interval is not None:
+            self._refresher = threading.Thread(
+                target=self._run_refresher,
+                args=(weakref.ref(self), self._refresh_event, refresh_interval),
+                name="redis-cluster-refresher",
+                daemon=True,
+            )
+            self._refresher.start()
+
+    # the least time between two refreshes asked for by redirections
+    MIN_REFRESH_INTERVAL = 1
+    # the number of startup nodes asked for the slots at the same time
+    MAX_CONCURRENT_PROBES = 8
+
+    @staticmethod
+    def _run_refresher(manager_ref, event, interval):
+        # the thread only holds a weak reference to the manager, so it stops
+        # once the client is gone
+        while True:
+            event.wait(interval)
+            manager = manager_ref()
+            if manager is None or manager._refresher is None:
+                return
+            event.clear()
+            try:
+                manager.initialize()
+            except Exception:
+                log.exception("Failed to refresh the cluster topology")
+            del manager
+            time.sleep(min(interval, NodesManager.MIN_REFRESH_INTERVAL))
+
+    def refresh(self):
+        """
+        Refresh the topology of the cluster: in the background when the
+        manager was created with a refresh_interval, otherwise right away.
+        """
+        if self._refresher is not None:
+            self._refresh_event.set()
+        else:
+            self.initialize()
+
+    def refresh_later(self):
+        """
+        Refresh the topology of the cluster: in the background when the
+        manager was created with a refresh_interval, otherwise before the
+        next slot lookup.
+        """
+        if self._refresher is not None:
+            self._refresh_event.set()
+        else:
+            self._refresh_pending = True
 
     def get_node(self, host=None, port=None, node_name=None):
         """
@@ -1156,6 +1396,19 @@ class NodesManager:
             )
             return None
 
+    def get_redirected_node(self, host, port):
+        """
+        Return the node a command was redirected to, adding it to the nodes
+        cache, with its connections, if it is a new node
+        """
+        with self._lock:
+            redirected_node = self.get_node(host=host, port=port)
+            if redirected_node is None:
+                redirected_node = ClusterNode(host, port, PRIMARY)
+                self.create_redis_connections([redirected_node])
+                self.nodes_cache[redirected_node.name] = redirected_node
+        return redirected_node
+
     def update_moved_exception(self, exception):
         self._moved_exception = exception
 
@@ -1174,19 +1427,23 @@ class NodesManager:
             # This is a new node, we will add it to the nodes cache
             redirected_node = ClusterNode(e.host, e.port, PRIMARY)
             self.nodes_cache[redirected_node.name] = redirected_node
-        if redirected_node in self.slots_cache[e.slot_id]:
+        # the node lists are shared by the slots of a shard, so the slot gets
+        # a new list
+        slot_nodes = list(self.slots_cache[e.slot_id])
+        if redirected_node in slot_nodes:
             # The MOVED error resulted from a failover, and the new slot owner
             # had previously been a replica.
-            old_primary = self.slots_cache[e.slot_id][0]
+            old_primary = slot_nodes[0]
             # Update the old primary to be a replica and add it to the end of
             # the slot's node list
             old_primary.server_type = REPLICA
-            self.slots_cache[e.slot_id].append(old_primary)
+            slot_nodes.append(old_primary)
             # Remove the old replica, which is now a primary, from the slot's
             # node list
-            self.slots_cache[e.slot_id].remove(redirected_node)
+            slot_nodes.remove(redirected_node)
             # Override the old primary with the new one
-            self.slots_cache[e.slot_id][0] = redirected_node
+            slot_nodes[0] = redirected_node
+            self.slots_cache[e.slot_id] = slot_nodes
             if self.default_node == old_primary:
                 # Update the default node with the new primary
                 self.default_node = redirected_node
@@ -1202,12 +1459,15 @@ class NodesManager:
         """
         Gets a node that servers this hash slot
         """
+        if self._refresh_pending:
+            self.initialize()
         if self._moved_exception:
             with self._lock:
                 if self._moved_exception:
                     self._update_moved_slots()
 
-        if self.slots_cache.get(slot) is None or len(self.slots_cache[slot]) == 0:
+        slot_nodes = self.slots_cache.get(slot)
+        if not slot_nodes:
             raise SlotNotCoveredError(
                 f'Slot "{slot}" not covered by the cluster. '
                 f'"require_full_coverage={self._require_full_coverage}"'
@@ -1215,23 +1475,19 @@ class NodesManager:
 
         if read_from_replicas is True:
             # get the server index in a Round-Robin manner
-            primary_name = self.slots_cache[slot][0].name
+            primary_name = slot_nodes[0].name
             node_idx = self.read_load_balancer.get_server_index(
-                primary_name, len(self.slots_cache[slot])
+                primary_name, len(slot_nodes)
             )
-        elif (
-            server_type is None
-            or server_type == PRIMARY
-            or len(self.slots_cache[slot]) == 1
-        ):
+        elif server_type is None or server_type == PRIMARY or len(slot_nodes) == 1:
             # return a primary
             node_idx = 0
         else:
             # return a replica
             # randomly choose one of the replicas
-            node_idx = random.randint(1, len(self.slots_cache[slot]) - 1)
+            node_idx = random.randint(1, len(slot_nodes) - 1)
 
-        return self.slots_cache[slot][node_idx]
+        return slot_nodes[node_idx]
 
     def get_nodes_by_server_type(self, server_type):
         """
@@ -1281,10 +1537,7 @@ class NodesManager:
     def check_slots_coverage(self, slots_cache):
         # Validate if all slots are covered or if we should try next
         # startup node
-        for i in range(0, REDIS_CLUSTER_HASH_SLOTS):
-            if i not in slots_cache:
-                return False
-        return True
+        return len(slots_cache) == REDIS_CLUSTER_HASH_SLOTS
 
     def create_redis_connections(self, nodes):
         """
@@ -1299,6 +1552,12 @@ class NodesManager:
                 )
 
     def create_redis_node(self, host, port, **kwargs):
+        if kwargs.get("circuit_breaker") is not None:
+            # every node is guarded by a circuit breaker of its own, which
+            # outlives the reinitializations of the cluster layout
+            kwargs["circuit_breaker"] = self._circuit_breakers.setdefault(
+                get_node_name(host, port), copy.deepcopy(kwargs["circuit_breaker"])
+            )
         if self.from_url:
             # Create a redis node with a costumed connection pool
             kwargs.update({"host": host})
@@ -1308,6 +1567,102 @@ class NodesManager:
             r = Redis(host=host, port=port, **kwargs)
         return r
 
+    def _probe_startup_node(self, startup_node):
+        """
+        Return the CLUSTER SLOTS reply of a startup node, or None if the node
+        can't be reached, its cluster is down or the reply isn't a list.
+        """
+        try:
+            if startup_node.redis_connection:
+                r = startup_node.redis_connection
+            else:
+                # Create a new Redis connection and let Redis decode the
+                # responses so we won't need to handle that
+                copy_kwargs = copy.deepcopy(self.connection_kwargs)
+                copy_kwargs.update({"decode_responses": True, "encoding": "utf-8"})
+                r = self.create_redis_node(
+                    startup_node.host, startup_node.port, **copy_kwargs
+                )
+                startup_node.redis_connection = r
+            cluster_slots = r.execute_command("CLUSTER SLOTS")
+        except (ConnectionError, RedisConnectionError, TimeoutError) as e:
+            # RedisConnectionError covers the open circuit breakers
+            msg = e.__str__
+            log.exception(
+                "An exception occurred while trying to"
+                " initialize the cluster using the seed node"
+                f" {startup_node.name}:\n{msg}"
+            )
+            return None
+        except ResponseError as e:
+            log.exception('ReseponseError sending "cluster slots" to redis server')
+
+            # Isn't a cluster connection, so it won't parse these
+            # exceptions automatically
+            message = e.__str__()
+            if "CLUSTERDOWN" in message or "MASTERDOWN" in message:
+                return None
+            elif "cluster support disabled" in message:
+                raise RedisClusterException(
+                    f"Cluster mode is not enabled on this node: {startup_node.name}"
+                )
+            else:
+                raise RedisClusterException(
+                    'ERROR sending "cluster slots" command to redis '
+                    f"server: {startup_node}. error: {message}"
+                )
+        except Exception as e:
+            message = e.__str__()
+            raise RedisClusterException(
+                'ERROR sending "cluster slots" command to redis '
+                f"server {startup_node.name}. error: {message}"
+            )
+        if not isinstance(cluster_slots, list):
+            log.error(
+                f'Unexpected reply to "cluster slots" from {startup_node.name}: '
+                f"{cluster_slots!r}"
+            )
+            return None
+        return cluster_slots
+
+    def _probe_startup_nodes(self, startup_nodes):
+        """
+        Send CLUSTER SLOTS to the startup nodes concurrently, and yield the
+        ``(startup node, reply)`` pairs as the replies come back. Closing
+        the generator cancels the probes that haven't started yet.
+        """
+        if len(startup_nodes) < 2:
+            for startup_node in startup_nodes:
+                yield startup_node, self._probe_startup_node(startup_node)
+            return
+        executor = ThreadPoolExecutor(
+            max_workers=min(len(startup_nodes), self.MAX_CONCURRENT_PROBES),
+            thread_name_prefix="redis-cluster-probe",
+        )
+        futures = {
+            executor.submit(self._probe_startup_node, startup_node): startup_node
+            for startup_node in startup_nodes
+        }
+        try:
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+            # the probes still running are left to finish on their own
+            executor.shutdown(wait=False)
+
+    def _get_or_create_node(self, host, port, server_type):
+        """
+        Return the node at host:port of the nodes cache, so that its
+        connections are kept, or a new node if it isn't known yet.
+        """
+        node = self.nodes_cache.get(get_node_name(host, port))
+        if node is None:
+            return ClusterNode(host, port, server_type)
+        node.server_type = server_type
+        return node
+
     def initialize(self):
         """
         Initializes the nodes cache, slots cache and redis connections.
@@ -1315,59 +1670,17 @@ class NodesManager:
             Responsible for discovering other nodes in the cluster
         """
         log.debug("Initializing the nodes' topology of the cluster")
+        self._refresh_pending = False
         self.reset()
         tmp_nodes_cache = {}
-        tmp_slots = {}
+        tmp_slots = SlotTable()
         disagreements = []
         startup_nodes_reachable = False
-        kwargs = self.connection_kwargs
-        for startup_node in self.startup_nodes.values():
-            try:
-                if startup_node.redis_connection:
-                    r = startup_node.redis_connection
-                else:
-                    # Create a new Redis connection and let Redis decode the
-                    # responses so we won't need to handle that
-                    copy_kwargs = copy.deepcopy(kwargs)
-                    copy_kwargs.update({"decode_responses": True, "encoding": "utf-8"})
-                    r = self.create_redis_node(
-                        startup_node.host, startup_node.port, **copy_kwargs
-                    )
-                    self.startup_nodes[startup_node.name].redis_connection = r
-                # Make sure cluster mode is enabled on this node
-                if bool(r.info().get("cluster_enabled")) is False:
-                    raise RedisClusterException(
-                        "Cluster mode is not enabled on this node"
-                    )
-                cluster_slots = r.execute_command("CLUSTER SLOTS")
-                startup_nodes_reachable = True
-            except (ConnectionError, TimeoutError) as e:
-                msg = e.__str__
-                log.exception(
-                    "An exception occurred while trying to"
-                    " initialize the cluster using the seed node"
-                    f" {startup_node.name}:\n{msg}"
-                )
+        replies = self._probe_startup_nodes(list(self.startup_nodes.values()))
+        for startup_node, cluster_slots in replies:
+            if cluster_slots is None:
                 continue
-            except ResponseError as e:
-                log.exception('ReseponseError sending "cluster slots" to redis server')
-
-                # Isn't a cluster connection, so it won't parse these
-                # exceptions automatically
-                message = e.__str__()
-                if "CLUSTERDOWN" in message or "MASTERDOWN" in message:
-                    continue
-                else:
-                    raise RedisClusterException(
-                        'ERROR sending "cluster slots" command to redis '
-                        f"server: {startup_node}. error: {message}"
-                    )
-            except Exception as e:
-                message = e.__str__()
-                raise RedisClusterException(
-                    'ERROR sending "cluster slots" command to redis '
-                    f"server {startup_node.name}. error: {message}"
-                )
+            startup_nodes_reachable = True
 
             # CLUSTER SLOTS command results in the following output:
             # [[slot_section[from_slot,to_slot,master,replica1,...,replicaN]]]
@@ -1392,44 +1705,60 @@ class NodesManager:
 
                 target_node = tmp_nodes_cache.get(get_node_name(host, port))
                 if target_node is None:
-                    target_node = ClusterNode(host, port, PRIMARY)
+                    target_node = self._get_or_create_node(host, port, PRIMARY)
                 # add this node to the nodes cache
                 tmp_nodes_cache[target_node.name] = target_node
 
-                for i in range(int(slot[0]), int(slot[1]) + 1):
-                    if i not in tmp_slots:
-                        tmp_slots[i] = []
-                        tmp_slots[i].append(target_node)
-                        replica_nodes = [slot[j] for j in range(3, len(slot))]
+                start, end = int(slot[0]), int(slot[1])
+                range_nodes = tmp_slots.range_nodes(start, end)
+                if range_nodes and range_nodes[0].name == target_node.name:
+                    # another startup node already reported the same range
+                    continue
 
-                        for replica_node in replica_nodes:
-                            host = replica_node[0]
-                            port = replica_node[1]
+                shard = [target_node]
+                replica_nodes = [slot[j] for j in range(3, len(slot))]
+                for replica_node in replica_nodes:
+                    host = replica_node[0]
+                    port = replica_node[1]
 
-                            target_replica_node = tmp_nodes_cache.get(
-                                get_node_name(host, port)
-                            )
-                            if target_replica_node is None:
-                                target_replica_node = ClusterNode(host, port, REPLICA)
-                            tmp_slots[i].append(target_replica_node)
-                            # add this node to the nodes cache
-                            tmp_nodes_cache[
-                                target_replica_node.name
-                            ] = target_replica_node
-                    else:
-                        # Validate that 2 nodes want to use the same slot cache
-                        # setup
-                        tmp_slot = tmp_slots[i][0]
-                        if tmp_slot.name != target_node.name:
-                            disagreements.append(
-                                f"{tmp_slot.name} vs {target_node.name} on slot: {i}"
+                    target_replica_node = tmp_nodes_cache.get(get_node_name(host, port))
+                    if target_replica_node is None:
+                        target_replica_node = self._get_or_create_node(
+                            host, port, REPLICA
+                        )
+                    shard.append(target_replica_node)
+                    # add this node to the nodes cache
+                    tmp_nodes_cache[target_replica_node.name] = target_replica_node
+
+                if range_nodes == []:
+                    # none of the slots is covered yet
+                    tmp_slots.set_range(start, end, shard)
+                    continue
+
+                for i in range(start, end + 1):
+                    if i not in tmp_slots:
+                        tmp_slots[i] = shard
+                        continue
+                    # Validate that 2 nodes want to use the same slot cache
+                    # setup
+                    tmp_slot = tmp_slots[i][0]
+                    if tmp_slot.name != target_node.name:
+                        disagreements.append(
+                            f"{tmp_slot.name} vs {target_node.name} on slot: {i}"
+                        )
+
+                        if len(disagreements) > 5:
+                            raise RedisClusterException(
+                                f"startup_nodes could not agree on a valid "
+                                f'slots cache: {", ".join(disagreements)}'
                             )
 
-                            if len(disagreements) > 5:
-                                raise RedisClusterException(
-                                    f"startup_nodes could not agree on a valid "
-                                    f'slots cache: {", ".join(disagreements)}'
-                                )
+            if not self._probe_all_startup_nodes and self.check_slots_coverage(
+                tmp_slots
+            ):
+                # the answers so far cover every slot
+                replies.close()
+                break
 
         if not startup_nodes_reachable:
             raise RedisClusterException(
@@ -1447,7 +1776,7 @@ class NodesManager:
             # isn't a full coverage
             raise RedisClusterException(
                 f"All slots are not covered after query all startup_nodes. "
-                f"{len(self.slots_cache)} of {REDIS_CLUSTER_HASH_SLOTS} "
+                f"{len(tmp_slots)} of {REDIS_CLUSTER_HASH_SLOTS} "
                 f"covered..."
             )
         elif not fully_covered and not self._require_full_coverage:
@@ -1467,19 +1796,34 @@ class NodesManager:
                     "cluster-require-full-coverage configuration to no on "
                     "all of the cluster nodes if you wish the cluster to "
                     "be able to serve without being fully covered."
-                    f"{len(self.slots_cache)} of {REDIS_CLUSTER_HASH_SLOTS} "
+                    f"{len(tmp_slots)} of {REDIS_CLUSTER_HASH_SLOTS} "
                     f"covered..."
                 )
 
-        # Set the tmp variables to the real variables
-        self.nodes_cache = tmp_nodes_cache
-        self.slots_cache = tmp_slots
-        # Set the default node
-        self.default_node = self.get_nodes_by_server_type(PRIMARY)[0]
+        # Set the tmp variables to the real variables, at once for the
+        # threads using the topology
+        default_node = [
+            node for node in tmp_nodes_cache.values() if node.server_type == PRIMARY
+        ][0]
+        with self._lock:
+            old_nodes_cache = self.nodes_cache
+            self.nodes_cache = tmp_nodes_cache
+            self.slots_cache = tmp_slots
+            self.default_node = default_node
         # Populate the startup nodes with all discovered nodes
-        self.populate_startup_nodes(self.nodes_cache.values())
+        self.populate_startup_nodes(tmp_nodes_cache.values())
+        for name, node in old_nodes_cache.items():
+            if name not in tmp_nodes_cache and node.redis_connection is not None:
+                # the node left the cluster, close its idle connections
+                node.redis_connection.connection_pool.disconnect(
+                    inuse_connections=False
+                )
 
     def close(self):
+        if self._refresher is not None:
+            # wake the refresher up so it stops
+            self._refresher = None
+            self._refresh_event.set()
         self.default_node = None
         for node in self.nodes_cache.values():
             if node.redis_connection:
@@ -1645,6 +1989,7 @@ class ClusterPipeline(RedisCluster):
         read_from_replicas=False,
         cluster_error_retry_attempts=3,
         reinitialize_steps=10,
+        commands_parser=None,
         **kwargs,
     ):
         """ """
@@ -1668,10 +2013,13 @@ class ClusterPipeline(RedisCluster):
             kwargs.get("decode_responses", False),
         )
 
-        # The commands parser refers to the parent
-        # so that we don't push the COMMAND command
-        # onto the stack
-        self.commands_parser = CommandsParser(super())
+        if commands_parser is None:
+            # The commands parser refers to the parent
+            # so that we don't push the COMMAND command
+            # onto the stack
+            commands_parser = CommandsParser(super())
+        # Reusing the client's parser saves a COMMAND round trip per pipeline
+        self.commands_parser = commands_parser
 
     def __repr__(self):
         """ """
@@ -1833,21 +2181,112 @@ class ClusterPipeline(RedisCluster):
         # if we have to run through it again, we only retry
         # the commands that failed.
         attempt = sorted(stack, key=lambda x: x.position)
+        for c in attempt:
+            c.node = None
+            c.asking = False
+        ttl = int(self.RedisClusterRequestTTL)
+        connection_error_retry_counter = 0
+
+        while attempt:
+            ttl -= 1
+            self._send_node_commands(attempt)
+
+            # if the response isn't an exception it is a
+            # valid response from the node
+            # we're all done with that command, YAY!
+            # if we have more commands to attempt, we've run into problems.
+            # collect all the commands we are allowed to retry.
+            # (MOVED, ASK, or connection errors or timeout errors)
+            attempt = [c for c in attempt if isinstance(c.result, ERRORS_ALLOW_RETRY)]
+            if not attempt or not allow_redirections or ttl <= 0:
+                break
+
+            # RETRY MAGIC HAPPENS HERE!
+            # The failed commands are sent again as pipelines, grouped by
+            # the node they are redirected to, until they succeed or run out
+            # of attempts like a single command would. During a resharding
+            # this keeps a large pipeline from turning into as many round
+            # trips as it has commands.
+            log.exception(
+                f"An exception occurred during pipeline execution. "
+                f"args: {attempt[-1].args}, "
+                f"error: {type(attempt[-1].result).__name__} "
+                f"{str(attempt[-1].result)}"
+            )
+            self.reinitialize_counter += 1
+            moved_error = None
+            connection_failed = False
+            for c in attempt:
+                e = c.result
+                c.node = None
+                c.asking = False
+                if isinstance(e, (AskError, MovedError)):
+                    # send the command straight to the node of the redirect
+                    c.node = self.nodes_manager.get_redirected_node(e.host, e.port)
+                    if isinstance(e, MovedError):
+                        moved_error = e
+                    else:
+                        c.asking = True
+                elif isinstance(e, (ConnectionError, TimeoutError)):
+                    connection_failed = True
+
+            if (
+                self.nodes_manager.refresh_interval is not None
+                or self._should_reinitialized()
+            ):
+                self.nodes_manager.refresh()
+            elif moved_error is not None:
+                # patch the slots cache for the commands that follow
+                self.nodes_manager.update_moved_exception(moved_error)
+
+            if connection_failed:
+                connection_error_retry_counter += 1
+                # Give the nodes 0.25 seconds to get back up, and after 5
+                # attempts give up on the commands that still fail to connect.
+                # The cluster layout is looked for again later, so that the
+                # commands keep their connection errors.
+                if connection_error_retry_counter < 5:
+                    time.sleep(0.25)
+                else:
+                    self.nodes_manager.refresh_later()
+                    attempt = [
+                        c
+                        for c in attempt
+                        if not isinstance(c.result, (ConnectionError, TimeoutError))
+                    ]
+            elif ttl < self.RedisClusterRequestTTL / 2:
+                time.sleep(0.05)
+
+        # turn the response back into a simple flat array that corresponds
+        # to the sequence of commands issued in the stack in pipeline.execute()
+        response = [c.result for c in sorted(stack, key=lambda x: x.position)]
 
+        if raise_on_error:
+            self.raise_first_error(stack)
+
+        return response
+
+    def _send_node_commands(self, commands):
+        """
+        Send the commands to their nodes in one pipeline per node, and store
+        their responses on them.
+        """
         # build a list of node objects based on node names we need to
         nodes = {}
 
         # as we move through each command that still needs to be processed,
         # we figure out the slot number that command maps to, then from
         # the slot determine the node.
-        for c in attempt:
-            # refer to our internal node -> slot table that
-            # tells us where a given
-            # command should route to.
-            slot = self.determine_slot(*c.args)
-            node = self.nodes_manager.get_node_from_slot(
-                slot, self.read_from_replicas and c.args[0] in READ_COMMANDS
-            )
+        for c in commands:
+            node = c.node
+            if node is None:
+                # refer to our internal node -> slot table that
+                # tells us where a given
+                # command should route to.
+                slot = self.determine_slot(*c.args)
+                node = self.nodes_manager.get_node_from_slot(
+                    slot, self.read_from_replicas and c.args[0] in READ_COMMANDS
+                )
 
             # now that we know the name of the node
             # ( it's just a string in the form of host:port )
@@ -1898,61 +2337,6 @@ class ClusterPipeline(RedisCluster):
         for n in nodes.values():
             n.connection_pool.release(n.connection)
 
-        # if the response isn't an exception it is a
-        # valid response from the node
-        # we're all done with that command, YAY!
-        # if we have more commands to attempt, we've run into problems.
-        # collect all the commands we are allowed to retry.
-        # (MOVED, ASK, or connection errors or timeout errors)
-        attempt = sorted(
-            (c for c in attempt if isinstance(c.result, ERRORS_ALLOW_RETRY)),
-            key=lambda x: x.position,
-        )
-        if attempt and allow_redirections:
-            # RETRY MAGIC HAPPENS HERE!
-            # send these remaing comamnds one at a time using `execute_command`
-            # in the main client. This keeps our retry logic
-            # in one place mostly,
-            # and allows us to be more confident in correctness of behavior.
-            # at this point any speed gains from pipelining have been lost
-            # anyway, so we might as well make the best
-            # attempt to get the correct behavior.
-            #
-            # The client command will handle retries for each
-            # individual command sequentially as we pass each
-            # one into `execute_command`. Any exceptions
-            # that bubble out should only appear once all
-            # retries have been exhausted.
-            #
-            # If a lot of commands have failed, we'll be setting the
-            # flag to rebuild the slots table from scratch.
-            # So MOVED errors should correct themselves fairly quickly.
-            log.exception(
-                f"An exception occurred during pipeline execution. "
-                f"args: {attempt[-1].args}, "
-                f"error: {type(attempt[-1].result).__name__} "
-                f"{str(attempt[-1].result)}"
-            )
-            self.reinitialize_counter += 1
-            if self._should_reinitialized():
-                self.nodes_manager.initialize()
-            for c in attempt:
-                try:
-                    # send each command individually like we
-                    # do in the main client.
-                    c.result = super().execute_command(*c.args, **c.options)
-                except RedisError as e:
-                    c.result = e
-
-        # turn the response back into a simple flat array that corresponds
-        # to the sequence of commands issued in the stack in pipeline.execute()
-        response = [c.result for c in sorted(stack, key=lambda x: x.position)]
-
-        if raise_on_error:
-            self.raise_first_error(stack)
-
-        return response
-
     def _fail_on_redirect(self, allow_redirections):
         """ """
         if not allow_redirections:
@@ -2101,10 +2485,14 @@ class NodeCommands:
 
         # build up all commands into a single request to increase network perf
         # send all the commands and catch connection and timeout errors.
+        packed = []
+        for c in commands:
+            if c.asking:
+                # the command follows an ASK redirect
+                packed.append(("ASKING",))
+            packed.append(c.args)
         try:
-            connection.send_packed_command(
-                connection.pack_commands([c.args for c in commands])
-            )
+            connection.send_packed_command(connection.pack_commands(packed))
         except (ConnectionError, TimeoutError) as e:
             for c in commands:
                 c.result = e
@@ -2134,6 +2522,13 @@ class NodeCommands:
             # explicitly open the connection and all will be well.
             if c.result is None:
                 try:
+                    if c.asking:
+                        try:
+                            self.parse_response(connection, "ASKING")
+                        except ResponseError:
+                            # the command's own response tells what went
+                            # wrong
+                            pass
                     c.result = self.parse_response(connection, c.args[0], **c.options)
                 except (ConnectionError, TimeoutError) as e:
                     for c in self.commands:
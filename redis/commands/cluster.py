@@ -1,7 +1,23 @@
-from redis.crc import key_slot
-from redis.exceptions import RedisClusterException, RedisError
+import functools
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
-from .core import ACLCommands, DataAccessCommands, ManagementCommands, PubSubCommands
+from redis.crc import key_slot
+from redis.exceptions import (
+    ClusterError,
+    ConnectionError,
+    RedisClusterException,
+    RedisError,
+    TimeoutError,
+)
+
+from .core import (
+    ACLCommands,
+    DataAccessCommands,
+    FunctionCommands,
+    ManagementCommands,
+    PubSubCommands,
+    ScanCheckpoint,
+)
 from .helpers import list_or_args
 
 
@@ -29,6 +45,9 @@ class ClusterMultiKeyCommands:
         for the keys of every slot. This operation will not be atomic
         if keys belong to more than one slot.
 
+        The MGET commands are sent with a pipeline, so every node gets its
+        commands in one round trip and the nodes are queried at once.
+
         Returns a list of values ordered identically to ``keys``
         """
 
@@ -46,10 +65,11 @@ class ClusterMultiKeyCommands:
         # Call MGET for every slot and concatenate
         # the results
         # We must make sure that the keys are returned in order
-        all_results = {}
+        pipe = self.pipeline()
         for slot_keys in slots_to_keys.values():
-            slot_values = self.execute_command("MGET", *slot_keys, **options)
-
+            pipe.execute_command("MGET", *slot_keys, **options)
+        all_results = {}
+        for slot_keys, slot_values in zip(slots_to_keys.values(), pipe.execute()):
             slot_results = dict(zip(slot_keys, slot_values))
             all_results.update(slot_results)
 
@@ -66,6 +86,9 @@ class ClusterMultiKeyCommands:
         Splits the keys into different slots and then calls MSET
         for the keys of every slot. This operation will not be atomic
         if keys belong to more than one slot.
+
+        The MSET commands are sent with a pipeline, like in
+        ``mget_nonatomic``.
         """
 
         # Partition the keys by slot
@@ -78,26 +101,78 @@ class ClusterMultiKeyCommands:
 
         # Call MSET for every slot and concatenate
         # the results (one result per slot)
-        res = []
+        pipe = self.pipeline()
         for pairs in slots_to_pairs.values():
-            res.append(self.execute_command("MSET", *pairs))
+            pipe.execute_command("MSET", *pairs)
 
-        return res
+        return pipe.execute()
 
     def _split_command_across_slots(self, command, *keys):
         """
         Runs the given command once for the keys
-        of each slot. Returns the sum of the return values.
+        of each slot, with a pipeline. Returns the sum of the return values.
         """
         # Partition the keys by slot
         slots_to_keys = self._partition_keys_by_slot(keys)
 
         # Sum up the reply from each command
-        total = 0
+        pipe = self.pipeline()
         for slot_keys in slots_to_keys.values():
-            total += self.execute_command(command, *slot_keys)
-
-        return total
+            pipe.execute_command(command, *slot_keys)
+
+        return sum(pipe.execute())
+
+    def map_keys(self, keys, func, raise_on_error=True):
+        """
+        Call ``func(pipe, key)`` for every key to queue the commands of the
+        key on a pipeline, and return the responses in the order of
+        ``keys``. For example, ``rc.map_keys(keys, lambda pipe, key:
+        pipe.hgetall(key))``.
+
+        The keys are grouped by the node that holds their slot, and the
+        pipelines of the nodes run concurrently. Redirected commands are
+        retried. The result of a key is the response of its command, or the
+        list of the responses when ``func`` queues several commands.
+
+        ``raise_on_error`` set to False returns the errors in place of the
+        responses instead of raising the first one.
+        """
+        keys = list(keys)
+        nodes_to_indexes = {}
+        for index, key in enumerate(keys):
+            node = self.nodes_manager.get_node_from_slot(self.keyslot(key))
+            nodes_to_indexes.setdefault(node.name, []).append(index)
+
+        def execute(indexes):
+            pipe = self.pipeline()
+            sizes = []
+            for index in indexes:
+                size = len(pipe)
+                func(pipe, keys[index])
+                sizes.append(len(pipe) - size)
+            responses = pipe.execute(raise_on_error=raise_on_error)
+            results = []
+            start = 0
+            for size in sizes:
+                key_responses = responses[start : start + size]
+                start += size
+                if size == 1:
+                    results.append(key_responses[0])
+                else:
+                    results.append(key_responses or None)
+            return results
+
+        groups = list(nodes_to_indexes.values())
+        results = [None] * len(keys)
+        for indexes, group_results in zip(
+            groups,
+            self._run_in_parallel(
+                [functools.partial(execute, indexes) for indexes in groups]
+            ),
+        ):
+            for index, result in zip(indexes, group_results):
+                results[index] = result
+        return results
 
     def exists(self, *keys):
         """
@@ -198,6 +273,201 @@ class ClusterDataAccessCommands(DataAccessCommands):
             **kwargs,
         )
 
+    def scan_iter(self, match=None, count=None, _type=None, checkpoint=None, **kwargs):
+        """
+        Make an iterator using the SCAN command on every primary of the
+        cluster, so that the client doesn't need to remember the cursors.
+
+        The primaries are scanned concurrently, each with its own cursor,
+        and their keys are yielded as the pages come back. ``max_workers``
+        limits how many nodes are scanned at once and defaults to all of
+        them.
+
+        The scan follows topology changes: when a primary fails, or when
+        slots have migrated by the end of the scan, the affected slots are
+        scanned again on their new primary, keeping only the keys of these
+        slots. As with SCAN, a key may be returned more than once.
+
+        Passing ``target_nodes`` other than the primaries scans these nodes
+        as they are, without following topology changes.
+
+        ``checkpoint`` a ScanCheckpoint recording the cursor of every node,
+        to resume the scan later.
+
+        ``match``, ``count`` and ``_type`` are passed to SCAN, see
+        ``ScanCommands.scan_iter``.
+        """
+        return super().scan_iter(match, count, _type, checkpoint, **kwargs)
+
+    def _scan_pages(
+        self,
+        match=None,
+        count=None,
+        _type=None,
+        checkpoint=None,
+        max_workers=None,
+        target_nodes=None,
+        **kwargs,
+    ):
+        if checkpoint is None:
+            checkpoint = ScanCheckpoint()
+        match, count, _type = checkpoint._bind(
+            "SCAN", None, match, count, _type, cluster=True
+        )
+        if checkpoint.nodes is None:
+            if target_nodes is None or target_nodes == self.PRIMARIES:
+                checkpoint.owners = self._get_slot_owners()
+                nodes = self.get_primaries()
+            elif self._is_nodes_flag(target_nodes):
+                nodes = self._determine_nodes("SCAN", nodes_flag=target_nodes)
+            else:
+                nodes = self._parse_target_nodes(target_nodes)
+            checkpoint.nodes = [[node.name, 0, None] for node in nodes]
+        return self._scan_nodes(
+            checkpoint, max_workers, match=match, count=count, _type=_type, **kwargs
+        )
+
+    def _get_slot_owners(self):
+        """
+        Map every covered slot to the name of its primary.
+        """
+        return {
+            slot: nodes[0].name
+            for slot, nodes in self.nodes_manager.slots_cache.items()
+        }
+
+    def _slot_owners_changed(self, owners):
+        """
+        Return True unless a CLUSTER SLOTS reply agrees with ``owners``.
+        """
+        try:
+            layout = self.cluster_slots()
+        except RedisError:
+            return True
+        for (start, end), shard in layout.items():
+            name = "{}:{}".format(*shard["primary"])
+            for slot in range(start, end + 1):
+                if owners.get(slot) != name:
+                    return True
+        return False
+
+    def _rescan_tasks(self, owners, slots=None):
+        """
+        Return the ``[node name, 0, slots]`` scans to run again: ``slots``
+        on their current primary, or when ``slots`` is None, every slot whose
+        primary is not the one in ``owners`` anymore. ``owners`` is updated
+        with the new primaries.
+
+        The topology is refreshed to find the new primary of ``slots``, and
+        otherwise only when CLUSTER SLOTS shows slots have migrated.
+        """
+        if slots is None and not self._slot_owners_changed(owners):
+            return []
+        self.nodes_manager.initialize()
+        moved = {}
+        for slot, nodes in self.nodes_manager.slots_cache.items():
+            if slots is None:
+                if owners.get(slot) == nodes[0].name:
+                    continue
+            elif slot not in slots:
+                continue
+            owners[slot] = nodes[0].name
+            moved.setdefault(nodes[0].name, set()).add(slot)
+        return [[name, 0, node_slots] for name, node_slots in moved.items()]
+
+    def _scan_nodes(self, checkpoint, max_workers, **kwargs):
+        """
+        Scan the ``[node name, cursor, slots]`` nodes of the checkpoint
+        concurrently, yielding their pages of keys, only keeping the keys of
+        ``slots`` when it is not None.
+
+        When the checkpoint has the ``owners`` of the slots, the slots of a
+        failed node and the slots that migrated during the scan are scanned
+        again on their new primary.
+        """
+        tasks = checkpoint.nodes
+        owners = checkpoint.owners
+        if checkpoint.done:
+            return
+        executor = ThreadPoolExecutor(max_workers=max_workers or len(tasks) or 1)
+        pending = {}
+
+        def submit(task):
+            node = self.get_node(node_name=task[0])
+            if node is None:
+                if owners is None:
+                    raise RedisClusterException(
+                        f"Node {task[0]} is not in the cluster anymore"
+                    )
+                replace(task)
+                return
+            # scan the node's client directly, the cluster's SCAN result
+            # callback drops the cursor
+            redis_node = self.get_redis_connection(node)
+            pending[executor.submit(redis_node.scan, task[1], **kwargs)] = task
+
+        def remove(task):
+            tasks[:] = [t for t in tasks if t is not task]
+
+        def add(new_tasks):
+            tasks.extend(new_tasks)
+            for new_task in new_tasks:
+                submit(new_task)
+
+        def replace(task):
+            # scan the slots of the task again on their current primary
+            remove(task)
+            name, _, slots = task
+            if slots is None:
+                slots = {slot for slot, owner in owners.items() if owner == name}
+            add(self._rescan_tasks(owners, slots))
+
+        failures = 0
+        rounds = 0
+        try:
+            for task in list(tasks):
+                submit(task)
+            if not pending and owners is not None:
+                # resuming after every node was scanned
+                add(self._rescan_tasks(owners))
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = pending.pop(future)
+                    try:
+                        cursor, keys = future.result()
+                    except (ConnectionError, TimeoutError, ClusterError):
+                        failures += 1
+                        if (
+                            owners is None
+                            or failures > self.cluster_error_retry_attempts
+                        ):
+                            raise
+                        replace(task)
+                        continue
+                    failures = 0
+                    slots = task[2]
+                    if slots is not None:
+                        keys = [key for key in keys if self.keyslot(key) in slots]
+                    if keys:
+                        yield keys
+                    if cursor == 0:
+                        remove(task)
+                    else:
+                        task[1] = cursor
+                        submit(task)
+                if (
+                    not pending
+                    and owners is not None
+                    and rounds < self.cluster_error_retry_attempts
+                ):
+                    # catch up with the slots that migrated during the scan
+                    rounds += 1
+                    add(self._rescan_tasks(owners))
+            checkpoint.done = True
+        finally:
+            executor.shutdown(wait=False)
+
 
 class RedisClusterCommands(
     ClusterMultiKeyCommands,
@@ -205,6 +475,7 @@ class RedisClusterCommands(
     ACLCommands,
     PubSubCommands,
     ClusterDataAccessCommands,
+    FunctionCommands,
 ):
     """
     A class for all Redis Cluster commands
@@ -0,0 +1,228 @@
+"""
+A snapshot of the COMMAND table of Redis, used by
+:py:class:`~redis.commands.CommandsParser` until the table of the server is
+fetched. Every entry holds the name, arity, flags, first key, last key and
+step of a command, as returned by COMMAND in Redis 6.2 and 7.0 with the
+key positions of 6.2, and only the write, readonly, movablekeys and pubsub
+flags.
+"""
+
+COMMAND_TABLE = (
+    ("append", 3, ("write",), 1, 1, 1),
+    ("asking", 1, (), 0, 0, 0),
+    ("auth", -2, (), 0, 0, 0),
+    ("bgrewriteaof", 1, (), 0, 0, 0),
+    ("bgsave", -1, (), 0, 0, 0),
+    ("bitcount", -2, ("readonly",), 1, 1, 1),
+    ("bitfield", -2, ("write",), 1, 1, 1),
+    ("bitfield_ro", -2, ("readonly",), 1, 1, 1),
+    ("bitop", -4, ("write",), 2, -1, 1),
+    ("bitpos", -3, ("readonly",), 1, 1, 1),
+    ("blmove", 6, ("write",), 1, 2, 1),
+    ("blmpop", -5, ("write", "movablekeys"), 0, 0, 0),
+    ("blpop", -3, ("write",), 1, -2, 1),
+    ("brpop", -3, ("write",), 1, -2, 1),
+    ("brpoplpush", 4, ("write",), 1, 2, 1),
+    ("bzmpop", -5, ("write", "movablekeys"), 0, 0, 0),
+    ("bzpopmax", -3, ("write",), 1, -2, 1),
+    ("bzpopmin", -3, ("write",), 1, -2, 1),
+    ("client", -2, (), 0, 0, 0),
+    ("cluster", -2, (), 0, 0, 0),
+    ("command", -1, (), 0, 0, 0),
+    ("config", -2, (), 0, 0, 0),
+    ("copy", -3, ("write",), 1, 2, 1),
+    ("dbsize", 1, ("readonly",), 0, 0, 0),
+    ("decr", 2, ("write",), 1, 1, 1),
+    ("decrby", 3, ("write",), 1, 1, 1),
+    ("del", -2, ("write",), 1, -1, 1),
+    ("discard", 1, (), 0, 0, 0),
+    ("dump", 2, ("readonly",), 1, 1, 1),
+    ("echo", 2, (), 0, 0, 0),
+    ("eval", -3, ("movablekeys",), 0, 0, 0),
+    ("eval_ro", -3, ("readonly", "movablekeys"), 0, 0, 0),
+    ("evalsha", -3, ("movablekeys",), 0, 0, 0),
+    ("evalsha_ro", -3, ("readonly", "movablekeys"), 0, 0, 0),
+    ("exec", 1, (), 0, 0, 0),
+    ("exists", -2, ("readonly",), 1, -1, 1),
+    ("expire", -3, ("write",), 1, 1, 1),
+    ("expireat", -3, ("write",), 1, 1, 1),
+    ("expiretime", 2, ("readonly",), 1, 1, 1),
+    ("fcall", -3, ("movablekeys",), 0, 0, 0),
+    ("fcall_ro", -3, ("readonly", "movablekeys"), 0, 0, 0),
+    ("flushall", -1, ("write",), 0, 0, 0),
+    ("flushdb", -1, ("write",), 0, 0, 0),
+    ("function", -2, (), 0, 0, 0),
+    ("geoadd", -5, ("write",), 1, 1, 1),
+    ("geodist", -4, ("readonly",), 1, 1, 1),
+    ("geohash", -2, ("readonly",), 1, 1, 1),
+    ("geopos", -2, ("readonly",), 1, 1, 1),
+    ("georadius", -6, ("write", "movablekeys"), 1, 1, 1),
+    ("georadius_ro", -6, ("readonly",), 1, 1, 1),
+    ("georadiusbymember", -5, ("write", "movablekeys"), 1, 1, 1),
+    ("georadiusbymember_ro", -5, ("readonly",), 1, 1, 1),
+    ("geosearch", -7, ("readonly",), 1, 1, 1),
+    ("geosearchstore", -8, ("write",), 1, 2, 1),
+    ("get", 2, ("readonly",), 1, 1, 1),
+    ("getbit", 3, ("readonly",), 1, 1, 1),
+    ("getdel", 2, ("write",), 1, 1, 1),
+    ("getex", -2, ("write",), 1, 1, 1),
+    ("getrange", 4, ("readonly",), 1, 1, 1),
+    ("getset", 3, ("write",), 1, 1, 1),
+    ("hdel", -3, ("write",), 1, 1, 1),
+    ("hello", -1, (), 0, 0, 0),
+    ("hexists", 3, ("readonly",), 1, 1, 1),
+    ("hget", 3, ("readonly",), 1, 1, 1),
+    ("hgetall", 2, ("readonly",), 1, 1, 1),
+    ("hincrby", 4, ("write",), 1, 1, 1),
+    ("hincrbyfloat", 4, ("write",), 1, 1, 1),
+    ("hkeys", 2, ("readonly",), 1, 1, 1),
+    ("hlen", 2, ("readonly",), 1, 1, 1),
+    ("hmget", -3, ("readonly",), 1, 1, 1),
+    ("hmset", -4, ("write",), 1, 1, 1),
+    ("hrandfield", -2, ("readonly",), 1, 1, 1),
+    ("hscan", -3, ("readonly",), 1, 1, 1),
+    ("hset", -4, ("write",), 1, 1, 1),
+    ("hsetnx", 4, ("write",), 1, 1, 1),
+    ("hstrlen", 3, ("readonly",), 1, 1, 1),
+    ("hvals", 2, ("readonly",), 1, 1, 1),
+    ("incr", 2, ("write",), 1, 1, 1),
+    ("incrby", 3, ("write",), 1, 1, 1),
+    ("incrbyfloat", 3, ("write",), 1, 1, 1),
+    ("info", -1, (), 0, 0, 0),
+    ("keys", 2, ("readonly",), 0, 0, 0),
+    ("lastsave", 1, (), 0, 0, 0),
+    ("lcs", -3, ("readonly",), 1, 2, 1),
+    ("lindex", 3, ("readonly",), 1, 1, 1),
+    ("linsert", 5, ("write",), 1, 1, 1),
+    ("llen", 2, ("readonly",), 1, 1, 1),
+    ("lmove", 5, ("write",), 1, 2, 1),
+    ("lmpop", -4, ("write", "movablekeys"), 0, 0, 0),
+    ("lpop", -2, ("write",), 1, 1, 1),
+    ("lpos", -3, ("readonly",), 1, 1, 1),
+    ("lpush", -3, ("write",), 1, 1, 1),
+    ("lpushx", -3, ("write",), 1, 1, 1),
+    ("lrange", 4, ("readonly",), 1, 1, 1),
+    ("lrem", 4, ("write",), 1, 1, 1),
+    ("lset", 4, ("write",), 1, 1, 1),
+    ("ltrim", 4, ("write",), 1, 1, 1),
+    ("memory", -2, ("readonly", "movablekeys"), 0, 0, 0),
+    ("mget", -2, ("readonly",), 1, -1, 1),
+    ("migrate", -6, ("write", "movablekeys"), 3, 3, 1),
+    ("move", 3, ("write",), 1, 1, 1),
+    ("mset", -3, ("write",), 1, -1, 2),
+    ("msetnx", -3, ("write",), 1, -1, 2),
+    ("multi", 1, (), 0, 0, 0),
+    ("object", -2, ("readonly",), 2, 2, 1),
+    ("persist", 2, ("write",), 1, 1, 1),
+    ("pexpire", -3, ("write",), 1, 1, 1),
+    ("pexpireat", -3, ("write",), 1, 1, 1),
+    ("pexpiretime", 2, ("readonly",), 1, 1, 1),
+    ("pfadd", -2, ("write",), 1, 1, 1),
+    ("pfcount", -2, ("readonly",), 1, -1, 1),
+    ("pfmerge", -2, ("write",), 1, -1, 1),
+    ("ping", -1, (), 0, 0, 0),
+    ("psetex", 4, ("write",), 1, 1, 1),
+    ("psubscribe", -2, ("pubsub",), 0, 0, 0),
+    ("pttl", 2, ("readonly",), 1, 1, 1),
+    ("publish", 3, ("pubsub",), 0, 0, 0),
+    ("pubsub", -2, ("pubsub",), 0, 0, 0),
+    ("punsubscribe", -1, ("pubsub",), 0, 0, 0),
+    ("randomkey", 1, ("readonly",), 0, 0, 0),
+    ("readonly", 1, (), 0, 0, 0),
+    ("readwrite", 1, (), 0, 0, 0),
+    ("rename", 3, ("write",), 1, 2, 1),
+    ("renamenx", 3, ("write",), 1, 2, 1),
+    ("restore", -4, ("write",), 1, 1, 1),
+    ("rpop", -2, ("write",), 1, 1, 1),
+    ("rpoplpush", 3, ("write",), 1, 2, 1),
+    ("rpush", -3, ("write",), 1, 1, 1),
+    ("rpushx", -3, ("write",), 1, 1, 1),
+    ("sadd", -3, ("write",), 1, 1, 1),
+    ("scan", -2, ("readonly",), 0, 0, 0),
+    ("scard", 2, ("readonly",), 1, 1, 1),
+    ("script", -2, (), 0, 0, 0),
+    ("sdiff", -2, ("readonly",), 1, -1, 1),
+    ("sdiffstore", -3, ("write",), 1, -1, 1),
+    ("select", 2, (), 0, 0, 0),
+    ("set", -3, ("write",), 1, 1, 1),
+    ("setbit", 4, ("write",), 1, 1, 1),
+    ("setex", 4, ("write",), 1, 1, 1),
+    ("setnx", 3, ("write",), 1, 1, 1),
+    ("setrange", 4, ("write",), 1, 1, 1),
+    ("sinter", -2, ("readonly",), 1, -1, 1),
+    ("sintercard", -3, ("readonly", "movablekeys"), 0, 0, 0),
+    ("sinterstore", -3, ("write",), 1, -1, 1),
+    ("sismember", 3, ("readonly",), 1, 1, 1),
+    ("smembers", 2, ("readonly",), 1, 1, 1),
+    ("smismember", -3, ("readonly",), 1, 1, 1),
+    ("smove", 4, ("write",), 1, 2, 1),
+    ("sort", -2, ("write", "movablekeys"), 1, 1, 1),
+    ("sort_ro", -2, ("readonly",), 1, 1, 1),
+    ("spop", -2, ("write",), 1, 1, 1),
+    ("srandmember", -2, ("readonly",), 1, 1, 1),
+    ("srem", -3, ("write",), 1, 1, 1),
+    ("sscan", -3, ("readonly",), 1, 1, 1),
+    ("stralgo", -2, ("readonly", "movablekeys"), 0, 0, 0),
+    ("strlen", 2, ("readonly",), 1, 1, 1),
+    ("subscribe", -2, ("pubsub",), 0, 0, 0),
+    ("substr", 4, ("readonly",), 1, 1, 1),
+    ("sunion", -2, ("readonly",), 1, -1, 1),
+    ("sunionstore", -3, ("write",), 1, -1, 1),
+    ("swapdb", 3, ("write",), 0, 0, 0),
+    ("time", 1, (), 0, 0, 0),
+    ("touch", -2, ("readonly",), 1, -1, 1),
+    ("ttl", 2, ("readonly",), 1, 1, 1),
+    ("type", 2, ("readonly",), 1, 1, 1),
+    ("unlink", -2, ("write",), 1, -1, 1),
+    ("unsubscribe", -1, ("pubsub",), 0, 0, 0),
+    ("unwatch", 1, (), 0, 0, 0),
+    ("wait", 3, (), 0, 0, 0),
+    ("watch", -2, (), 1, -1, 1),
+    ("xack", -4, ("write",), 1, 1, 1),
+    ("xadd", -5, ("write",), 1, 1, 1),
+    ("xautoclaim", -6, ("write",), 1, 1, 1),
+    ("xclaim", -6, ("write",), 1, 1, 1),
+    ("xdel", -3, ("write",), 1, 1, 1),
+    ("xgroup", -2, ("write",), 2, 2, 1),
+    ("xinfo", -2, ("readonly",), 2, 2, 1),
+    ("xlen", 2, ("readonly",), 1, 1, 1),
+    ("xpending", -3, ("readonly",), 1, 1, 1),
+    ("xrange", -4, ("readonly",), 1, 1, 1),
+    ("xread", -4, ("readonly", "movablekeys"), 0, 0, 0),
+    ("xreadgroup", -7, ("write", "movablekeys"), 0, 0, 0),
+    ("xrevrange", -4, ("readonly",), 1, 1, 1),
+    ("xsetid", 3, ("write",), 1, 1, 1),
+    ("xtrim", -4, ("write",), 1, 1, 1),
+    ("zadd", -4, ("write",), 1, 1, 1),
+    ("zcard", 2, ("readonly",), 1, 1, 1),
+    ("zcount", 4, ("readonly",), 1, 1, 1),
+    ("zdiff", -3, ("readonly", "movablekeys"), 0, 0, 0),
+    ("zdiffstore", -4, ("write", "movablekeys"), 1, 1, 1),
+    ("zincrby", 4, ("write",), 1, 1, 1),
+    ("zinter", -3, ("readonly", "movablekeys"), 0, 0, 0),
+    ("zintercard", -3, ("readonly", "movablekeys"), 0, 0, 0),
+    ("zinterstore", -4, ("write", "movablekeys"), 1, 1, 1),
+    ("zlexcount", 4, ("readonly",), 1, 1, 1),
+    ("zmpop", -4, ("write", "movablekeys"), 0, 0, 0),
+    ("zmscore", -3, ("readonly",), 1, 1, 1),
+    ("zpopmax", -2, ("write",), 1, 1, 1),
+    ("zpopmin", -2, ("write",), 1, 1, 1),
+    ("zrandmember", -2, ("readonly",), 1, 1, 1),
+    ("zrange", -4, ("readonly",), 1, 1, 1),
+    ("zrangebylex", -4, ("readonly",), 1, 1, 1),
+    ("zrangebyscore", -4, ("readonly",), 1, 1, 1),
+    ("zrangestore", -5, ("write",), 1, 2, 1),
+    ("zrank", 3, ("readonly",), 1, 1, 1),
+    ("zrem", -3, ("write",), 1, 1, 1),
+    ("zremrangebylex", 4, ("write",), 1, 1, 1),
+    ("zremrangebyrank", 4, ("write",), 1, 1, 1),
+    ("zremrangebyscore", 4, ("write",), 1, 1, 1),
+    ("zrevrange", -4, ("readonly",), 1, 1, 1),
+    ("zrevrangebylex", -4, ("readonly",), 1, 1, 1),
+    ("zrevrangebyscore", -4, ("readonly",), 1, 1, 1),
+    ("zrevrank", 3, ("readonly",), 1, 1, 1),
+    ("zscan", -3, ("readonly",), 1, 1, 1),
+    ("zscore", 3, ("readonly",), 1, 1, 1),
+    ("zunion", -3, ("readonly", "movablekeys"), 0, 0, 0),
+    ("zunionstore", -4, ("write", "movablekeys"), 1, 1, 1),
+)
@@ -1,9 +1,18 @@
 import datetime
 import hashlib
+import threading
 import time
 import warnings
+import weakref
 
-from redis.exceptions import ConnectionError, DataError, NoScriptError, RedisError
+from redis.exceptions import (
+    ConnectionError,
+    DataError,
+    NoScriptError,
+    RedisError,
+    ResponseError,
+)
+from redis.utils import str_if_bytes
 
 from .helpers import list_or_args
 
@@ -2036,6 +2045,144 @@ class ListCommands:
         return self.execute_command("SORT", *pieces, **options)
 
 
+def _slots_to_ranges(slots):
+    """
+    Compress a set of slots into a sorted list of ``[start, end]`` ranges.
+    """
+    ranges = []
+    for slot in sorted(slots):
+        if ranges and ranges[-1][1] == slot - 1:
+            ranges[-1][1] = slot
+        else:
+            ranges.append([slot, slot])
+    return ranges
+
+
+def _slots_from_ranges(ranges):
+    return {slot for start, end in ranges for slot in range(start, end + 1)}
+
+
+class ScanCheckpoint:
+    """
+    The progress of a scan iterator. Passing the checkpoint back to the same
+    iterator resumes the scan where it stopped.
+
+    The iterator updates the checkpoint once every element of a page has
+    been yielded, so elements may be returned again after resuming, but
+    none is skipped. The checkpoint keeps the match and type options of the
+    scan, and the cursor of every node for a cluster scan. ``to_dict`` and
+    ``from_dict`` convert it to and from a JSON-serializable dict.
+    """
+
+    def __init__(self):
+        self.command = None
+        self.name = None
+        self.match = None
+        self.count = None
+        self._type = None
+        self.cursor = 0
+        self.done = False
+        # cluster scans: the [node name, cursor, slots] of every node being
+        # scanned and the primary of every slot
+        self.nodes = None
+        self.owners = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}<{self.to_dict()}>"
+
+    def to_dict(self):
+        nodes = owners = None
+        if self.nodes is not None:
+            nodes = [
+                {
+                    "node": name,
+                    "cursor": cursor,
+                    "slots": None if slots is None else _slots_to_ranges(slots),
+                }
+                for name, cursor, slots in self.nodes
+            ]
+        if self.owners is not None:
+            slots_by_owner = {}
+            for slot, name in self.owners.items():
+                slots_by_owner.setdefault(name, set()).add(slot)
+            owners = {
+                name: _slots_to_ranges(slots) for name, slots in slots_by_owner.items()
+            }
+        return {
+            "command": self.command,
+            "name": self.name,
+            "match": self.match,
+            "count": self.count,
+            "type": self._type,
+            "cursor": self.cursor,
+            "done": self.done,
+            "nodes": nodes,
+            "owners": owners,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        checkpoint = cls()
+        checkpoint.command = data["command"]
+        checkpoint.name = data["name"]
+        checkpoint.match = data["match"]
+        checkpoint.count = data["count"]
+        checkpoint._type = data["type"]
+        checkpoint.cursor = data["cursor"]
+        checkpoint.done = data["done"]
+        if data.get("nodes") is not None:
+            checkpoint.nodes = [
+                [
+                    node["node"],
+                    node["cursor"],
+                    (
+                        None
+                        if node["slots"] is None
+                        else _slots_from_ranges(node["slots"])
+                    ),
+                ]
+                for node in data["nodes"]
+            ]
+        if data.get("owners") is not None:
+            checkpoint.owners = {
+                slot: name
+                for name, ranges in data["owners"].items()
+                for slot in _slots_from_ranges(ranges)
+            }
+        return checkpoint
+
+    def _bind(self, command, name, match, count, _type, cluster=False):
+        """
+        Attach the checkpoint to a scan and return the match, count and type
+        options of the scan, which are the checkpoint's when resuming.
+        """
+        name = str_if_bytes(name)
+        match = str_if_bytes(match)
+        if self.command is None:
+            self.command = command
+            self.name = name
+            self.match = match
+            self._type = _type
+        else:
+            if (self.command, self.name) != (command, name) or (
+                self.nodes is not None
+            ) != cluster:
+                raise DataError(f"The checkpoint belongs to another scan: {self!r}")
+            for option, value, saved in (
+                ("match", match, self.match),
+                ("_type", _type, self._type),
+            ):
+                if value is not None and value != saved:
+                    raise DataError(f"The checkpoint was taken with {option}={saved!r}")
+        if count is not None:
+            self.count = count
+        return self.match, self.count, self._type
+
+    def _advance(self, cursor):
+        self.cursor = cursor
+        self.done = cursor == 0
+
+
 class ScanCommands:
     """
     Redis SCAN commands.
@@ -2068,7 +2215,7 @@ class ScanCommands:
             pieces.extend([b"TYPE", _type])
         return self.execute_command("SCAN", *pieces, **kwargs)
 
-    def scan_iter(self, match=None, count=None, _type=None, **kwargs):
+    def scan_iter(self, match=None, count=None, _type=None, checkpoint=None, **kwargs):
         """
         Make an iterator using the SCAN command so that the client doesn't
         need to remember the cursor position.
@@ -2082,13 +2229,196 @@ class ScanCommands:
             Stock Redis instances allow for the following types:
             HASH, LIST, SET, STREAM, STRING, ZSET
             Additionally, Redis modules can expose other types as well.
+
+        ``checkpoint`` a ScanCheckpoint recording the progress of the scan,
+            to resume it later.
         """
-        cursor = "0"
-        while cursor != 0:
-            cursor, data = self.scan(
-                cursor=cursor, match=match, count=count, _type=_type, **kwargs
+        for keys in self._scan_pages(match, count, _type, checkpoint, **kwargs):
+            yield from keys
+
+    def _scan_pages(
+        self, match=None, count=None, _type=None, checkpoint=None, **kwargs
+    ):
+        """
+        Yield the pages of keys of ``scan_iter``.
+        """
+        if checkpoint is None:
+            checkpoint = ScanCheckpoint()
+        match, count, _type = checkpoint._bind("SCAN", None, match, count, _type)
+        while not checkpoint.done:
+            cursor, keys = self.scan(
+                cursor=checkpoint.cursor,
+                match=match,
+                count=count,
+                _type=_type,
+                **kwargs,
             )
-            yield from data
+            yield keys
+            checkpoint._advance(cursor)
+
+    def scan_values(
+        self, match=None, fetch="get", batch=500, count=None, _type=None, **kwargs
+    ):
+        """
+        Make an iterator of ``(key, value)`` pairs for the keys returned by
+        ``scan_iter``, fetching the values of every SCAN page with a single
+        pipeline of at most ``batch`` keys.
+
+        ``fetch`` selects the value returned for every key:
+            ``"get"``: the GET response
+            ``"hgetall"``: the HGETALL response
+            ``"type+ttl"``: a ``(type, ttl)`` tuple of the TYPE and TTL
+            responses
+
+        ``count`` defaults to ``batch``. The other arguments are passed to
+        ``scan_iter``. Keys deleted between SCAN and the fetch get the
+        response of a missing key, and the keys holding another type than
+        ``fetch`` expects are skipped. Pass ``_type`` to have SCAN leave them
+        out on the server instead (requires Redis 6.0).
+        """
+        if fetch == "get":
+            commands = ("GET",)
+        elif fetch == "hgetall":
+            commands = ("HGETALL",)
+        elif fetch == "type+ttl":
+            commands = ("TYPE", "TTL")
+        else:
+            raise DataError("fetch must be one of 'get', 'hgetall' or 'type+ttl'")
+
+        def queue(pipe, key):
+            for command in commands:
+                pipe.execute_command(command, key)
+
+        def parse(responses):
+            return responses[0] if len(responses) == 1 else tuple(responses)
+
+        pages = self._scan_pages(match, count or batch, _type, **kwargs)
+        return self._fetch_values(pages, len(commands), queue, parse, batch)
+
+    def hscan_values(self, match=None, fields=None, batch=500, count=None, **kwargs):
+        """
+        Make an iterator of ``(key, mapping)`` pairs for the hashes returned
+        by ``scan_iter``, fetching the hashes of every SCAN page with a single
+        pipeline of at most ``batch`` keys.
+
+        ``fields`` fetches only the given fields with HMGET, the fields
+        missing from a hash are None. By default, every field is fetched
+        with HGETALL.
+
+        ``count`` defaults to ``batch``. The other arguments are passed to
+        ``scan_iter``. Requires Redis 6.0 to only scan hashes.
+        """
+
+        def queue(pipe, key):
+            if fields:
+                pipe.execute_command("HMGET", key, *fields)
+            else:
+                pipe.execute_command("HGETALL", key)
+
+        def parse(responses):
+            if fields:
+                return dict(zip(fields, responses[0]))
+            return responses[0]
+
+        pages = self._scan_pages(match, count or batch, "hash", **kwargs)
+        return self._fetch_values(pages, 1, queue, parse, batch)
+
+    def delete_pattern(self, match, batch=1000, rate=None, progress=None, **kwargs):
+        """
+        Delete the keys matching ``match`` with UNLINK, pipelining the keys
+        of every SCAN page in batches of ``batch`` keys, and return the
+        number of deleted keys.
+
+        ``rate`` caps the number of keys deleted per second. The batches are
+        then at most a tenth of ``rate``, to spread the load on the server.
+
+        ``progress`` is called after every batch with the numbers of keys
+        scanned and deleted so far.
+
+        ``count`` defaults to ``batch``. The other arguments are passed to
+        ``scan_iter``.
+        """
+        return self._pattern_command(match, "UNLINK", (), batch, rate, progress, kwargs)
+
+    def expire_pattern(
+        self, match, time, batch=1000, rate=None, progress=None, **kwargs
+    ):
+        """
+        Set an expire flag of ``time`` seconds on the keys matching
+        ``match``, pipelining the keys of every SCAN page in batches of
+        ``batch`` keys, and return the number of keys updated. ``time`` can
+        be represented by an integer or a Python timedelta object.
+
+        ``rate``, ``progress`` and the other arguments are the same as for
+        ``delete_pattern``.
+        """
+        if isinstance(time, datetime.timedelta):
+            time = int(time.total_seconds())
+        return self._pattern_command(
+            match, "EXPIRE", (time,), batch, rate, progress, kwargs
+        )
+
+    def _pattern_command(self, match, command, args, batch, rate, progress, kwargs):
+        """
+        Run ``command`` with ``args`` on every key matching ``match`` and
+        return the sum of the responses.
+        """
+        if batch < 1:
+            raise DataError("batch must be a positive integer")
+        if rate is not None:
+            if rate <= 0:
+                raise DataError("rate must be a positive number")
+            batch = max(1, min(batch, int(rate / 10)))
+        kwargs.setdefault("count", batch)
+        scanned = total = 0
+        # the earliest time the next batch can be sent at
+        deadline = None
+        with self.pipeline(transaction=False) as pipe:
+            for page in self._scan_pages(match=match, **kwargs):
+                for i in range(0, len(page), batch):
+                    keys = page[i : i + batch]
+                    if deadline is not None:
+                        delay = deadline - time.monotonic()
+                        if delay > 0:
+                            time.sleep(delay)
+                    if rate is not None:
+                        deadline = time.monotonic() + len(keys) / rate
+                    for key in keys:
+                        pipe.execute_command(command, key, *args)
+                    total += sum(pipe.execute())
+                    scanned += len(keys)
+                    if progress is not None:
+                        progress(scanned, total)
+        return total
+
+    def _fetch_values(self, pages, size, queue, parse, batch):
+        """
+        Yield ``(key, value)`` pairs for the keys of ``pages``, with one
+        pipeline per ``batch`` keys of a page. ``queue(pipe, key)`` queues
+        the ``size`` commands of a key and ``parse(responses)`` turns their
+        responses into its value. The keys holding another type of value
+        than the commands expect are skipped.
+        """
+        if batch < 1:
+            raise DataError("batch must be a positive integer")
+        with self.pipeline(transaction=False) as pipe:
+            for page in pages:
+                for start in range(0, len(page), batch):
+                    keys = page[start : start + batch]
+                    for key in keys:
+                        queue(pipe, key)
+                    responses = pipe.execute(raise_on_error=False)
+                    for i, key in enumerate(keys):
+                        key_responses = responses[i * size : (i + 1) * size]
+                        for response in key_responses:
+                            if not isinstance(response, ResponseError):
+                                continue
+                            if str(response).startswith("WRONGTYPE"):
+                                # the key holds another type of value
+                                break
+                            raise response
+                        else:
+                            yield key, parse(key_responses)
 
     def sscan(self, name, cursor=0, match=None, count=None):
         """
@@ -2108,7 +2438,7 @@ class ScanCommands:
             pieces.extend([b"COUNT", count])
         return self.execute_command("SSCAN", *pieces)
 
-    def sscan_iter(self, name, match=None, count=None):
+    def sscan_iter(self, name, match=None, count=None, checkpoint=None):
         """
         Make an iterator using the SSCAN command so that the client doesn't
         need to remember the cursor position.
@@ -2116,11 +2446,18 @@ class ScanCommands:
         ``match`` allows for filtering the keys by pattern
 
         ``count`` allows for hint the minimum number of returns
+
+        ``checkpoint`` a ScanCheckpoint recording the progress of the scan
         """
-        cursor = "0"
-        while cursor != 0:
-            cursor, data = self.sscan(name, cursor=cursor, match=match, count=count)
+        if checkpoint is None:
+            checkpoint = ScanCheckpoint()
+        match, count, _ = checkpoint._bind("SSCAN", name, match, count, None)
+        while not checkpoint.done:
+            cursor, data = self.sscan(
+                name, cursor=checkpoint.cursor, match=match, count=count
+            )
             yield from data
+            checkpoint._advance(cursor)
 
     def hscan(self, name, cursor=0, match=None, count=None):
         """
@@ -2140,7 +2477,7 @@ class ScanCommands:
             pieces.extend([b"COUNT", count])
         return self.execute_command("HSCAN", *pieces)
 
-    def hscan_iter(self, name, match=None, count=None):
+    def hscan_iter(self, name, match=None, count=None, checkpoint=None):
         """
         Make an iterator using the HSCAN command so that the client doesn't
         need to remember the cursor position.
@@ -2148,11 +2485,18 @@ class ScanCommands:
         ``match`` allows for filtering the keys by pattern
 
         ``count`` allows for hint the minimum number of returns
+
+        ``checkpoint`` a ScanCheckpoint recording the progress of the scan
         """
-        cursor = "0"
-        while cursor != 0:
-            cursor, data = self.hscan(name, cursor=cursor, match=match, count=count)
+        if checkpoint is None:
+            checkpoint = ScanCheckpoint()
+        match, count, _ = checkpoint._bind("HSCAN", name, match, count, None)
+        while not checkpoint.done:
+            cursor, data = self.hscan(
+                name, cursor=checkpoint.cursor, match=match, count=count
+            )
             yield from data.items()
+            checkpoint._advance(cursor)
 
     def zscan(self, name, cursor=0, match=None, count=None, score_cast_func=float):
         """
@@ -2175,7 +2519,9 @@ class ScanCommands:
         options = {"score_cast_func": score_cast_func}
         return self.execute_command("ZSCAN", *pieces, **options)
 
-    def zscan_iter(self, name, match=None, count=None, score_cast_func=float):
+    def zscan_iter(
+        self, name, match=None, count=None, score_cast_func=float, checkpoint=None
+    ):
         """
         Make an iterator using the ZSCAN command so that the client doesn't
         need to remember the cursor position.
@@ -2185,17 +2531,22 @@ class ScanCommands:
         ``count`` allows for hint the minimum number of returns
 
         ``score_cast_func`` a callable used to cast the score return value
+
+        ``checkpoint`` a ScanCheckpoint recording the progress of the scan
         """
-        cursor = "0"
-        while cursor != 0:
+        if checkpoint is None:
+            checkpoint = ScanCheckpoint()
+        match, count, _ = checkpoint._bind("ZSCAN", name, match, count, None)
+        while not checkpoint.done:
             cursor, data = self.zscan(
                 name,
-                cursor=cursor,
+                cursor=checkpoint.cursor,
                 match=match,
                 count=count,
                 score_cast_func=score_cast_func,
             )
             yield from data
+            checkpoint._advance(cursor)
 
 
 class SetCommands:
@@ -3792,7 +4143,11 @@ class ScriptCommands:
             pieces = []
         else:
             pieces = [sync_type]
-        return self.execute_command("SCRIPT FLUSH", *pieces)
+        response = self.execute_command("SCRIPT FLUSH", *pieces)
+        registry = self._get_script_registry()
+        if registry is not None:
+            registry.clear()
+        return response
 
     def script_kill(self):
         """
@@ -3808,7 +4163,11 @@ class ScriptCommands:
 
         For more information check https://redis.io/commands/script-load
         """
-        return self.execute_command("SCRIPT LOAD", script)
+        sha = self.execute_command("SCRIPT LOAD", script)
+        registry = self._get_script_registry()
+        if registry is not None:
+            registry.add(sha)
+        return sha
 
     def register_script(self, script):
         """
@@ -3819,6 +4178,136 @@ class ScriptCommands:
         """
         return Script(self, script)
 
+    def _get_script_registry(self):
+        "Return the ScriptRegistry of the connection pool, if any"
+        return getattr(self.connection_pool, "script_registry", None)
+
+
+class FunctionCommands:
+    """
+    Redis Function commands, available since Redis 7.0.
+    see: https://redis.io/topics/functions-intro
+    """
+
+    def function_load(self, code, replace=False, **kwargs):
+        """
+        Load a library of functions written in ``code``, which starts with a
+        shebang such as ``#!lua name=mylib``. Returns the library name.
+        ``replace`` overwrites an existing library of the same name.
+
+        For more information check https://redis.io/commands/function-load
+        """
+        pieces = ["REPLACE"] if replace else []
+        return self.execute_command("FUNCTION LOAD", *pieces, code, **kwargs)
+
+    def function_delete(self, library, **kwargs):
+        """
+        Delete the ``library`` and all its functions.
+
+        For more information check https://redis.io/commands/function-delete
+        """
+        self._forget_functions()
+        return self.execute_command("FUNCTION DELETE", library, **kwargs)
+
+    def function_flush(self, mode=None, **kwargs):
+        """
+        Delete all the libraries. ``mode`` can be SYNC or ASYNC.
+
+        For more information check https://redis.io/commands/function-flush
+        """
+        if mode not in ["SYNC", "ASYNC", None]:
+            raise DataError("FUNCTION FLUSH accepts SYNC, ASYNC or None")
+        pieces = [] if mode is None else [mode]
+        self._forget_functions()
+        return self.execute_command("FUNCTION FLUSH", *pieces, **kwargs)
+
+    def function_list(self, library=None, withcode=False, **kwargs):
+        """
+        Return information about the libraries and their functions.
+        ``library`` is a pattern the library names have to match and
+        ``withcode`` includes the source code of the libraries.
+
+        For more information check https://redis.io/commands/function-list
+        """
+        pieces = []
+        if library is not None:
+            pieces.extend(["LIBRARYNAME", library])
+        if withcode:
+            pieces.append("WITHCODE")
+        return self.execute_command("FUNCTION LIST", *pieces, **kwargs)
+
+    def function_dump(self, **kwargs):
+        """
+        Return a serialized payload of all the libraries.
+
+        For more information check https://redis.io/commands/function-dump
+        """
+        from redis.client import NEVER_DECODE
+
+        kwargs[NEVER_DECODE] = []
+        return self.execute_command("FUNCTION DUMP", **kwargs)
+
+    def function_restore(self, payload, policy=None, **kwargs):
+        """
+        Restore the libraries from the serialized ``payload``. ``policy`` can
+        be APPEND, FLUSH or REPLACE.
+
+        For more information check https://redis.io/commands/function-restore
+        """
+        pieces = [] if policy is None else [policy]
+        self._forget_functions()
+        return self.execute_command("FUNCTION RESTORE", payload, *pieces, **kwargs)
+
+    def function_kill(self, **kwargs):
+        """
+        Kill the function currently being executed.
+
+        For more information check https://redis.io/commands/function-kill
+        """
+        return self.execute_command("FUNCTION KILL", **kwargs)
+
+    def function_stats(self, **kwargs):
+        """
+        Return information about the function currently being executed and
+        the available engines.
+
+        For more information check https://redis.io/commands/function-stats
+        """
+        return self.execute_command("FUNCTION STATS", **kwargs)
+
+    def fcall(self, function, numkeys, *keys_and_args):
+        """
+        Invoke the ``function``, the first ``numkeys`` arguments of
+        ``keys_and_args`` being key names.
+
+        For more information check https://redis.io/commands/fcall
+        """
+        return self.execute_command("FCALL", function, numkeys, *keys_and_args)
+
+    def fcall_ro(self, function, numkeys, *keys_and_args):
+        """
+        Invoke the read-only ``function``, the first ``numkeys`` arguments of
+        ``keys_and_args`` being key names. Unlike FCALL, it can be sent to
+        replicas.
+
+        For more information check https://redis.io/commands/fcall_ro
+        """
+        return self.execute_command("FCALL_RO", function, numkeys, *keys_and_args)
+
+    def _forget_functions(self):
+        pool = getattr(self, "connection_pool", None)
+        registry = getattr(pool, "script_registry", None)
+        if registry is not None:
+            registry.clear_libraries()
+
+    def register_function(self, library, name, read_only=False, replica=None):
+        """
+        Return a callable :py:class:`Function` invoking the function ``name``
+        of the ``library`` code. The library is loaded on demand on every
+        server the function is called on.
+        """
+        return Function(self, library, name, read_only=read_only, replica=replica)
+
 
 class GeoCommands:
     """
@@ -4308,6 +4797,9 @@ class Script:
         try:
             return client.evalsha(self.sha, len(keys), *args)
         except NoScriptError:
+            registry = client._get_script_registry()
+            if registry is not None:
+                registry.discard(self.sha)
             # Maybe the client is pointed to a different server than the client
             # that created this instance?
             # Overwrite the sha just in case there was a discrepancy.
@@ -4315,6 +4807,217 @@ class Script:
             return client.evalsha(self.sha, len(keys), *args)
 
 
+class Function:
+    """
+    A callable function of a Redis 7 library, returned by
+    ``register_function``.
+
+    The library is loaded with FUNCTION LOAD REPLACE the first time the
+    function is called on a server, and the servers it was loaded on are
+    remembered: connection pools (through their ``script_registry`` if they
+    have one), or the primaries of a cluster. Should the library be missing
+    anyway, e.g. after FUNCTION FLUSH, it is loaded again and the call is
+    retried.
+
+    ``read_only`` functions are invoked with FCALL_RO, which a cluster
+    created with ``read_from_replicas`` sends to replicas. Calls of
+    ``read_only`` functions through the registered client are sent to
+    ``replica`` instead if it is set, e.g. to a client returned by
+    ``Sentinel.slave_for``.
+    """
+
+    def __init__(self, registered_client, library, name, read_only=False, replica=None):
+        self.registered_client = registered_client
+        self.library = library
+        self.name = name
+        self.read_only = read_only
+        self.replica = replica
+        if isinstance(library, str):
+            library = registered_client.get_encoder().encode(library)
+        # identifies the library in script registries
+        self.sha = hashlib.sha1(library).hexdigest()
+        self._loaded_pools = weakref.WeakSet()
+        self._loaded_nodes = set()
+
+    def __repr__(self):
+        return f"{type(self).__name__}<name={self.name}>"
+
+    def __call__(self, keys=[], args=[], client=None):
+        "Invoke the function, passing any required ``keys`` and ``args``"
+        from redis.client import Pipeline
+        from redis.cluster import ClusterPipeline
+
+        if client is None:
+            client = self.registered_client
+            if self.read_only and self.replica is not None:
+                return self._call_replica(keys, args)
+        # the library can't be loaded through a pipeline
+        if isinstance(client, (Pipeline, ClusterPipeline)):
+            loader = self.registered_client
+        else:
+            loader = client
+        self._ensure_loaded(loader)
+        try:
+            return self._call(client, keys, args)
+        except ResponseError as e:
+            if "Function not found" not in str(e):
+                raise
+            self._forget(loader)
+            self._ensure_loaded(loader)
+            return self._call(client, keys, args)
+
+    def _call(self, client, keys, args):
+        command = client.fcall_ro if self.read_only else client.fcall
+        return command(self.name, len(keys), *keys, *args)
+
+    def _call_replica(self, keys, args):
+        # the replicas receive the library from their primary
+        self._ensure_loaded(self.registered_client)
+        try:
+            return self._call(self.replica, keys, args)
+        except ResponseError as e:
+            if "Function not found" not in str(e):
+                raise
+        # the replica may not have caught up with its primary yet
+        return self(keys, args, client=self.registered_client)
+
+    def _ensure_loaded(self, client):
+        from redis.cluster import RedisCluster
+
+        if isinstance(client, RedisCluster):
+            nodes = [
+                node
+                for node in client.get_primaries()
+                if node.name not in self._loaded_nodes
+            ]
+            if nodes:
+                client.function_load(self.library, replace=True, target_nodes=nodes)
+                self._loaded_nodes.update(node.name for node in nodes)
+            return
+        pool = client.connection_pool
+        registry = client._get_script_registry()
+        if registry is not None:
+            if self.sha not in registry:
+                client.function_load(self.library, replace=True)
+                registry.add_library(self.sha)
+        elif pool not in self._loaded_pools:
+            client.function_load(self.library, replace=True)
+            self._loaded_pools.add(pool)
+
+    def _forget(self, client):
+        from redis.cluster import RedisCluster
+
+        if isinstance(client, RedisCluster):
+            self._loaded_nodes.clear()
+            return
+        registry = client._get_script_registry()
+        if registry is not None:
+            registry.discard(self.sha)
+        self._loaded_pools.discard(client.connection_pool)
+
+
+class ScriptRegistry:
+    """
+    Keeps track of the SHA1 digests of the Lua scripts known to be loaded on
+    a Redis server, so that pipelines running a :py:class:`Script` don't need
+    to check for it with SCRIPT EXISTS on every execution.
+
+    A registry is passed to a connection pool as ``script_registry`` and is
+    shared by all connections of the pool. It is updated by SCRIPT LOAD and
+    NOSCRIPT errors, and cleared by SCRIPT FLUSH, by the reconnection of any
+    connection of the pool (the server may have been restarted or replaced)
+    and by a sentinel failover.
+
+    Scripts passed to ``preload`` are loaded with a single round trip
+    whenever a connection is established and any of them isn't known to be
+    loaded.
+
+    The Redis 7 libraries loaded by :py:class:`Function` objects are recorded
+    too, by the SHA1 digest of their code, and forgotten on their own when
+    libraries are deleted, flushed or restored.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._shas = set()
+        # the entries that are libraries
+        self._libraries = set()
+        self._preload = []
+        self._connections = weakref.WeakSet()
+
+    def __repr__(self):
+        return f"{type(self).__name__}<scripts={len(self)}>"
+
+    def __deepcopy__(self, memo):
+        # a registry describes a single server, copies start empty
+        registry = type(self)()
+        registry.preload(*self._preload)
+        return registry
+
+    def __contains__(self, sha):
+        return str_if_bytes(sha) in self._shas
+
+    def __len__(self):
+        return len(self._shas)
+
+    def add(self, *shas):
+        "Record scripts as loaded on the server"
+        with self._lock:
+            self._shas.update(map(str_if_bytes, shas))
+
+    def add_library(self, *shas):
+        "Record libraries as loaded on the server"
+        with self._lock:
+            shas = set(map(str_if_bytes, shas))
+            self._shas.update(shas)
+            self._libraries.update(shas)
+
+    def discard(self, *shas):
+        "Record scripts as not loaded on the server"
+        with self._lock:
+            shas = set(map(str_if_bytes, shas))
+            self._shas.difference_update(shas)
+            self._libraries.difference_update(shas)
+
+    def clear(self):
+        "Forget all scripts, e.g. after they were flushed from the server"
+        with self._lock:
+            self._shas.clear()
+            self._libraries.clear()
+
+    def clear_libraries(self):
+        "Forget all libraries, keeping the scripts"
+        with self._lock:
+            self._shas.difference_update(self._libraries)
+            self._libraries.clear()
+
+    def preload(self, *scripts):
+        "Load the Lua ``scripts`` whenever a connection is established"
+        with self._lock:
+            self._preload.extend(scripts)
+
+    def on_connect(self, connection):
+        "Called by the connections of the pool once they are connected"
+        with self._lock:
+            if connection in self._connections:
+                self._shas.clear()
+                self._libraries.clear()
+            else:
+                self._connections.add(connection)
+            missing = []
+            for script in self._preload:
+                sha = hashlib.sha1(connection.encoder.encode(script)).hexdigest()
+                if sha not in self._shas:
+                    missing.append(script)
+        if not missing:
+            return
+        connection.send_packed_command(
+            connection.pack_commands([("SCRIPT LOAD", script) for script in missing]),
+            check_health=False,
+        )
+        self.add(*(connection.read_response() for _ in missing))
+
+
 class BitFieldOperation:
     """
     Command builder for BITFIELD commands.
@@ -4459,6 +5162,7 @@ class CoreCommands(
     ACLCommands,
     ClusterCommands,
     DataAccessCommands,
+    FunctionCommands,
     ManagementCommands,
     ModuleCommands,
     PubSubCommands,
@@ -1,23 +1,302 @@
+import functools
+import threading
+
 from redis.exceptions import RedisError, ResponseError
 from redis.utils import str_if_bytes
 
+from .command_table import COMMAND_TABLE
+
+# the number of argument shapes whose key positions are remembered for every
+# command and number of arguments
+MAX_KEY_POSITIONS = 32
+
+
+def _token(arg):
+    return str(str_if_bytes(arg))
+
+
+def _pairs_to_dict(response):
+    if isinstance(response, dict):
+        return {str_if_bytes(k): v for k, v in response.items()}
+    it = iter(response)
+    return {str_if_bytes(k): v for k, v in zip(it, it)}
+
+
+def _parse_key_specs(response):
+    """
+    Parse the key specifications of a command, as returned by COMMAND in
+    Redis 7, into (begin_search, find_keys) tuples. None is returned when a
+    specification is incomplete or of an unknown type, the keys of the
+    command can then only be found by the server.
+    """
+    specs = []
+    for spec in response:
+        spec = _pairs_to_dict(spec)
+        flags = {str_if_bytes(flag).upper() for flag in spec.get("flags", [])}
+        if flags & {"INCOMPLETE", "VARIABLE_FLAGS"}:
+            return None
+        if "NOT_KEY" in flags:
+            continue
+        begin_search = _pairs_to_dict(spec["begin_search"])
+        find_keys = _pairs_to_dict(spec["find_keys"])
+        begin_type = str_if_bytes(begin_search["type"])
+        find_type = str_if_bytes(find_keys["type"])
+        begin_spec = _pairs_to_dict(begin_search["spec"])
+        find_spec = _pairs_to_dict(find_keys["spec"])
+        if begin_type == "index":
+            begin = ("index", int(begin_spec["index"]))
+        elif begin_type == "keyword":
+            begin = (
+                "keyword",
+                _token(begin_spec["keyword"]).upper(),
+                int(begin_spec["startfrom"]),
+            )
+        else:
+            return None
+        if find_type == "range":
+            find = (
+                "range",
+                int(find_spec["lastkey"]),
+                int(find_spec["keystep"]),
+                int(find_spec["limit"]),
+            )
+        elif find_type == "keynum":
+            find = (
+                "keynum",
+                int(find_spec["keynumidx"]),
+                int(find_spec["firstkey"]),
+                int(find_spec["keystep"]),
+            )
+        else:
+            return None
+        specs.append((begin, find))
+    return specs
+
+
+def _keys_from_specs(specs, args):
+    """
+    Find the keys of a command from its key specifications, the same way
+    the server does.
+    """
+    argc = len(args)
+    keys = []
+    for begin, find in specs:
+        if begin[0] == "index":
+            first = begin[1]
+        else:
+            keyword, startfrom = begin[1], begin[2]
+            if startfrom > 0:
+                positions = range(startfrom, argc)
+            else:
+                positions = range(argc + startfrom, 0, -1)
+            first = None
+            for i in positions:
+                if _token(args[i]).upper() == keyword:
+                    first = i + 1
+                    break
+            if first is None:
+                # the keyword is not in the command
+                continue
+        if find[0] == "range":
+            lastkey, step, limit = find[1:]
+            if lastkey >= 0:
+                last = first + lastkey
+            elif not limit:
+                last = argc + lastkey
+            else:
+                last = first + ((argc - first) // limit + lastkey)
+        else:
+            keynumidx, firstkey, step = find[1:]
+            try:
+                numkeys = int(args[first + keynumidx])
+            except (IndexError, ValueError):
+                return None
+            first += firstkey
+            last = first + numkeys - 1
+        keys.extend(args[first : min(last, argc - 1) + 1 : step])
+    return keys
+
+
+def _sort_keys(args):
+    # SORT key [BY pattern] [LIMIT offset count] [GET pattern [GET pattern
+    # ...]] [ASC|DESC] [ALPHA] [STORE destination]
+    keys = [args[1]]
+    store = None
+    i = 2
+    while i < len(args):
+        option = _token(args[i]).upper()
+        if option == "LIMIT":
+            i += 2
+        elif option in ("BY", "GET"):
+            i += 1
+        elif option == "STORE" and i + 1 < len(args):
+            # the last STORE wins
+            store = args[i + 1]
+            i += 1
+        i += 1
+    if store is not None:
+        keys.append(store)
+    return keys
+
+
+def _migrate_keys(args):
+    # MIGRATE host port key|"" destination-db timeout [COPY] [REPLACE]
+    # [AUTH password | AUTH2 username password] [KEYS key [key ...]]
+    i = 6
+    while i < len(args):
+        option = _token(args[i]).upper()
+        if option == "AUTH":
+            i += 1
+        elif option == "AUTH2":
+            i += 2
+        elif option == "KEYS":
+            return list(args[i + 1 :])
+        i += 1
+    return list(args[3:4])
+
+
+def _georadius_keys(args):
+    # GEORADIUS key longitude latitude radius unit [...] [STORE key]
+    # [STOREDIST key]
+    keys = [args[1]]
+    store = None
+    i = 5
+    while i < len(args) - 1:
+        if _token(args[i]).upper() in ("STORE", "STOREDIST"):
+            store = args[i + 1]
+            i += 1
+        i += 1
+    if store is not None:
+        keys.append(store)
+    return keys
+
+
+def _stralgo_keys(args):
+    # STRALGO LCS [KEYS key1 key2] [STRINGS string1 string2] ...
+    for i in range(2, len(args) - 2):
+        option = _token(args[i]).upper()
+        if option == "STRINGS":
+            break
+        if option == "KEYS":
+            return list(args[i + 1 : i + 3])
+    return []
+
+
+def _specs(*specs):
+    return functools.partial(_keys_from_specs, specs)
+
+
+_NUMKEYS_AT_1 = _specs((("index", 1), ("keynum", 0, 1, 1)))
+_NUMKEYS_AT_2 = _specs((("index", 2), ("keynum", 0, 1, 1)))
+_DESTINATION_AND_NUMKEYS = _specs(
+    (("index", 1), ("range", 0, 1, 0)), (("index", 2), ("keynum", 0, 1, 1))
+)
+_STREAMS = _specs((("keyword", "STREAMS", 1), ("range", -1, 1, 2)))
+
+# Key extractors of the built-in commands flagged with 'movablekeys', so the
+# keys of these commands are found without asking the server
+MOVABLE_KEYS = {
+    "eval": _NUMKEYS_AT_2,
+    "evalsha": _NUMKEYS_AT_2,
+    "eval_ro": _NUMKEYS_AT_2,
+    "evalsha_ro": _NUMKEYS_AT_2,
+    "fcall": _NUMKEYS_AT_2,
+    "fcall_ro": _NUMKEYS_AT_2,
+    "zunionstore": _DESTINATION_AND_NUMKEYS,
+    "zinterstore": _DESTINATION_AND_NUMKEYS,
+    "zdiffstore": _DESTINATION_AND_NUMKEYS,
+    "zunion": _NUMKEYS_AT_1,
+    "zinter": _NUMKEYS_AT_1,
+    "zdiff": _NUMKEYS_AT_1,
+    "zintercard": _NUMKEYS_AT_1,
+    "sintercard": _NUMKEYS_AT_1,
+    "lmpop": _NUMKEYS_AT_1,
+    "zmpop": _NUMKEYS_AT_1,
+    "blmpop": _NUMKEYS_AT_2,
+    "bzmpop": _NUMKEYS_AT_2,
+    "xread": _STREAMS,
+    "xreadgroup": _STREAMS,
+    "sort": _sort_keys,
+    "sort_ro": _sort_keys,
+    "migrate": _migrate_keys,
+    "georadius": _georadius_keys,
+    "georadiusbymember": _georadius_keys,
+    "stralgo": _stralgo_keys,
+}
+
+
+# the bundled command table, shared by the lazy parsers until they fetch
+# the table of the server
+SNAPSHOT_COMMANDS = {
+    name: {
+        "name": name,
+        "arity": arity,
+        "flags": list(flags),
+        "first_key_pos": first_key_pos,
+        "last_key_pos": last_key_pos,
+        "step_count": step_count,
+    }
+    for name, arity, flags, first_key_pos, last_key_pos, step_count in COMMAND_TABLE
+}
+
 
 class CommandsParser:
     """
     Parses Redis commands to get command keys.
     COMMAND output is used to determine key locations.
     Commands that do not have a predefined key location are flagged with
-    'movablekeys', and these commands' keys are determined by the command
-    'COMMAND GETKEYS'.
+    'movablekeys'. The keys of these commands are found locally, from the
+    built-in MOVABLE_KEYS extractors or from the key specifications returned
+    by Redis 7, and only the other commands, e.g. module commands, are sent
+    to 'COMMAND GETKEYS'. The key positions it returns are remembered for
+    the commands with the same non-key arguments.
+
+    A lazy parser doesn't send COMMAND when it is created: it starts with the
+    command table bundled with redis-py, and fetches the table of the server
+    in a background thread when it is first used. A command missing from
+    the bundled table is looked up in the table of the server right away.
+    A parser can be shared by several clients of the same server.
     """
 
-    def __init__(self, redis_connection):
+    def __init__(self, redis_connection=None, lazy=False):
         self.initialized = False
         self.commands = {}
-        self.initialize(redis_connection)
+        self.key_specs = {}
+        self.key_positions = {}
+        self._refresh_needed = lazy
+        self._refresh_lock = threading.Lock()
+        if lazy:
+            self.commands = SNAPSHOT_COMMANDS
+        else:
+            self.initialize(redis_connection)
 
     def initialize(self, r):
         self.commands = r.execute_command("COMMAND")
+        self.key_specs = {}
+        self.key_positions = {}
+        # the table of the server replaces the bundled one
+        self._refresh_needed = False
+
+    def _refresh(self, redis_conn):
+        """
+        Replace the bundled command table with the table of the server,
+        fetched in a background thread
+        """
+        with self._refresh_lock:
+            if not self._refresh_needed:
+                return
+            self._refresh_needed = False
+
+        def refresh():
+            try:
+                self.initialize(redis_conn)
+            except RedisError:
+                # try again the next time the parser is used
+                self._refresh_needed = True
+
+        threading.Thread(
+            target=refresh, name="redis-commands-parser", daemon=True
+        ).start()
 
     # As soon as this PR is merged into Redis, we should reimplement
     # our logic to use COMMAND INFO changes to determine the key positions
@@ -26,6 +305,8 @@ class CommandsParser:
         """
         Get the keys from the passed command
         """
+        if self._refresh_needed:
+            self._refresh(redis_conn)
         if len(args) < 2:
             # The command has no keys in it
             return None
@@ -78,6 +359,21 @@ class CommandsParser:
         # e.g. 'MEMORY USAGE' will be splitted into ['MEMORY', 'USAGE']
         pieces = pieces + cmd_name.split()
         pieces = pieces + list(args[1:])
+        cmd_name = pieces[0].lower()
+        extract_keys = MOVABLE_KEYS.get(cmd_name) or self._get_key_specs(cmd_name)
+        if extract_keys is not None:
+            try:
+                keys = extract_keys(pieces)
+            except IndexError:
+                # invalid arguments, the server will reply with an error
+                keys = None
+            return keys or None
+
+        tokens = [_token(piece) for piece in pieces]
+        shapes = self.key_positions.setdefault((cmd_name, len(pieces)), [])
+        for positions, others in shapes:
+            if all(tokens[i] == token for i, token in others):
+                return [pieces[i] for i in positions]
         try:
             keys = redis_conn.execute_command("COMMAND GETKEYS", *pieces)
         except ResponseError as e:
@@ -89,8 +385,34 @@ class CommandsParser:
                 return None
             else:
                 raise e
+        names = {_token(key) for key in keys}
+        positions = [i for i in range(1, len(tokens)) if tokens[i] in names]
+        if len(positions) == len(keys):
+            # the positions of the keys are known if no other argument has
+            # the name of a key
+            others = [(i, t) for i, t in enumerate(tokens) if i not in positions]
+            shapes.append((positions, others))
+            del shapes[:-MAX_KEY_POSITIONS]
         return keys
 
+    def _get_key_specs(self, cmd_name):
+        """
+        Return the key extractor built from the Redis 7 key specifications
+        of the command, or None when the server did not send them or they
+        are incomplete.
+        """
+        try:
+            return self.key_specs[cmd_name]
+        except KeyError:
+            pass
+        command = self.commands.get(cmd_name, {})
+        specs = command.get("key_specifications")
+        if specs is not None:
+            specs = _parse_key_specs(specs)
+        extract_keys = None if specs is None else _specs(*specs)
+        self.key_specs[cmd_name] = extract_keys
+        return extract_keys
+
     def _get_pubsub_keys(self, *args):
         """
         Get the keys from pubsub command.
@@ -523,11 +523,20 @@ class Connection:
         username=None,
         retry=None,
         redis_connect_func=None,
+        circuit_breaker=None,
+        script_registry=None,
+        client_cache=None,
     ):
         """
         Initialize a new Connection.
         To specify a retry policy, first set `retry_on_timeout` to `True`
-        then set `retry` to a valid `Retry` object
+        then set `retry` to a valid `Retry` object.
+        Connection and timeout errors are reported to `circuit_breaker`,
+        a `CircuitBreaker` object shared by the connections of a pool.
+        Connects are reported to `script_registry`, a `ScriptRegistry`
+        object shared by the connections of a pool.
+        Connects and disconnects are reported to `client_cache`, a
+        `ClientSideCache` object shared by the connections of a pool.
         """
         self.pid = os.getpid()
         self.host = host
@@ -554,6 +563,9 @@ class Connection:
         self.next_health_check = 0
         self.encoder = Encoder(encoding, encoding_errors, decode_responses)
         self.redis_connect_func = redis_connect_func
+        self.circuit_breaker = circuit_breaker
+        self.script_registry = script_registry
+        self.client_cache = client_cache
         self._sock = None
         self._socket_read_size = socket_read_size
         self.set_parser(parser_class)
@@ -597,8 +609,10 @@ class Connection:
         try:
             sock = self._connect()
         except socket.timeout:
+            self._record_failure()
             raise TimeoutError("Timeout connecting to server")
         except OSError as e:
+            self._record_failure()
             raise ConnectionError(self._error_message(e))
 
         self._sock = sock
@@ -609,6 +623,10 @@ class Connection:
             else:
                 # Use the passed function redis_connect_func
                 self.redis_connect_func(self)
+            if self.script_registry is not None:
+                self.script_registry.on_connect(self)
+            if self.client_cache is not None:
+                self.client_cache.on_connect(self)
         except RedisError:
             # clean up after any error in on_connect
             self.disconnect()
@@ -724,6 +742,13 @@ class Connection:
         except OSError:
             pass
         self._sock = None
+        if self.client_cache is not None:
+            self.client_cache.on_disconnect(self)
+
+    def _record_failure(self):
+        "Report a connection or timeout error to the circuit breaker"
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record_failure()
 
     def _send_ping(self):
         """Send PING, expect PONG in return"""
@@ -754,9 +779,11 @@ class Connection:
                 self._sock.sendall(item)
         except socket.timeout:
             self.disconnect()
+            self._record_failure()
             raise TimeoutError("Timeout writing to socket")
         except OSError as e:
             self.disconnect()
+            self._record_failure()
             if len(e.args) == 1:
                 errno, errmsg = "UNKNOWN", e.args[0]
             else:
@@ -786,12 +813,18 @@ class Connection:
             response = self._parser.read_response(disable_decoding=disable_decoding)
         except socket.timeout:
             self.disconnect()
+            self._record_failure()
             raise TimeoutError(f"Timeout reading from {self.host}:{self.port}")
         except OSError as e:
             self.disconnect()
+            self._record_failure()
             raise ConnectionError(
                 f"Error while reading from {self.host}:{self.port}" f" : {e.args}"
             )
+        except (ConnectionError, TimeoutError):
+            self.disconnect()
+            self._record_failure()
+            raise
         except BaseException:
             self.disconnect()
             raise
@@ -942,6 +975,9 @@ class UnixDomainSocketConnection(Connection):
         health_check_interval=0,
         client_name=None,
         retry=None,
+        circuit_breaker=None,
+        script_registry=None,
+        client_cache=None,
     ):
         """
         Initialize a new UnixDomainSocketConnection.
@@ -967,6 +1003,9 @@ class UnixDomainSocketConnection(Connection):
         self.health_check_interval = health_check_interval
         self.next_health_check = 0
         self.encoder = Encoder(encoding, encoding_errors, decode_responses)
+        self.circuit_breaker = circuit_breaker
+        self.script_registry = script_registry
+        self.client_cache = client_cache
         self._sock = None
         self._socket_read_size = socket_read_size
         self.set_parser(parser_class)
@@ -1088,6 +1127,19 @@ class ConnectionPool:
 
     Any additional keyword arguments are passed to the constructor of
     ``connection_class``.
+
+    If a :py:class:`~redis.circuit.CircuitBreaker` is passed as
+    ``circuit_breaker``, it is shared by all connections of the pool and
+    ``get_connection`` raises :py:class:`~redis.CircuitBreakerOpenError`
+    without contacting the server while the breaker is open.
+
+    A :py:class:`~redis.commands.core.ScriptRegistry` passed as
+    ``script_registry`` is shared by all connections of the pool and keeps
+    track of the Lua scripts loaded on the server.
+
+    A :py:class:`~redis.cache.ClientSideCache` passed as ``client_cache``
+    caches the responses to read commands, the connections of the pool
+    enabling CLIENT TRACKING to keep it up to date.
     """
 
     @classmethod
@@ -1148,6 +1200,11 @@ class ConnectionPool:
         self.connection_class = connection_class
         self.connection_kwargs = connection_kwargs
         self.max_connections = max_connections
+        self.circuit_breaker = connection_kwargs.get("circuit_breaker")
+        self.script_registry = connection_kwargs.get("script_registry")
+        self.client_cache = connection_kwargs.get("client_cache")
+        if self.client_cache is not None:
+            self.client_cache.bind(self)
 
         # a lock to protect the critical section in _checkpid().
         # this lock is acquired when the process id changes, such as
@@ -1233,6 +1290,8 @@ class ConnectionPool:
     def get_connection(self, command_name, *keys, **options):
         "Get a connection from the pool"
         self._checkpid()
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.before_request()
         with self._lock:
             try:
                 connection = self._available_connections.pop()
@@ -1282,6 +1341,7 @@ class ConnectionPool:
     def release(self, connection):
         "Releases the connection back to the pool"
         self._checkpid()
+        self._record_release(connection)
         with self._lock:
             try:
                 self._in_use_connections.remove(connection)
@@ -1300,6 +1360,12 @@ class ConnectionPool:
                 connection.disconnect()
                 return
 
+    def _record_release(self, connection):
+        # a connection that is still connected when it's handed back served
+        # its caller. failures were already reported by the connection itself.
+        if self.circuit_breaker is not None and connection._sock is not None:
+            self.circuit_breaker.record_success()
+
     def owns_connection(self, connection):
         return connection.pid == self.pid
 
@@ -1419,6 +1485,8 @@ class BlockingConnectionPool(ConnectionPool):
         """
         # Make sure we haven't changed process.
         self._checkpid()
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.before_request()
 
         # Try and get a connection from the pool. If one isn't available within
         # self.timeout then raise a ``ConnectionError``.
@@ -1461,6 +1529,7 @@ class BlockingConnectionPool(ConnectionPool):
         "Releases the connection back to the pool."
         # Make sure we haven't changed process.
         self._checkpid()
+        self._record_release(connection)
         if not self.owns_connection(connection):
             # pool doesn't own this connection. do not add it back
             # to the pool. instead add a None value which is a placeholder
@@ -13,6 +13,11 @@ class TimeoutError(RedisError):
     pass
 
 
+class CircuitBreakerOpenError(ConnectionError):
+    "Error raised instead of contacting a server whose circuit breaker is open"
+    pass
+
+
 class AuthenticationError(ConnectionError):
     pass
 
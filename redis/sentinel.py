@@ -112,6 +112,11 @@ class SentinelConnectionPool(ConnectionPool):
         if self.is_master:
             if self.master_address != master_address:
                 self.master_address = master_address
+                # the scripts loaded on the previous master are unknown
+                if self.script_registry is not None:
+                    self.script_registry.clear()
+                if self.client_cache is not None:
+                    self.client_cache.flush()
                 # disconnect any idle connections so that they reconnect
                 # to the new master the next time that they are used.
                 self.disconnect(inuse_connections=False)
@@ -0,0 +1,64 @@
+import io
+
+import pytest
+
+import redis
+from redis.bulk import BulkLoader, bulk_load, bulk_load_file
+
+
+@pytest.mark.onlynoncluster
+class TestBulkLoader:
+    def test_load_commands(self, r):
+        stats = bulk_load(r, (("SET", f"key:{i}", i) for i in range(1000)))
+        assert stats.commands == 1000
+        assert stats.replies == 1000
+        assert stats.error_count == 0
+        assert stats.bytes_sent > 0
+        assert r.get("key:999") == b"999"
+
+    def test_load_small_chunks(self, r):
+        commands = [("RPUSH", "list", i) for i in range(100)]
+        stats = BulkLoader(r, chunk_size=10).load(commands)
+        assert stats.replies == 100
+        assert r.lrange("list", 0, -1) == [str(i).encode() for i in range(100)]
+
+    def test_load_collects_errors(self, r):
+        r.set("string", "value")
+        commands = [("SET", "a", 1), ("LLEN", "string"), ("SET", "b", 2)] * 3
+        stats = bulk_load(r, commands, max_errors=2)
+        assert stats.replies == 9
+        assert stats.error_count == 3
+        assert [index for index, _ in stats.errors] == [1, 4]
+        assert all(isinstance(e, redis.ResponseError) for _, e in stats.errors)
+
+    def test_load_file(self, r, tmp_path):
+        connection = r.connection_pool.make_connection()
+        data = b"".join(
+            b"".join(connection.pack_command("SET", f"key:{i}", i)) for i in range(50)
+        )
+        path = tmp_path / "data.resp"
+        path.write_bytes(data)
+        stats = bulk_load_file(r, str(path))
+        assert stats.commands == 0
+        assert stats.replies == 50
+        assert stats.bytes_sent > len(data)
+        assert r.get("key:49") == b"49"
+
+        r.flushdb()
+        stats = bulk_load_file(r, io.BytesIO(data), chunk_size=7)
+        assert stats.replies == 50
+        assert r.get("key:0") == b"0"
+
+    def test_progress_callback(self, r):
+        reports = []
+        stats = bulk_load(
+            r,
+            [("INCR", "counter")] * 10,
+            chunk_size=1,
+            progress_callback=reports.append,
+            progress_interval=0,
+        )
+        assert len(reports) > 1
+        assert reports[-1] is stats
+        assert stats.finished is not None
+        assert r.get("counter") == b"10"
@@ -0,0 +1,313 @@
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+import redis
+from redis.cache import MISSING, ClientSideCache, Singleflight
+from tests.conftest import _get_client, skip_if_server_version_lt
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.01)
+
+
+@pytest.mark.onlynoncluster
+@skip_if_server_version_lt("6.0.0")
+class TestClientSideCache:
+    @pytest.fixture()
+    def cache(self):
+        cache = ClientSideCache()
+        yield cache
+        cache.close()
+
+    @pytest.fixture()
+    def rc(self, request, cache):
+        return _get_client(redis.Redis, request, client_cache=cache)
+
+    def test_responses_are_cached(self, rc, cache):
+        rc.set("a", "foo")
+        assert rc.get("a") == b"foo"
+        with mock.patch.object(rc, "_send_command_parse_response") as send:
+            assert rc.get("a") == b"foo"
+            send.assert_not_called()
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_commands_with_options_are_not_cached(self, rc, cache):
+        rc.set("a", "foo")
+        rc.execute_command("GET", "a", some_option=True)
+        assert len(cache) == 0
+
+    def test_invalidated_by_other_clients(self, r, rc, cache):
+        rc.set("a", "foo")
+        assert rc.get("a") == b"foo"
+        r.set("a", "bar")
+        wait_for(lambda: len(cache) == 0)
+        assert rc.get("a") == b"bar"
+
+    def test_invalidated_by_own_writes(self, rc, cache):
+        rc.set("a", "foo")
+        assert rc.get("a") == b"foo"
+        rc.set("a", "bar")
+        assert len(cache) == 0
+        assert rc.get("a") == b"bar"
+
+    def test_invalidated_by_own_pipelines(self, rc, cache):
+        rc.mset({"a": "foo", "b": "bar"})
+        assert rc.get("a") == b"foo"
+        assert rc.get("b") == b"bar"
+        rc.pipeline().delete("a").execute()
+        assert cache.get(cache.command_key(("GET", "a"))) is MISSING
+        assert cache.get(cache.command_key(("GET", "b"))) == b"bar"
+
+    def test_least_recently_used_evicted(self, request):
+        cache = ClientSideCache(max_size=2)
+        try:
+            rc = _get_client(redis.Redis, request, client_cache=cache)
+            rc.get("a")
+            rc.get("b")
+            rc.get("a")
+            rc.get("c")
+            assert cache.get(cache.command_key(("GET", "b"))) is MISSING
+            assert cache.get(cache.command_key(("GET", "a"))) is None
+            assert len(cache) == 2
+        finally:
+            cache.close()
+
+    def test_flushed_on_disconnect(self, rc, cache):
+        rc.get("a")
+        assert len(cache) == 1
+        rc.connection.disconnect()
+        assert len(cache) == 0
+
+    def test_mutable_responses_are_copied(self, rc, cache):
+        rc.rpush("list", "a", "b")
+        rc.lrange("list", 0, -1).append(b"c")
+        assert rc.lrange("list", 0, -1) == [b"a", b"b"]
+        assert cache.hits == 1
+
+    def test_invalidation_during_read_is_not_lost(self, rc, cache):
+        cache_key = cache.command_key(("GET", "a"))
+        token = cache.reserve(rc.connection, cache_key)
+        cache.invalidate([b"a"])
+        cache.put(cache_key, token, b"stale")
+        assert len(cache) == 0
+
+    def test_nothing_cached_without_listener(self, rc, cache):
+        rc.get("a")
+        with mock.patch("redis.cache.time.sleep"):
+            cache._on_listener_error(redis.ConnectionError(), None, None)
+        assert len(cache) == 0
+        rc.get("a")
+        rc.get("a")
+        assert len(cache) == 0
+        assert cache.hits == 0
+
+    def test_bcast_prefixes(self, request):
+        cache = ClientSideCache(bcast=True, prefixes=["user:"])
+        try:
+            rc = _get_client(redis.Redis, request, client_cache=cache)
+            rc.get("user:1")
+            rc.get("config")
+            assert len(cache) == 1
+            assert cache.command_key(("GET", "config")) is None
+        finally:
+            cache.close()
+
+    def test_prefixes_require_bcast(self):
+        with pytest.raises(ValueError):
+            ClientSideCache(prefixes=["user:"])
+
+    def test_single_pool(self, cache):
+        client = redis.Redis(client_cache=cache)
+        assert client.connection_pool.client_cache is cache
+        with pytest.raises(ValueError):
+            redis.ConnectionPool(client_cache=cache)
+
+
+class TestSingleflight:
+    def call_concurrently(self, singleflight, key, func, count):
+        results = []
+        errors = []
+
+        def target():
+            try:
+                results.append(singleflight.call(key, func))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=target) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        return threads, results, errors
+
+    def test_concurrent_calls_share_the_result(self):
+        singleflight = Singleflight()
+        release = threading.Event()
+        calls = []
+
+        def func():
+            calls.append(1)
+            release.wait()
+            return [b"value"]
+
+        threads, results, _ = self.call_concurrently(singleflight, "key", func, 5)
+        wait_for(lambda: len(calls) == 1)
+        # let the other threads join the call in flight
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join()
+        assert calls == [1]
+        assert results == [[b"value"]] * 5
+        # everyone gets a copy of mutable results
+        assert len({id(result) for result in results}) == 5
+        assert len(singleflight) == 0
+
+    def test_errors_are_raised_in_every_thread(self):
+        singleflight = Singleflight()
+        release = threading.Event()
+
+        def func():
+            release.wait()
+            raise redis.ConnectionError("lost")
+
+        threads, results, errors = self.call_concurrently(singleflight, "key", func, 3)
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join()
+        assert results == []
+        assert len(errors) == 3
+        assert singleflight.call("key", lambda: 1) == 1
+
+    def test_different_keys_are_not_coalesced(self):
+        singleflight = Singleflight()
+        assert singleflight.call("a", lambda: 1) == 1
+        assert singleflight.call("b", lambda: 2) == 2
+
+
+@pytest.mark.onlynoncluster
+class TestCoalescedReads:
+    def test_read_commands_are_coalesced(self, r):
+        r = redis.Redis(connection_pool=r.connection_pool, coalesce_reads=True)
+        r.set("a", "foo")
+        with mock.patch.object(
+            r.singleflight, "call", wraps=r.singleflight.call
+        ) as call:
+            assert r.get("a") == b"foo"
+            call.assert_called_once()
+            r.set("a", "bar")
+            call.assert_called_once()
+            r.execute_command("GET", "a", unhashable=[])
+            call.assert_called_once()
+
+    def test_random_and_writing_commands_are_not_coalesced(self, r):
+        r = redis.Redis(connection_pool=r.connection_pool, coalesce_reads=True)
+        with mock.patch.object(r.singleflight, "call") as call, mock.patch.object(
+            r, "_execute_command"
+        ):
+            r.randomkey()
+            r.execute_command("SRANDMEMBER", "set")
+            r.execute_command("GEORADIUS", "geo", 0, 0, 1, "km", "STORE", "b")
+            call.assert_not_called()
+
+    def test_disabled_by_default(self, r):
+        assert r.singleflight is None
+
+
+@pytest.mark.onlynoncluster
+class TestRequestCache:
+    @pytest.fixture()
+    def rr(self, r):
+        return redis.Redis(connection_pool=r.connection_pool)
+
+    def test_reads_are_memoized(self, rr):
+        rr.set("a", "foo")
+        with rr.request_cache() as cache:
+            assert rr.get("a") == b"foo"
+            with mock.patch.object(rr, "_execute_command_cached") as execute:
+                assert rr.get("a") == b"foo"
+                execute.assert_not_called()
+            assert (cache.hits, cache.misses) == (1, 1)
+        assert len(cache) == 0
+        assert rr._request_cache.current is None
+
+    def test_own_writes_invalidate(self, rr):
+        with rr.request_cache() as cache:
+            rr.set("a", "foo")
+            rr.set("b", "bar")
+            assert rr.get("a") == b"foo"
+            assert rr.get("b") == b"bar"
+            rr.set("a", "baz")
+            assert len(cache) == 1
+            assert rr.get("a") == b"baz"
+
+    def test_other_clients_writes_are_not_seen(self, r, rr):
+        r.set("a", "foo")
+        with rr.request_cache():
+            assert rr.get("a") == b"foo"
+            r.set("a", "bar")
+            assert rr.get("a") == b"foo"
+        assert rr.get("a") == b"bar"
+
+    def test_keyless_commands(self, rr):
+        with rr.request_cache() as cache:
+            rr.get("a")
+            rr.ping()
+            assert len(cache) == 1
+            rr.flushdb()
+            assert len(cache) == 0
+
+    def test_pipeline_writes_invalidate(self, rr):
+        rr.set("a", "foo")
+        with rr.request_cache() as cache:
+            pipe = rr.pipeline(transaction=False)
+            pipe.set("a", "bar")
+            assert rr.get("a") == b"foo"
+            pipe.execute()
+            assert len(cache) == 0
+            assert rr.get("a") == b"bar"
+
+    def test_random_and_storing_commands_are_not_memoized(self, rr):
+        keys = {
+            "SRANDMEMBER": [b"set"],
+            "ZRANGE": [b"dest"],
+            "GEORADIUS": [b"geo", b"dest"],
+        }
+        replies = {
+            "SRANDMEMBER": [b"a", b"b"],
+            "GEORADIUS": [1],
+            "ZRANGE": [[], [b"a"]],
+        }
+        with rr.request_cache() as cache, mock.patch.object(
+            cache, "_get_keys", side_effect=lambda args: keys[args[0]]
+        ), mock.patch.object(
+            rr,
+            "_execute_command_cached",
+            side_effect=lambda args, options, noreply: replies[args[0]].pop(0),
+        ):
+            assert rr.execute_command("SRANDMEMBER", "set") == b"a"
+            assert rr.execute_command("SRANDMEMBER", "set") == b"b"
+            assert rr.execute_command("ZRANGE", "dest", 0, -1) == []
+            rr.execute_command("GEORADIUS", "geo", 0, 0, 1, "km", "STORE", "dest")
+            assert rr.execute_command("ZRANGE", "dest", 0, -1) == [b"a"]
+
+    def test_nested_blocks_share_the_cache(self, rr):
+        with rr.request_cache() as outer:
+            with rr.request_cache() as inner:
+                assert inner is outer
+                rr.get("a")
+            assert len(outer) == 1
+
+    def test_scoped_to_the_thread(self, rr):
+        with rr.request_cache() as cache:
+            thread = threading.Thread(target=rr.get, args=("a",))
+            thread.start()
+            thread.join()
+            assert cache.misses == 0
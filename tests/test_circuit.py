@@ -0,0 +1,130 @@
+import copy
+from unittest import mock
+
+import pytest
+
+import redis
+from redis.circuit import CircuitBreaker
+from redis.exceptions import CircuitBreakerOpenError
+
+
+class TestCircuitBreaker:
+    "Test the state transitions of the CircuitBreaker"
+
+    def test_starts_closed(self):
+        breaker = CircuitBreaker()
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.allow_request()
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            {"failure_threshold": 0},
+            {"failure_threshold": 1.5},
+            {"minimum_calls": 0},
+            {"minimum_calls": 10, "window_size": 5},
+            {"half_open_max_calls": 0},
+        ],
+    )
+    def test_invalid_arguments(self, kwargs):
+        with pytest.raises(ValueError):
+            CircuitBreaker(**kwargs)
+
+    def test_trips_on_failure_rate(self):
+        breaker = CircuitBreaker(failure_threshold=0.5, minimum_calls=4)
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow_request()
+        with pytest.raises(CircuitBreakerOpenError):
+            breaker.before_request()
+
+    def test_failures_leave_the_window(self):
+        breaker = CircuitBreaker(failure_threshold=0.5, minimum_calls=4, window_size=4)
+        breaker.record_failure()
+        for _ in range(4):
+            breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_probe_success_closes(self):
+        breaker = CircuitBreaker(minimum_calls=1, recovery_timeout=10)
+        with mock.patch("redis.circuit.monotonic", return_value=100):
+            breaker.record_failure()
+            assert breaker.state == CircuitBreaker.OPEN
+        with mock.patch("redis.circuit.monotonic", return_value=110):
+            assert breaker.state == CircuitBreaker.HALF_OPEN
+            assert breaker.allow_request()
+            # only a single probe is let through by default
+            assert not breaker.allow_request()
+            breaker.record_success()
+            assert breaker.state == CircuitBreaker.CLOSED
+            assert breaker.allow_request()
+
+    def test_half_open_probe_failure_reopens(self):
+        breaker = CircuitBreaker(minimum_calls=1, recovery_timeout=10)
+        with mock.patch("redis.circuit.monotonic", return_value=100):
+            breaker.record_failure()
+        with mock.patch("redis.circuit.monotonic", return_value=110):
+            assert breaker.allow_request()
+            breaker.record_failure()
+            assert breaker.state == CircuitBreaker.OPEN
+        with mock.patch("redis.circuit.monotonic", return_value=119):
+            assert not breaker.allow_request()
+        with mock.patch("redis.circuit.monotonic", return_value=120):
+            assert breaker.allow_request()
+
+    def test_lost_probe_is_replaced(self):
+        breaker = CircuitBreaker(minimum_calls=1, recovery_timeout=10)
+        with mock.patch("redis.circuit.monotonic", return_value=100):
+            breaker.record_failure()
+        with mock.patch("redis.circuit.monotonic", return_value=110):
+            assert breaker.allow_request()
+            assert not breaker.allow_request()
+        with mock.patch("redis.circuit.monotonic", return_value=120):
+            assert breaker.allow_request()
+
+    def test_deepcopy_starts_closed(self):
+        breaker = CircuitBreaker(minimum_calls=1, recovery_timeout=30)
+        breaker.record_failure()
+        breaker_copy = copy.deepcopy(breaker)
+        assert breaker_copy.state == CircuitBreaker.CLOSED
+        assert breaker_copy.recovery_timeout == 30
+        assert breaker.state == CircuitBreaker.OPEN
+
+
+class TestConnectionPoolCircuitBreaker:
+    "Test that connection pools consult and feed their circuit breaker"
+
+    def test_open_breaker_fails_fast(self):
+        breaker = CircuitBreaker(minimum_calls=1)
+        breaker.record_failure()
+        pool = redis.ConnectionPool(circuit_breaker=breaker)
+        with mock.patch.object(pool, "make_connection") as make_connection:
+            with pytest.raises(CircuitBreakerOpenError):
+                pool.get_connection("_")
+            make_connection.assert_not_called()
+
+    def test_connection_errors_trip_breaker(self):
+        breaker = CircuitBreaker(minimum_calls=2)
+        r = redis.Redis(port=0, circuit_breaker=breaker)
+        assert r.connection_pool.circuit_breaker is breaker
+        for _ in range(2):
+            with pytest.raises(redis.ConnectionError) as e:
+                r.ping()
+            assert not isinstance(e.value, CircuitBreakerOpenError)
+        with pytest.raises(CircuitBreakerOpenError):
+            r.ping()
+
+    def test_release_records_success(self):
+        breaker = CircuitBreaker(minimum_calls=1)
+        pool = redis.ConnectionPool(circuit_breaker=breaker)
+        connection = pool.make_connection()
+        connection._sock = mock.Mock()
+        with mock.patch.object(breaker, "record_success") as record_success:
+            pool.release(connection)
+            record_success.assert_called_once_with()
+        connection._sock = None
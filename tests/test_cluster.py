@@ -1,12 +1,15 @@
 import binascii
 import datetime
+import threading
 import warnings
-from time import sleep
+from collections import defaultdict
+from time import monotonic, sleep
 from unittest.mock import DEFAULT, Mock, call, patch
 
 import pytest
 
 from redis import Redis
+from redis.circuit import CircuitBreaker
 from redis.cluster import (
     PRIMARY,
     REDIS_CLUSTER_HASH_SLOTS,
@@ -14,19 +17,24 @@ from redis.cluster import (
     ClusterNode,
     NodesManager,
     RedisCluster,
+    SlotTable,
     get_node_name,
 )
 from redis.commands import CommandsParser
+from redis.commands.core import ScanCheckpoint
+from redis.commands.parser import SNAPSHOT_COMMANDS
 from redis.connection import Connection
 from redis.crc import key_slot
 from redis.exceptions import (
     AskError,
+    CircuitBreakerOpenError,
     ClusterDownError,
     DataError,
     MovedError,
     NoPermissionError,
     RedisClusterException,
     RedisError,
+    ResponseError,
 )
 from redis.utils import str_if_bytes
 from tests.test_pubsub import wait_for_message
@@ -90,6 +98,10 @@ def get_mocked_redis_client(func=None, *args, **kwargs):
 
         def execute_command(*_args, **_kwargs):
             if _args[0] == "CLUSTER SLOTS":
+                if not cluster_enabled:
+                    raise ResponseError(
+                        "ERR This instance has cluster support disabled"
+                    )
                 mock_cluster_slots = cluster_slots
                 return mock_cluster_slots
             elif _args[0] == "COMMAND":
@@ -323,6 +335,57 @@ class TestRedisClusterObj:
                 called_count += 1
         assert called_count == 1
 
+    def test_execute_command_fans_out_concurrently(self):
+        rc = get_mocked_redis_client(host=default_host, port=default_port)
+        nodes = rc.get_nodes()
+        barrier = threading.Barrier(len(nodes), timeout=5)
+
+        def execute_command(node, *args, **kwargs):
+            # every node must be reached before any of them answers
+            barrier.wait()
+            return node.port
+
+        with patch.object(rc, "_execute_command", side_effect=execute_command):
+            assert rc.execute_command("INFO", target_nodes=RedisCluster.ALL_NODES) == {
+                node.name: node.port for node in nodes
+            }
+        assert rc._executor is not None
+        rc.close()
+        assert rc._executor is None
+
+    def test_execute_command_fan_out_errors(self):
+        rc = get_mocked_redis_client(host=default_host, port=default_port)
+        calls = []
+
+        def execute_command(node, *args, **kwargs):
+            calls.append(node.port)
+            if node.port == 7001:
+                raise NoPermissionError("denied")
+            return "OK"
+
+        with patch.object(rc, "_execute_command", side_effect=execute_command):
+            with pytest.raises(NoPermissionError):
+                rc.execute_command("FLUSHALL", target_nodes=RedisCluster.PRIMARIES)
+        # the other primary still got the command
+        assert sorted(calls) == [7000, 7001]
+
+    def test_nested_fan_out_runs_in_worker(self):
+        rc = get_mocked_redis_client(
+            host=default_host, port=default_port, max_workers=1
+        )
+
+        def execute_command(node, *args, **kwargs):
+            if args[0] == "INFO":
+                # a fan-out from a worker of the full pool must not wait on it
+                return rc.execute_command("ECHO", target_nodes=RedisCluster.PRIMARIES)
+            return node.port
+
+        with patch.object(rc, "_execute_command", side_effect=execute_command):
+            res = rc.execute_command("INFO", target_nodes=RedisCluster.PRIMARIES)
+        assert (
+            list(res.values()) == [{"127.0.0.1:7000": 7000, "127.0.0.1:7001": 7001}] * 2
+        )
+
     def test_execute_command_default_node(self, r):
         """
         Test command execution without node flag is being executed on the
@@ -598,6 +661,65 @@ class TestRedisClusterObj:
                 rc.get("bar")
                 assert execute_command.failed_calls == rc.cluster_error_retry_attempts
 
+    def test_circuit_breaker_per_node(self):
+        """
+        Test that every node gets a circuit breaker of its own
+        """
+        breaker = CircuitBreaker(minimum_calls=1)
+        rc = get_mocked_redis_client(
+            host=default_host, port=default_port, circuit_breaker=breaker
+        )
+        breakers = [
+            node.redis_connection.connection_pool.circuit_breaker
+            for node in rc.get_nodes()
+        ]
+        assert len({id(b) for b in breakers}) == len(rc.get_nodes())
+        assert all(b is not breaker for b in breakers)
+
+    def test_open_circuit_breaker_fails_fast(self):
+        """
+        Test that a command to a node with an open circuit breaker is not
+        retried against the same node
+        """
+        rc = get_mocked_redis_client(
+            host=default_host,
+            port=default_port,
+            circuit_breaker=CircuitBreaker(minimum_calls=1),
+        )
+        node = rc.get_node_from_key("foo")
+        node.redis_connection.connection_pool.circuit_breaker.record_failure()
+        with patch("redis.cluster.time.sleep") as sleep:
+            with pytest.raises(CircuitBreakerOpenError):
+                rc.get("foo")
+            sleep.assert_not_called()
+
+    def test_circuit_breaker_kept_on_refresh(self):
+        """
+        Test that an open circuit breaker stays open when the cluster layout
+        is reinitialized
+        """
+        rc = get_mocked_redis_client(
+            host=default_host,
+            port=default_port,
+            circuit_breaker=CircuitBreaker(minimum_calls=1),
+        )
+        pool = rc.get_node_from_key("foo").redis_connection.connection_pool
+        breaker = pool.circuit_breaker
+        breaker.record_failure()
+
+        def cluster_slots(self, *args, **kwargs):
+            self.connection_pool.circuit_breaker.before_request()
+            return default_cluster_slots
+
+        with patch.object(
+            Redis, "execute_command", autospec=True, side_effect=cluster_slots
+        ):
+            # the node with the open breaker is skipped
+            rc.nodes_manager.initialize()
+        node = rc.get_node_from_key("foo")
+        assert node.redis_connection.connection_pool.circuit_breaker is breaker
+        assert breaker.state == CircuitBreaker.OPEN
+
     def test_user_on_connect_function(self, request):
         """
         Test support in passing on_connect function by the user
@@ -649,6 +771,261 @@ class TestRedisClusterObj:
             assert replica.server_type == REPLICA
             assert replica in slot_nodes
 
+    def add_multi_key_commands(self, rc, *names):
+        for name in names:
+            rc.commands_parser.commands[name] = {
+                "name": name,
+                "arity": -2,
+                "flags": ["readonly"],
+                "first_key_pos": 1,
+                "last_key_pos": -1,
+                "step_count": 1,
+            }
+
+    def test_mget_nonatomic_pipelines_every_node(self):
+        rc = get_mocked_redis_client(host=default_host, port=default_port)
+        self.add_multi_key_commands(rc, "mget")
+        # "b" and "c" belong to 7000, "a" and "d" to 7001, all in their own slot
+        responses = {7000: [[b"B"], [b"C"]], 7001: [[b"A"], [b"D"]]}
+        for node in rc.get_primaries():
+            mock_node_resp_func(node, responses[node.port].pop)
+            responses[node.port].reverse()
+        assert rc.mget_nonatomic(["a", "b", "c", "d"]) == [b"A", b"B", b"C", b"D"]
+        for node in rc.get_primaries():
+            # one round trip per node
+            node.redis_connection.connection.send_packed_command.assert_called_once()
+
+    def test_split_command_across_slots_pipelines(self):
+        rc = get_mocked_redis_client(host=default_host, port=default_port)
+        self.add_multi_key_commands(rc, "exists")
+        mock_all_nodes_resp(rc, 1)
+        assert rc.exists("a", "b", "c", "d") == 4
+        for node in rc.get_primaries():
+            node.redis_connection.connection.send_packed_command.assert_called_once()
+
+    def test_map_keys(self):
+        rc = get_mocked_redis_client(host=default_host, port=default_port)
+        responses = {7000: [b"B", b"C"], 7001: [b"A", b"D"]}
+        for node in rc.get_primaries():
+            mock_node_resp_func(node, responses[node.port].pop)
+            responses[node.port].reverse()
+        with patch.object(rc, "_run_in_parallel", wraps=rc._run_in_parallel) as run:
+            results = rc.map_keys(["a", "b", "c", "d"], lambda pipe, key: pipe.get(key))
+            # one pipeline per node
+            assert len(run.call_args[0][0]) == 2
+        assert results == [b"A", b"B", b"C", b"D"]
+
+    def test_map_keys_several_commands(self):
+        rc = get_mocked_redis_client(host=default_host, port=default_port)
+        mock_all_nodes_resp(rc, b"value")
+
+        def func(pipe, key):
+            if key != "c":
+                pipe.get(key).get(key)
+
+        assert rc.map_keys(["a", "b", "c"], func) == [
+            [b"value", b"value"],
+            [b"value", b"value"],
+            None,
+        ]
+
+    def test_map_keys_errors(self):
+        rc = get_mocked_redis_client(host=default_host, port=default_port)
+        mock_all_nodes_resp(rc, ResponseError("WRONGTYPE"))
+        with pytest.raises(ResponseError):
+            rc.map_keys(["a", "b"], lambda pipe, key: pipe.get(key))
+        results = rc.map_keys(
+            ["a", "b"], lambda pipe, key: pipe.get(key), raise_on_error=False
+        )
+        assert all(isinstance(result, ResponseError) for result in results)
+
+    def test_shared_lazy_commands_parser(self):
+        commands_parser = CommandsParser(lazy=True)
+        rc = get_mocked_redis_client(
+            host=default_host, port=default_port, commands_parser=commands_parser
+        )
+        assert rc.commands_parser is commands_parser
+        # COMMAND wasn't sent
+        assert commands_parser.commands is SNAPSHOT_COMMANDS
+        assert rc.pipeline().commands_parser is commands_parser
+
+    def test_pipeline_reuses_commands_parser(self):
+        rc = get_mocked_redis_client(host=default_host, port=default_port)
+        assert rc.pipeline().commands_parser is rc.commands_parser
+
+    def mock_scan_pages(self, rc, pages):
+        """
+        Make every node scan return its port's pages, in order
+        """
+        for node in rc.get_nodes():
+            node.redis_connection.scan = Mock(side_effect=pages.get(node.port, []))
+
+    def mock_cluster_slots(self, rc, moved=None):
+        """
+        Make CLUSTER SLOTS report the slots of the client, with the ``moved``
+        slots on their new node
+        """
+        moved = moved or {}
+
+        def cluster_slots(target_nodes=None):
+            reply = {}
+            for slot, nodes in rc.nodes_manager.slots_cache.items():
+                node = moved.get(slot, nodes[0])
+                reply[slot, slot] = {"primary": (node.host, node.port), "replicas": []}
+            return reply
+
+        return patch.object(rc, "cluster_slots", side_effect=cluster_slots)
+
+    def test_scan_iter_scans_every_primary(self):
+        rc = get_mocked_redis_client(host=default_host, port=default_port)
+        self.mock_scan_pages(rc, {7000: [(5, ["b"]), (0, ["c"])], 7001: [(0, ["a"])]})
+        with patch.object(
+            rc.nodes_manager, "initialize"
+        ) as initialize, self.mock_cluster_slots(rc) as cluster_slots:
+            assert sorted(rc.scan_iter(match="*", count=10)) == ["a", "b", "c"]
+            # the topology is checked once for slots that migrated, and isn't
+            # refreshed as none did
+            cluster_slots.assert_called_once()
+            initialize.assert_not_called()
+        node_0 = rc.get_node(default_host, 7000)
+        node_0.redis_connection.scan.assert_called_with(
+            5, match="*", count=10, _type=None
+        )
+
+    def test_scan_iter_failover(self):
+        rc = get_mocked_redis_client(host=default_host, port=default_port)
+        self.mock_scan_pages(
+            rc,
+            {
+                7000: [(0, ["b", "c"])],
+                7001: CircuitBreakerOpenError("node down"),
+                7002: [(0, ["a", "b", "d"])],
+            },
+        )
+        promoted = rc.get_node(default_host, 7002)
+
+        def failover():
+            for slot in range(8192, REDIS_CLUSTER_HASH_SLOTS):
+                rc.nodes_manager.slots_cache[slot] = [promoted]
+
+        with patch.object(
+            rc.nodes_manager, "initialize", side_effect=failover
+        ), self.mock_cluster_slots(rc):
+            # "b" is only returned by 7000, 7002 is asked for 7001's slots
+            assert sorted(rc.scan_iter()) == ["a", "b", "c", "d"]
+
+    def test_scan_iter_migrated_slots(self):
+        rc = get_mocked_redis_client(host=default_host, port=default_port)
+        self.mock_scan_pages(
+            rc, {7000: [(0, ["b"]), (0, ["b", "d"])], 7001: [(0, ["a"])]}
+        )
+        node_0 = rc.get_node(default_host, 7000)
+
+        def migrate():
+            rc.nodes_manager.slots_cache[key_slot(b"d")] = [node_0]
+
+        with patch.object(
+            rc.nodes_manager, "initialize", side_effect=migrate
+        ), self.mock_cluster_slots(rc, {key_slot(b"d"): node_0}):
+            # "d" was moved to 7000 after it was scanned
+            assert sorted(rc.scan_iter()) == ["a", "b", "d"]
+
+    def test_topology_refreshed_in_background(self):
+        rc = get_mocked_redis_client(
+            host=default_host, port=default_port, topology_refresh_interval=0.01
+        )
+        refreshed = threading.Event()
+        with patch.object(rc.nodes_manager, "initialize", side_effect=refreshed.set):
+            assert refreshed.wait(2)
+            rc.close()
+
+    def test_moved_refreshes_topology_in_background(self):
+        rc = get_mocked_redis_client(
+            host=default_host, port=default_port, topology_refresh_interval=60
+        )
+        slot = key_slot(b"foo")
+        owner = rc.nodes_manager.get_node_from_slot(slot)
+        (redirected,) = [node for node in rc.get_primaries() if node is not owner]
+
+        def moved(*args, **kwargs):
+            raise MovedError(f"{slot} {redirected.host}:{redirected.port}")
+
+        mock_node_resp_func(owner, moved)
+        mock_node_resp(redirected, b"bar")
+        refreshed = threading.Event()
+        threads = []
+
+        def initialize():
+            threads.append(threading.current_thread().name)
+            refreshed.set()
+
+        with patch.object(rc.nodes_manager, "initialize", side_effect=initialize):
+            # the command is retried on the redirected node right away
+            assert rc.get("foo") == b"bar"
+            assert rc.nodes_manager.slots_cache[slot] == [redirected]
+            assert refreshed.wait(2)
+            rc.close()
+        assert threads == ["redis-cluster-refresher"]
+
+    def test_scan_iter_resumes_checkpoint(self):
+        rc = get_mocked_redis_client(host=default_host, port=default_port)
+        self.mock_scan_pages(rc, {7000: [(0, ["c"])] * 2, 7001: [(0, ["a"])]})
+        checkpoint = ScanCheckpoint()
+        with patch.object(rc.nodes_manager, "initialize"), self.mock_cluster_slots(rc):
+            keys = rc.scan_iter(checkpoint=checkpoint)
+            next(keys)
+            saved = checkpoint.to_dict()
+        assert saved["owners"] == {
+            "127.0.0.1:7000": [[0, 8191]],
+            "127.0.0.1:7001": [[8192, 16383]],
+        }
+        # 7000 is halfway through, 7001 is done
+        saved["nodes"] = [{"node": "127.0.0.1:7000", "cursor": 5, "slots": None}]
+        with patch.object(
+            rc.nodes_manager, "initialize"
+        ) as initialize, self.mock_cluster_slots(rc) as cluster_slots:
+            resumed = ScanCheckpoint.from_dict(saved)
+            assert list(rc.scan_iter(checkpoint=resumed)) == ["c"]
+            cluster_slots.assert_called_once()
+            initialize.assert_not_called()
+        rc.get_node(default_host, 7000).redis_connection.scan.assert_called_with(
+            5, match=None, count=None, _type=None
+        )
+        assert resumed.done and resumed.nodes == []
+
+    def test_scan_iter_resumes_on_new_primary(self):
+        rc = get_mocked_redis_client(host=default_host, port=default_port)
+        self.mock_scan_pages(rc, {7000: [(0, ["a", "b", "c"])]})
+        checkpoint = ScanCheckpoint.from_dict(
+            {
+                "command": "SCAN",
+                "name": None,
+                "match": None,
+                "count": None,
+                "type": None,
+                "cursor": 0,
+                "done": False,
+                # the primary of 0-8191 left the cluster
+                "nodes": [{"node": "127.0.0.1:7004", "cursor": 3, "slots": None}],
+                "owners": {
+                    "127.0.0.1:7004": [[0, 8191]],
+                    "127.0.0.1:7001": [[8192, 16383]],
+                },
+            }
+        )
+        with patch.object(rc.nodes_manager, "initialize"), self.mock_cluster_slots(rc):
+            assert sorted(rc.scan_iter(checkpoint=checkpoint)) == ["b", "c"]
+
+    def test_scan_iter_target_nodes(self):
+        rc = get_mocked_redis_client(host=default_host, port=default_port)
+        self.mock_scan_pages(rc, {7002: [(0, ["a"])], 7003: [(0, ["b"])]})
+        with patch.object(rc.nodes_manager, "initialize") as initialize:
+            assert sorted(rc.scan_iter(target_nodes=RedisCluster.REPLICAS)) == [
+                "a",
+                "b",
+            ]
+            initialize.assert_not_called()
+
 
 @pytest.mark.onlycluster
 class TestClusterRedisCommands:
@@ -1242,7 +1619,7 @@ class TestClusterRedisCommands:
 
     @skip_if_server_version_lt("2.6.0")
     def test_cluster_bitop_not(self, r):
-        test_str = b"\xAA\x00\xFF\x55"
+        test_str = b"\xaa\x00\xff\x55"
         correct = ~0xAA00FF55 & 0xFFFFFFFF
         r["{foo}a"] = test_str
         r.bitop("not", "{foo}r", "{foo}a")
@@ -1250,7 +1627,7 @@ class TestClusterRedisCommands:
 
     @skip_if_server_version_lt("2.6.0")
     def test_cluster_bitop_not_in_place(self, r):
-        test_str = b"\xAA\x00\xFF\x55"
+        test_str = b"\xaa\x00\xff\x55"
         correct = ~0xAA00FF55 & 0xFFFFFFFF
         r["{foo}a"] = test_str
         r.bitop("not", "{foo}a", "{foo}a")
@@ -1258,7 +1635,7 @@ class TestClusterRedisCommands:
 
     @skip_if_server_version_lt("2.6.0")
     def test_cluster_bitop_single_string(self, r):
-        test_str = b"\x01\x02\xFF"
+        test_str = b"\x01\x02\xff"
         r["{foo}a"] = test_str
         r.bitop("and", "{foo}res1", "{foo}a")
         r.bitop("or", "{foo}res2", "{foo}a")
@@ -1269,8 +1646,8 @@ class TestClusterRedisCommands:
 
     @skip_if_server_version_lt("2.6.0")
     def test_cluster_bitop_string_operands(self, r):
-        r["{foo}a"] = b"\x01\x02\xFF\xFF"
-        r["{foo}b"] = b"\x01\x02\xFF"
+        r["{foo}a"] = b"\x01\x02\xff\xff"
+        r["{foo}b"] = b"\x01\x02\xff"
         r.bitop("and", "{foo}res1", "{foo}a", "{foo}b")
         r.bitop("or", "{foo}res2", "{foo}a", "{foo}b")
         r.bitop("xor", "{foo}res3", "{foo}a", "{foo}b")
@@ -1767,6 +2144,15 @@ class TestClusterRedisCommands:
         keys = list(r.scan_iter(match="a", target_nodes="primaries"))
         assert set(keys) == {b"a"}
 
+    @skip_if_server_version_lt("2.8.0")
+    def test_cluster_scan_iter_all_primaries(self, r):
+        keys = {f"key:{i}".encode() for i in range(100)}
+        r.mset_nonatomic({key: 1 for key in keys})
+        assert set(r.scan_iter(count=10)) == keys
+        assert set(r.scan_iter(match="key:1*", max_workers=1)) == {
+            key for key in keys if key.startswith(b"key:1")
+        }
+
     def test_cluster_randomkey(self, r):
         node = r.get_node_from_key("{foo}")
         assert r.randomkey(target_nodes=node) is None
@@ -1978,6 +2364,91 @@ class TestNodesManager:
 
         assert len(n_manager.nodes_cache) == 6
 
+    def test_reinitialize_keeps_nodes(self):
+        """
+        Test that reinitializing the cluster keeps the nodes that are still
+        in the cluster, with their connections, and closes the idle
+        connections of the nodes that left
+        """
+        rc = get_mocked_redis_client(host=default_host, port=default_port)
+        n = rc.nodes_manager
+        nodes = dict(n.nodes_cache)
+        connections = {name: node.redis_connection for name, node in nodes.items()}
+        removed = nodes["127.0.0.1:7003"]
+        removed.redis_connection.connection_pool = Mock()
+        # the replica of 0-8191 left, 7002 was promoted
+        cluster_slots = [
+            [0, 8191, ["127.0.0.1", 7000, "node_0"]],
+            [8192, 16383, ["127.0.0.1", 7002, "node_2"], ["127.0.0.1", 7001]],
+        ]
+        with patch.object(Redis, "execute_command", return_value=cluster_slots):
+            n.initialize()
+        assert "127.0.0.1:7003" not in n.nodes_cache
+        removed.redis_connection.connection_pool.disconnect.assert_called_once_with(
+            inuse_connections=False
+        )
+        for name, node in n.nodes_cache.items():
+            assert node is nodes[name]
+            assert node.redis_connection is connections[name]
+        assert n.nodes_cache["127.0.0.1:7002"].server_type == PRIMARY
+        assert n.nodes_cache["127.0.0.1:7001"].server_type == REPLICA
+
+    def test_init_slots_cache_shares_shards(self):
+        good_slots_resp = [
+            [0, 5460, ["127.0.0.1", 7000], ["127.0.0.2", 7003]],
+            [5461, 10922, ["127.0.0.1", 7001], ["127.0.0.2", 7004]],
+            [10923, 16382, ["127.0.0.1", 7002], ["127.0.0.2", 7005]],
+            [16383, 16383, ["127.0.0.1", 7000], ["127.0.0.2", 7003]],
+        ]
+        rc = get_mocked_redis_client(
+            host=default_host, port=default_port, cluster_slots=good_slots_resp
+        )
+        slots_cache = rc.nodes_manager.slots_cache
+        assert isinstance(slots_cache, SlotTable)
+        assert slots_cache[0] is slots_cache[5460]
+        assert slots_cache[0] is slots_cache[16383]
+        assert len(slots_cache.shards) == 4
+
+    def test_slot_table(self):
+        node_1 = ClusterNode(default_host, 7000, PRIMARY)
+        node_2 = ClusterNode(default_host, 7001, REPLICA)
+        node_3 = ClusterNode(default_host, 7002, PRIMARY)
+        slots = SlotTable()
+        assert len(slots) == 0
+        assert slots.get(0) is None
+        assert slots.range_nodes(0, 100) == []
+
+        slots.set_range(0, 100, [node_1, node_2])
+        slots.set_range(101, 200, [node_3])
+        assert len(slots) == 201
+        assert slots[100] == [node_1, node_2]
+        assert slots[101] == [node_3]
+        assert 200 in slots and 201 not in slots
+        assert slots.range_nodes(0, 100) == [node_1, node_2]
+        assert slots.range_nodes(100, 101) is None
+        with pytest.raises(KeyError):
+            slots[201]
+
+        # assigning a slot leaves the other slots of the shard alone
+        slots[0] = [node_3]
+        assert slots[0] is slots[101]
+        assert slots[1] == [node_1, node_2]
+        del slots[200]
+        assert list(slots) == list(range(0, 200))
+        assert dict(slots.items())[50] == [node_1, node_2]
+
+    def test_slot_table_compacted(self):
+        slots = SlotTable()
+        node = ClusterNode(default_host, 7000, PRIMARY)
+        slots.set_range(0, REDIS_CLUSTER_HASH_SLOTS - 1, [node])
+        # every assignment adds a shard
+        for port in range(0x10000):
+            slots[port % 10] = [ClusterNode(default_host, port, PRIMARY)]
+        # the shards no slot points to were dropped
+        assert len(slots.shards) <= 0xFFFF
+        assert slots[0xFFFF % 10][0].port == 0xFFFF
+        assert slots[10] == [node]
+
     def test_init_slots_cache_cluster_mode_disabled(self):
         """
         Test that creating a RedisCluster failes if one of the startup nodes
@@ -2168,6 +2639,69 @@ class TestNodesManager:
                 assert rc.get_node(host=default_host, port=7001) is not None
                 assert rc.get_node(host=default_host, port=7002) is not None
 
+    def probe_startup_nodes(
+        self, startup_nodes, blocked_port=None, replies=None, **kwargs
+    ):
+        """
+        Create a RedisCluster whose startup nodes report the default slots,
+        or their reply in ``replies``, and return it with the commands each
+        node received
+        """
+        commands = defaultdict(list)
+        release = threading.Event()
+
+        def create_mocked_redis_node(host, port, **kwargs):
+            r_node = Redis(host=host, port=port, decode_responses=True)
+
+            def execute_command(*args, **kwargs):
+                commands[port].append(args[0])
+                if args[0] == "CLUSTER SLOTS":
+                    if port == blocked_port:
+                        release.wait(5)
+                    return (replies or {}).get(port, default_cluster_slots)
+                elif args[1] == "cluster-require-full-coverage":
+                    return {"cluster-require-full-coverage": "yes"}
+
+            r_node.execute_command = execute_command
+            return r_node
+
+        with patch.object(
+            NodesManager, "create_redis_node", side_effect=create_mocked_redis_node
+        ), patch.object(CommandsParser, "initialize"):
+            try:
+                rc = RedisCluster(startup_nodes=startup_nodes, **kwargs)
+            finally:
+                release.set()
+        return rc, commands
+
+    def test_init_does_not_wait_for_slow_nodes(self):
+        """
+        The layout is built from the first answers that cover all the slots,
+        without waiting for the other startup nodes
+        """
+        startup_nodes = [ClusterNode(default_host, port) for port in (7000, 7001)]
+        start = monotonic()
+        rc, commands = self.probe_startup_nodes(startup_nodes, blocked_port=7000)
+        assert monotonic() - start < 5
+        assert rc.get_node(host=default_host, port=7001) is not None
+        assert commands[7001] == ["CLUSTER SLOTS"]
+
+    def test_init_probes_all_startup_nodes(self):
+        startup_nodes = [ClusterNode(default_host, port) for port in (7000, 7001)]
+        rc, commands = self.probe_startup_nodes(
+            startup_nodes, probe_all_startup_nodes=True
+        )
+        assert commands[7000] == commands[7001] == ["CLUSTER SLOTS"]
+        assert len(rc.nodes_manager.slots_cache) == REDIS_CLUSTER_HASH_SLOTS
+
+    def test_init_skips_invalid_replies(self):
+        startup_nodes = [ClusterNode(default_host, port) for port in (7000, 7001)]
+        rc, commands = self.probe_startup_nodes(
+            startup_nodes, replies={7000: ConnectionError("error")}
+        )
+        assert commands[7000] == commands[7001] == ["CLUSTER SLOTS"]
+        assert len(rc.nodes_manager.slots_cache) == REDIS_CLUSTER_HASH_SLOTS
+
 
 @pytest.mark.onlycluster
 class TestClusterPubSubObject:
@@ -2552,6 +3086,105 @@ class TestClusterPipeline:
         result = p.execute()
         assert result == []
 
+    def redirect_pipeline(self, error_class):
+        """
+        Return a mocked client whose node for the slot of "{foo}" redirects
+        every command to the other node, and the two nodes
+        """
+        rc = get_mocked_redis_client(host=default_host, port=default_port)
+        slot = key_slot(b"{foo}")
+        owner = rc.nodes_manager.get_node_from_slot(slot)
+        (redirected,) = [node for node in rc.get_primaries() if node is not owner]
+
+        def redirect(*args, **kwargs):
+            raise error_class(f"{slot} {redirected.host}:{redirected.port}")
+
+        mock_node_resp_func(owner, redirect)
+        mock_node_resp(redirected, b"bar")
+        return rc, owner, redirected
+
+    def test_moved_commands_are_sent_again_together(self):
+        rc, owner, redirected = self.redirect_pipeline(MovedError)
+        with rc.pipeline() as pipe:
+            for i in range(3):
+                pipe.get(f"{{foo}}{i}")
+            assert pipe.execute() == [b"bar"] * 3
+            assert pipe.reinitialize_counter == 1
+        connection = redirected.redis_connection.connection
+        connection.send_packed_command.assert_called_once()
+        connection.pack_commands.assert_called_once_with(
+            [("GET", f"{{foo}}{i}") for i in range(3)]
+        )
+        # the following commands go to the new owner
+        slot = key_slot(b"{foo}")
+        assert rc.nodes_manager.get_node_from_slot(slot) is redirected
+
+    def test_ask_commands_are_sent_again_together(self):
+        rc, owner, redirected = self.redirect_pipeline(AskError)
+        with rc.pipeline() as pipe:
+            pipe.get("{foo}1").get("{foo}2")
+            assert pipe.execute() == [b"bar"] * 2
+        connection = redirected.redis_connection.connection
+        connection.pack_commands.assert_called_once_with(
+            [("ASKING",), ("GET", "{foo}1"), ("ASKING",), ("GET", "{foo}2")]
+        )
+        # ASK doesn't change the owner of the slot
+        slot = key_slot(b"{foo}")
+        assert rc.nodes_manager.get_node_from_slot(slot) is owner
+
+    def test_redirect_to_new_node(self):
+        rc, owner, _ = self.redirect_pipeline(AskError)
+        slot = key_slot(b"{foo}")
+
+        def redirect(*args, **kwargs):
+            raise AskError(f"{slot} {default_host}:7006")
+
+        mock_node_resp_func(owner, redirect)
+        new_redis = Redis()
+        new_redis.connection = Mock()
+        new_redis.connection.read_response.return_value = b"bar"
+        with patch.object(
+            NodesManager, "create_redis_node", return_value=new_redis
+        ) as create_redis_node:
+            for _ in range(2):
+                with rc.pipeline() as pipe:
+                    assert pipe.get("{foo}1").execute() == [b"bar"]
+        # the new node joined the nodes cache and its connections are reused
+        assert rc.get_node(default_host, 7006).redis_connection is new_redis
+        create_redis_node.assert_called_once()
+
+    def test_redirects_are_followed_a_bounded_number_of_times(self):
+        rc, owner, redirected = self.redirect_pipeline(MovedError)
+        slot = key_slot(b"{foo}")
+
+        def redirect_back(*args, **kwargs):
+            raise MovedError(f"{slot} {owner.host}:{owner.port}")
+
+        mock_node_resp_func(redirected, redirect_back)
+        with patch.object(rc.nodes_manager, "initialize"), patch(
+            "redis.cluster.time.sleep"
+        ), rc.pipeline() as pipe:
+            res = pipe.get("{foo}1").get("{foo}2").execute(raise_on_error=False)
+        assert [type(e) for e in res] == [MovedError, MovedError]
+        rounds = sum(
+            node.redis_connection.connection.send_packed_command.call_count
+            for node in (owner, redirected)
+        )
+        assert rounds == RedisCluster.RedisClusterRequestTTL
+
+    def test_connection_errors_refresh_the_layout_later(self):
+        rc, owner, _ = self.redirect_pipeline(ConnectionError)
+        with patch.object(rc.nodes_manager, "initialize") as initialize, patch(
+            "redis.cluster.time.sleep"
+        ), rc.pipeline() as pipe:
+            with pytest.raises(ConnectionError):
+                pipe.get("{foo}").execute()
+            # the commands keep their errors, and the layout is refreshed
+            # before the next command is routed
+            initialize.assert_not_called()
+            rc.nodes_manager.get_node_from_slot(key_slot(b"{foo}"))
+            initialize.assert_called_once()
+
 
 @pytest.mark.onlycluster
 class TestReadOnlyPipeline:
@@ -1,6 +1,26 @@
+import threading
+from unittest import mock
+
 import pytest
 
+from redis.client import parse_command
 from redis.commands import CommandsParser
+from redis.exceptions import ConnectionError
+
+
+def mock_connection(*commands):
+    """
+    A connection whose COMMAND reply holds the given raw command infos
+    """
+    redis_conn = mock.Mock()
+    redis_conn.execute_command.return_value = parse_command(list(commands))
+    return redis_conn
+
+
+def wait_for_refresh():
+    for thread in threading.enumerate():
+        if thread.name == "redis-commands-parser":
+            thread.join()
 
 
 class TestCommandsParser:
@@ -78,3 +98,152 @@ class TestCommandsParser:
         assert commands_parser.get_keys(r, *args2) == ["foo1", "foo2", "foo3"]
         assert commands_parser.get_keys(r, *args3) == ["*"]
         assert commands_parser.get_keys(r, *args4) == ["foo1", "foo2", "foo3"]
+
+    def test_moveable_keys_found_locally(self):
+        redis_conn = mock_connection(
+            *[
+                [name, -3, ["movablekeys"], 0, 0, 0]
+                for name in ("evalsha", "sort", "xreadgroup", "migrate", "zinterstore")
+            ]
+        )
+        commands_parser = CommandsParser(redis_conn)
+        args = ["EVALSHA", "sha", 2, "key1", "key2", "arg"]
+        assert commands_parser.get_keys(redis_conn, *args) == ["key1", "key2"]
+        args = ["SORT", "key", "BY", "store", "LIMIT", 0, 1, "STORE", "out"]
+        assert commands_parser.get_keys(redis_conn, *args) == ["key", "out"]
+        args = ["XREADGROUP", "GROUP", "g", "c", "STREAMS", "s1", "s2", 0, 0]
+        assert commands_parser.get_keys(redis_conn, *args) == ["s1", "s2"]
+        args = ["MIGRATE", "host", 6379, "", 0, 5000, "AUTH", "KEYS", "KEYS", "k"]
+        assert commands_parser.get_keys(redis_conn, *args) == ["k"]
+        args = ["ZINTERSTORE", "out", 2, "zset1", "zset2", "WEIGHTS", 2, 3]
+        assert commands_parser.get_keys(redis_conn, *args) == [
+            "out",
+            "zset1",
+            "zset2",
+        ]
+        # no COMMAND GETKEYS
+        redis_conn.execute_command.assert_called_once_with("COMMAND")
+
+    def test_moveable_keys_from_key_specifications(self):
+        # Redis 7 key specifications of a module command:
+        # MOD.CMD numkeys key [key ...] [OUT destination]
+        key_specs = [
+            [
+                "flags",
+                ["RO"],
+                "begin_search",
+                ["type", "index", "spec", ["index", 1]],
+                "find_keys",
+                [
+                    "type",
+                    "keynum",
+                    "spec",
+                    ["keynumidx", 0, "firstkey", 1, "keystep", 1],
+                ],
+            ],
+            [
+                "flags",
+                ["OW", "UPDATE"],
+                "begin_search",
+                ["type", "keyword", "spec", ["keyword", "OUT", "startfrom", -2]],
+                "find_keys",
+                ["type", "range", "spec", ["lastkey", 0, "keystep", 1, "limit", 0]],
+            ],
+        ]
+        command = ["mod.cmd", -2, ["movablekeys"], 0, 0, 0, [], [], key_specs, []]
+        redis_conn = mock_connection(command)
+        commands_parser = CommandsParser(redis_conn)
+        args = ["MOD.CMD", 2, "key1", "key2", "OUT", "dest"]
+        assert commands_parser.get_keys(redis_conn, *args) == ["key1", "key2", "dest"]
+        args = ["MOD.CMD", 1, "key1"]
+        assert commands_parser.get_keys(redis_conn, *args) == ["key1"]
+        # only COMMAND was sent
+        redis_conn.execute_command.assert_called_once_with("COMMAND")
+
+    def test_incomplete_key_specifications_use_getkeys(self):
+        key_specs = [
+            [
+                "flags",
+                ["RW", "INCOMPLETE"],
+                "begin_search",
+                ["type", "unknown", "spec", []],
+                "find_keys",
+                ["type", "unknown", "spec", []],
+            ]
+        ]
+        command = ["mod.cmd", -2, ["movablekeys"], 0, 0, 0, [], [], key_specs, []]
+        redis_conn = mock_connection(command)
+        commands_parser = CommandsParser(redis_conn)
+        redis_conn.execute_command.return_value = ["key1"]
+        args = ["MOD.CMD", "key1", "arg"]
+        assert commands_parser.get_keys(redis_conn, *args) == ["key1"]
+        redis_conn.execute_command.assert_called_with("COMMAND GETKEYS", *args)
+
+    def test_getkeys_memoized_per_argument_shape(self):
+        command = ["mod.cmd", -2, ["movablekeys"], 0, 0, 0]
+        redis_conn = mock_connection(command)
+        commands_parser = CommandsParser(redis_conn)
+        # without decode_responses, the keys are bytes
+        redis_conn.execute_command.side_effect = lambda *args: [args[3].encode()]
+        assert commands_parser.get_keys(redis_conn, "MOD.CMD", "A", "key1") == [b"key1"]
+        # the same non-key arguments, the known key position is reused
+        assert commands_parser.get_keys(redis_conn, "MOD.CMD", "A", "key2") == ["key2"]
+        assert redis_conn.execute_command.call_count == 2
+        # another shape asks the server
+        assert commands_parser.get_keys(redis_conn, "MOD.CMD", "B", "key3") == [b"key3"]
+        assert redis_conn.execute_command.call_count == 3
+        # a key position can't be found when an argument has the name of a
+        # key, so it is not remembered
+        commands_parser.get_keys(redis_conn, "MOD.CMD", "key4", "key4")
+        commands_parser.get_keys(redis_conn, "MOD.CMD", "key4", "key4")
+        assert redis_conn.execute_command.call_count == 5
+
+    def test_lazy_parser_starts_from_bundled_table(self):
+        fetched = threading.Event()
+        commands = parse_command([["get", 2, ["readonly"], 1, 1, 1]])
+
+        def execute_command(*args):
+            fetched.wait()
+            return commands
+
+        redis_conn = mock.Mock()
+        redis_conn.execute_command.side_effect = execute_command
+        commands_parser = CommandsParser(lazy=True)
+        # the bundled table is shared
+        assert commands_parser.commands is CommandsParser(lazy=True).commands
+        redis_conn.execute_command.assert_not_called()
+
+        args = ["MGET", "foo", "bar"]
+        assert commands_parser.get_keys(redis_conn, *args) == ["foo", "bar"]
+        # the table of the server is fetched in the background
+        redis_conn.execute_command.assert_called_once_with("COMMAND")
+        fetched.set()
+        wait_for_refresh()
+        assert commands_parser.commands is commands
+        commands_parser.get_keys(redis_conn, "GET", "foo")
+        assert redis_conn.execute_command.call_count == 1
+
+    def test_lazy_parser_initialized(self):
+        commands = parse_command([["get", 2, ["readonly"], 1, 1, 1]])
+        redis_conn = mock.Mock()
+        redis_conn.execute_command.return_value = commands
+        commands_parser = CommandsParser(lazy=True)
+        commands_parser.initialize(redis_conn)
+        # the table is not fetched again in the background
+        assert commands_parser.get_keys(redis_conn, "GET", "foo") == ["foo"]
+        wait_for_refresh()
+        redis_conn.execute_command.assert_called_once_with("COMMAND")
+
+    def test_lazy_parser_refresh_retried(self):
+        redis_conn = mock.Mock()
+        redis_conn.execute_command.side_effect = ConnectionError()
+        commands_parser = CommandsParser(lazy=True)
+        assert commands_parser.get_keys(redis_conn, "GET", "foo") == ["foo"]
+        wait_for_refresh()
+        assert commands_parser._refresh_needed
+        commands = parse_command([["get", 2, ["readonly"], 1, 1, 1]])
+        redis_conn.execute_command.side_effect = None
+        redis_conn.execute_command.return_value = commands
+        commands_parser.get_keys(redis_conn, "GET", "foo")
+        wait_for_refresh()
+        assert commands_parser.commands is commands
@@ -1,14 +1,17 @@
 import binascii
 import datetime
+import json
 import re
 import time
 from string import ascii_letters
+from unittest import mock
 
 import pytest
 
 import redis
 from redis import exceptions
 from redis.client import parse_info
+from redis.commands.core import ScanCheckpoint
 
 from .conftest import (
     _get_client,
@@ -577,6 +580,18 @@ class TestRedisCommands:
         # validate it was set
         assert r.get("foo") == b"bar"
 
+    @pytest.mark.onlynoncluster
+    @skip_if_server_version_lt("3.2.0")
+    def test_noreply(self, r):
+        assert r.execute_command("SET", "foo", "bar", NOREPLY=True) is None
+        # the connection is still usable for regular commands
+        assert r.get("foo") == b"bar"
+
+        client = redis.Redis(connection_pool=r.connection_pool, noreply=True)
+        assert client.incr("counter") is None
+        assert client.incr("counter") is None
+        assert r.get("counter") == b"2"
+
     @pytest.mark.onlynoncluster
     @skip_if_server_version_lt("6.0.0")
     @skip_if_redis_enterprise()
@@ -1615,6 +1630,118 @@ class TestRedisCommands:
         keys = list(r.scan_iter(match="a"))
         assert set(keys) == {b"a"}
 
+    @pytest.mark.onlynoncluster
+    @skip_if_server_version_lt("2.8.0")
+    def test_scan_iter_checkpoint(self, r):
+        for key in "abcde":
+            r.set(key, key)
+        checkpoint = ScanCheckpoint()
+        keys = r.scan_iter(match="*", count=2, checkpoint=checkpoint)
+        seen = [next(keys) for _ in range(3)]
+        # the first page was returned completely
+        assert checkpoint.cursor != 0 and not checkpoint.done
+        saved = json.loads(json.dumps(checkpoint.to_dict()))
+
+        resumed = ScanCheckpoint.from_dict(saved)
+        with pytest.raises(exceptions.DataError):
+            next(r.scan_iter(match="a*", checkpoint=resumed))
+        seen += r.scan_iter(checkpoint=resumed)
+        assert set(seen) == {key.encode() for key in "abcde"}
+        assert len(seen) < 8
+        assert resumed.done
+        assert list(r.scan_iter(checkpoint=resumed)) == []
+
+    @skip_if_server_version_lt("2.8.0")
+    def test_hscan_iter_checkpoint(self, r):
+        r.hset("a", mapping={"a": 1, "b": 2})
+        checkpoint = ScanCheckpoint()
+        assert dict(r.hscan_iter("a", checkpoint=checkpoint)) == {
+            b"a": b"1",
+            b"b": b"2",
+        }
+        assert checkpoint.done
+        assert list(r.hscan_iter("a", checkpoint=checkpoint)) == []
+        with pytest.raises(exceptions.DataError):
+            list(r.hscan_iter("b", checkpoint=checkpoint))
+        with pytest.raises(exceptions.DataError):
+            list(r.zscan_iter("a", checkpoint=checkpoint))
+
+    @skip_if_server_version_lt("2.8.0")
+    def test_scan_values(self, r):
+        r.set("a", 1)
+        r.set("b", 2)
+        r.hset("c", "foo", "bar")
+        r.expire("a", 100)
+        assert dict(r.scan_values(match="[ab]", batch=1)) == {b"a": b"1", b"b": b"2"}
+        assert dict(r.scan_values(match="c", fetch="hgetall")) == {
+            b"c": {b"foo": b"bar"}
+        }
+        values = dict(r.scan_values(fetch="type+ttl"))
+        assert values[b"a"] == (b"string", 100)
+        assert values[b"b"] == (b"string", -1)
+        assert values[b"c"] == (b"hash", -1)
+        with pytest.raises(exceptions.DataError):
+            list(r.scan_values(fetch="lrange"))
+
+    def test_scan_values_skips_other_types(self, r):
+        r.set("a", 1)
+        r.hset("b", "foo", "bar")
+        r.set("c", 3)
+        assert dict(r.scan_values(batch=2)) == {b"a": b"1", b"c": b"3"}
+
+    @pytest.mark.onlynoncluster
+    def test_scan_values_pipelines_every_batch(self, r):
+        for key in "abcde":
+            r.set(key, key)
+        execute = redis.client.Pipeline.execute
+        with mock.patch.object(
+            redis.client.Pipeline, "execute", autospec=True, side_effect=execute
+        ) as pipeline_execute:
+            values = dict(r.scan_values(batch=2))
+        assert values == {key.encode(): key.encode() for key in "abcde"}
+        assert pipeline_execute.call_count == 3
+
+    @skip_if_server_version_lt("4.0.0")
+    def test_delete_pattern(self, r):
+        # the keys share a slot for MSET and EXISTS
+        r.mset({"{k}a:1": 1, "{k}a:2": 2, "{k}b:1": 3})
+        progress = mock.Mock()
+        assert r.delete_pattern("{k}a:*", batch=1, progress=progress) == 2
+        assert r.exists("{k}a:1", "{k}a:2", "{k}b:1") == 1
+        assert progress.call_args_list[-1] == mock.call(2, 2)
+        assert r.delete_pattern("{k}a:*") == 0
+
+    @pytest.mark.onlynoncluster
+    @skip_if_server_version_lt("4.0.0")
+    def test_delete_pattern_rate(self, r):
+        r.mset({f"a:{i}": i for i in range(30)})
+        with mock.patch("redis.commands.core.time.sleep") as sleep:
+            assert r.delete_pattern("a:*", rate=100) == 30
+        # batches of 10 keys, paced to 100 keys per second
+        assert sleep.call_count >= 2
+        assert sum(args[0] for args, _ in sleep.call_args_list) <= 0.3
+        with pytest.raises(exceptions.DataError):
+            r.delete_pattern("a:*", rate=0)
+
+    def test_expire_pattern(self, r):
+        r.mset({"{k}a:1": 1, "{k}a:2": 2, "{k}b:1": 3})
+        assert r.expire_pattern("{k}a:*", datetime.timedelta(seconds=60)) == 2
+        assert 0 < r.ttl("{k}a:1") <= 60
+        assert r.ttl("{k}b:1") == -1
+
+    @skip_if_server_version_lt("6.0.0")
+    def test_hscan_values(self, r):
+        r.hset("a", mapping={"foo": 1, "bar": 2})
+        r.hset("b", mapping={"foo": 3})
+        r.set("c", 4)
+        assert dict(r.hscan_values()) == {
+            b"a": {b"foo": b"1", b"bar": b"2"},
+            b"b": {b"foo": b"3"},
+        }
+        assert dict(r.hscan_values(match="b", fields=["foo", "bar"])) == {
+            b"b": {"foo": b"3", "bar": None}
+        }
+
     @skip_if_server_version_lt("2.8.0")
     def test_sscan(self, r):
         r.sadd("a", 1, 2, 3)
@@ -0,0 +1,143 @@
+from unittest import mock
+
+import pytest
+
+import redis
+from redis import exceptions
+from redis.cluster import ClusterNode, RedisCluster
+from redis.commands.core import Function, ScriptRegistry
+from tests.conftest import _get_client, skip_if_server_version_lt
+
+library = """#!lua name=mylib
+redis.register_function('myfunc', function(keys, args) return args[1] end)
+redis.register_function{
+    function_name='myreadfunc',
+    callback=function(keys, args) return redis.call('GET', keys[1]) end,
+    flags={'no-writes'}
+}
+"""
+
+
+@pytest.mark.onlynoncluster
+@skip_if_server_version_lt("7.0.0")
+class TestFunction:
+    @pytest.fixture(autouse=True)
+    def reset_functions(self, r):
+        r.function_flush()
+
+    def test_function_load_and_delete(self, r):
+        assert r.function_load(library) == "mylib"
+        with pytest.raises(exceptions.ResponseError):
+            r.function_load(library)
+        assert r.function_load(library, replace=True) == "mylib"
+        assert r.fcall("myfunc", 0, "hello") == b"hello"
+        assert r.function_delete("mylib")
+        with pytest.raises(exceptions.ResponseError):
+            r.fcall("myfunc", 0, "hello")
+
+    def test_function_flush(self, r):
+        r.function_load(library)
+        assert r.function_flush("SYNC")
+        assert r.function_list() == []
+        with pytest.raises(exceptions.DataError):
+            r.function_flush("NOTREAL")
+
+    def test_fcall_ro(self, r):
+        r.function_load(library)
+        r.set("a", "value")
+        assert r.fcall_ro("myreadfunc", 1, "a") == b"value"
+
+    def test_function_dump_and_restore(self, r):
+        r.function_load(library)
+        payload = r.function_dump()
+        r.function_flush()
+        assert r.function_restore(payload)
+        assert r.fcall("myfunc", 0, "hello") == b"hello"
+        with pytest.raises(exceptions.ResponseError):
+            r.function_restore(payload)
+        assert r.function_restore(payload, "REPLACE")
+
+    def test_registered_function_loads_library_once(self, r):
+        myfunc = r.register_function(library, "myfunc")
+        with mock.patch.object(r, "function_load", wraps=r.function_load) as load:
+            assert myfunc(args=["hello"]) == b"hello"
+            assert myfunc(args=["world"]) == b"world"
+            load.assert_called_once_with(library, replace=True)
+
+    def test_registered_function_reloads_after_flush(self, r):
+        myfunc = r.register_function(library, "myfunc")
+        assert myfunc(args=["hello"]) == b"hello"
+        r.function_flush()
+        assert myfunc(args=["hello"]) == b"hello"
+
+    def test_registered_read_only_function(self, r):
+        r.set("a", "value")
+        myreadfunc = r.register_function(library, "myreadfunc", read_only=True)
+        with mock.patch.object(r, "fcall_ro", wraps=r.fcall_ro) as fcall_ro:
+            assert myreadfunc(keys=["a"]) == b"value"
+            fcall_ro.assert_called_once_with("myreadfunc", 1, "a")
+
+    def test_registered_function_in_pipeline(self, r):
+        myfunc = r.register_function(library, "myfunc")
+        pipe = r.pipeline()
+        myfunc(args=["hello"], client=pipe)
+        assert pipe.execute() == [b"hello"]
+
+    def test_replica_falls_back_to_primary(self, r):
+        replica = mock.Mock()
+        replica.fcall_ro.side_effect = exceptions.ResponseError("Function not found")
+        myreadfunc = r.register_function(
+            library, "myreadfunc", read_only=True, replica=replica
+        )
+        r.set("a", "value")
+        assert myreadfunc(keys=["a"]) == b"value"
+        replica.fcall_ro.assert_called_once_with("myreadfunc", 1, "a")
+
+    def test_script_registry_tracks_library(self, request):
+        registry = ScriptRegistry()
+        with _get_client(redis.Redis, request, script_registry=registry) as client:
+            script_sha = client.script_load("return 1")
+            myfunc = client.register_function(library, "myfunc")
+            assert myfunc(args=["hello"]) == b"hello"
+            assert myfunc.sha in registry
+            client.function_flush()
+            assert myfunc.sha not in registry
+            # the scripts are not affected
+            assert script_sha in registry
+
+
+class TestClusterFunction:
+    def test_function_commands_target_primaries(self):
+        assert RedisCluster.COMMAND_FLAGS["FUNCTION LOAD"] == RedisCluster.PRIMARIES
+        assert RedisCluster.COMMAND_FLAGS["FUNCTION FLUSH"] == RedisCluster.PRIMARIES
+
+    def test_fcall_determines_slot_from_numkeys(self):
+        rc = mock.Mock(spec=RedisCluster)
+        rc.keyslot = RedisCluster.keyslot.__get__(rc)
+        rc.command_flags = RedisCluster.COMMAND_FLAGS
+        rc.encoder = redis.connection.Encoder("utf-8", "strict", False)
+        slot = RedisCluster.determine_slot(rc, "FCALL_RO", "f", 1, "foo", "bar")
+        assert slot == rc.keyslot("foo")
+        rc._get_command_keys.assert_not_called()
+        keyless = RedisCluster.determine_slot(rc, "FCALL", "f", 0, "bar")
+        assert 0 <= keyless < 16384
+
+    def test_library_loaded_on_missing_primaries(self):
+        primaries = [ClusterNode("127.0.0.1", 7000), ClusterNode("127.0.0.1", 7001)]
+        rc = mock.Mock(spec=RedisCluster)
+        rc.get_encoder.return_value = redis.connection.Encoder("utf-8", "strict", False)
+        rc.get_primaries.return_value = primaries
+        myfunc = Function(rc, library, "myfunc")
+        myfunc(args=["hello"])
+        myfunc(args=["hello"])
+        rc.function_load.assert_called_once_with(
+            library, replace=True, target_nodes=primaries
+        )
+        assert rc.fcall.call_count == 2
+
+        # a new primary joined the cluster
+        primaries.append(ClusterNode("127.0.0.1", 7002))
+        myfunc(args=["hello"])
+        rc.function_load.assert_called_with(
+            library, replace=True, target_nodes=primaries[2:]
+        )
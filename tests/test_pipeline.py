@@ -1,3 +1,5 @@
+from unittest import mock
+
 import pytest
 
 import redis
@@ -398,3 +400,247 @@ class TestPipeline:
             response = pipe.execute()
         assert response[0]
         assert r.get("foo") == b"bar"
+
+    @pytest.mark.onlynoncluster
+    def test_pipeline_auto_flush_max_batch(self, r):
+        results = []
+        with r.pipeline(
+            transaction=False,
+            max_batch=3,
+            result_callback=lambda i, res: results.append((i, res)),
+        ) as pipe:
+            for i in range(5):
+                pipe.set(f"k{i}", i)
+            # the first three commands were sent as soon as they were queued
+            assert len(pipe) == 2
+            assert r["k2"] == b"2"
+            assert [i for i, _ in results] == [0, 1, 2]
+            pipe.get("k0")
+            assert pipe.execute() == []
+            assert len(pipe) == 0
+        assert results == [(i, True) for i in range(5)] + [(5, b"0")]
+
+    @pytest.mark.onlynoncluster
+    def test_pipeline_auto_flush_max_bytes(self, r):
+        results = []
+        with r.pipeline(
+            transaction=False,
+            max_bytes=20,
+            result_callback=lambda i, res: results.append(res),
+        ) as pipe:
+            pipe.set("a", "x" * 20)
+            assert len(pipe) == 0
+            assert results == [True]
+            pipe.set("b", "y")
+            assert len(pipe) == 1
+
+    @pytest.mark.onlynoncluster
+    def test_pipeline_auto_flush_errors(self, r):
+        r["a"] = 1
+        results = []
+        with r.pipeline(
+            transaction=False,
+            max_batch=2,
+            result_callback=lambda i, res: results.append(res),
+        ) as pipe:
+            pipe.set("b", 1).set("c", 1).llen("a").expire("a", 100)
+        assert isinstance(results[2], redis.ResponseError)
+        assert str(results[2]).startswith("Command # 3 (LLEN a) of pipeline")
+        assert results[3] is True
+
+        with r.pipeline(transaction=False, max_batch=2) as pipe:
+            pipe.set("b", 1)
+            with pytest.raises(redis.ResponseError) as ex:
+                pipe.llen("a")
+            assert str(ex.value).startswith("Command # 2 (LLEN a) of pipeline")
+
+    @pytest.mark.onlynoncluster
+    def test_pipeline_auto_flush_send_error(self, r):
+        with r.pipeline(transaction=False, max_batch=2) as pipe:
+            pipe.set("a", 1)
+            with mock.patch.object(
+                r.connection_pool,
+                "get_connection",
+                side_effect=redis.ConnectionError(),
+            ), pytest.raises(redis.ConnectionError):
+                pipe.set("b", 1)
+            # the failed commands are not sent again
+            assert len(pipe) == 0
+            pipe.set("c", 1).set("d", 1)
+        assert r.get("a") is None
+        assert r.get("c") == b"1"
+
+    @pytest.mark.onlynoncluster
+    def test_pipeline_auto_flush_requires_no_transaction(self, r):
+        with pytest.raises(redis.DataError):
+            redis.client.Pipeline(r.connection_pool, {}, True, None, max_batch=10)
+
+    @pytest.mark.onlynoncluster
+    def test_pipeline_execute_iter(self, r):
+        r["a"] = 1
+        with r.pipeline(transaction=False) as pipe:
+            pipe.set("b", 2).get("b").llen("a").get("a")
+            results = pipe.execute_iter(raise_on_error=False)
+            assert next(results) == (0, True)
+            assert next(results) == (1, b"2")
+            index, error = next(results)
+            assert index == 2
+            assert isinstance(error, redis.ResponseError)
+            assert str(error).startswith("Command # 3 (LLEN a) of pipeline")
+            assert list(results) == [(3, b"1")]
+            assert len(pipe) == 0
+
+    @pytest.mark.onlynoncluster
+    def test_pipeline_execute_iter_raises_after_draining(self, r):
+        r["a"] = 1
+        with r.pipeline(transaction=False) as pipe:
+            pipe.get("a").llen("a").set("c", 3)
+            results = pipe.execute_iter()
+            assert next(results) == (0, b"1")
+            with pytest.raises(redis.ResponseError) as ex:
+                next(results)
+            assert str(ex.value).startswith("Command # 2 (LLEN a) of pipeline")
+            # the replies following the error were read as well
+            assert r["c"] == b"3"
+            assert pipe.set("d", 4).execute() == [True]
+
+    @pytest.mark.onlynoncluster
+    def test_pipeline_execute_iter_closed_early(self, r):
+        with r.pipeline(transaction=False) as pipe:
+            pipe.set("a", 1).set("b", 2)
+            results = pipe.execute_iter()
+            assert next(results) == (0, True)
+            conn = pipe.connection
+            results.close()
+            assert conn._sock is None
+            assert pipe.connection is None
+
+    @pytest.mark.onlynoncluster
+    def test_pipeline_execute_iter_transaction(self, r):
+        with r.pipeline() as pipe:
+            pipe.set("a", 1).get("a")
+            assert list(pipe.execute_iter()) == [(0, True), (1, b"1")]
+
+    @pytest.mark.onlynoncluster
+    def test_pipeline_encode_on_append(self, r):
+        with r.pipeline(transaction=False, encode_on_append=True) as pipe:
+            pipe.set("a", "a1").get("a").set("b", memoryview(b"b1")).incr("c", 2)
+            assert len(pipe) == 4
+            # only the command names are kept
+            assert [args for args, _ in pipe.command_stack] == [
+                ("SET",),
+                ("GET",),
+                ("SET",),
+                ("INCRBY",),
+            ]
+            assert pipe.execute() == [True, b"a1", True, 2]
+            assert r["b"] == b"b1"
+            assert len(pipe._packed_commands) == 0
+
+    @pytest.mark.onlynoncluster
+    def test_pipeline_encode_on_append_invalid_argument(self, r):
+        with r.pipeline(transaction=False, encode_on_append=True) as pipe:
+            pipe.set("a", "a1")
+            packed = bytes(pipe._packed_commands)
+            with pytest.raises(redis.DataError):
+                pipe.set("b", {"not": "encodable"})
+            assert bytes(pipe._packed_commands) == packed
+            assert pipe.execute() == [True]
+
+    @pytest.mark.onlynoncluster
+    def test_pipeline_encode_on_append_auto_flush(self, r):
+        results = []
+        with r.pipeline(
+            transaction=False,
+            encode_on_append=True,
+            max_bytes=100,
+            result_callback=lambda i, res: results.append(res),
+        ) as pipe:
+            for i in range(10):
+                pipe.set(f"key{i}", "x" * 10)
+            assert 0 < len(pipe) < 10
+            pipe.execute()
+        assert results == [True] * 10
+
+    @pytest.mark.onlynoncluster
+    def test_pipeline_encode_on_append_transaction(self, r):
+        with r.pipeline(encode_on_append=True) as pipe:
+            pipe.set("a", "a1").get("a")
+            assert pipe.execute() == [True, b"a1"]
+
+    @pytest.mark.onlynoncluster
+    @skip_if_server_version_lt("3.2.0")
+    def test_pipeline_noreply(self, r):
+        with r.pipeline(transaction=False, noreply=True) as pipe:
+            pipe.set("a", 1).incr("a").llen("a")
+            assert pipe.execute() == [None, None, None]
+            # the connection is back in sync
+            assert pipe.get("a").execute() == [None]
+        assert r["a"] == b"2"
+
+    @pytest.mark.onlynoncluster
+    @skip_if_server_version_lt("3.2.0")
+    @pytest.mark.parametrize("encode_on_append", [False, True])
+    def test_pipeline_noreply_command(self, r, encode_on_append):
+        with r.pipeline(transaction=False, encode_on_append=encode_on_append) as pipe:
+            pipe.set("a", 1)
+            pipe.execute_command("INCR", "a", NOREPLY=True)
+            pipe.get("a")
+            assert pipe.execute() == [True, None, b"2"]
+
+            pipe.execute_command("INCR", "a", NOREPLY=True).get("a")
+            assert list(pipe.execute_iter()) == [(0, None), (1, b"3")]
+
+            pipe.execute_command("INCR", "a", NOREPLY=False)
+            assert pipe.execute() == [4]
+
+    @pytest.mark.onlynoncluster
+    @skip_if_server_version_lt("3.2.0")
+    def test_pipeline_noreply_inherited(self, r):
+        client = redis.Redis(connection_pool=r.connection_pool, noreply=True)
+        with client.pipeline(transaction=False) as pipe:
+            assert pipe.noreply
+            pipe.set("a", 1).incr("a")
+            assert pipe.execute() == [None, None]
+        with client.pipeline() as pipe:
+            assert not pipe.noreply
+            assert pipe.incr("a").execute() == [3]
+
+    @pytest.mark.onlynoncluster
+    def test_pipeline_noreply_transaction(self, r):
+        with pytest.raises(redis.DataError):
+            r.pipeline(noreply=True)
+        with r.pipeline() as pipe:
+            with pytest.raises(redis.DataError):
+                pipe.execute_command("INCR", "a", NOREPLY=True)
+
+    @pytest.mark.onlynoncluster
+    @pytest.mark.parametrize("transaction", [False, True])
+    def test_pipeline_concurrent_write(self, r, transaction):
+        value = b"x" * 100000
+        with r.pipeline(
+            transaction=transaction, concurrent_write_threshold=1000
+        ) as pipe:
+            for _ in range(200):
+                pipe.echo(value)
+            with mock.patch.object(
+                redis.client.PipelineWriterThread,
+                "start",
+                autospec=True,
+                side_effect=redis.client.PipelineWriterThread.start,
+            ) as start:
+                assert pipe.execute() == [value] * 200
+                start.assert_called_once()
+        assert r.ping()
+
+    @pytest.mark.onlynoncluster
+    def test_pipeline_concurrent_write_closed_early(self, r):
+        value = b"x" * 100000
+        with r.pipeline(transaction=False, concurrent_write_threshold=0) as pipe:
+            for _ in range(200):
+                pipe.echo(value)
+            results = pipe.execute_iter()
+            assert next(results) == (0, value)
+            results.close()
+            assert pipe.connection is None
+        assert r.ping()
@@ -1,7 +1,12 @@
+import copy
+from unittest import mock
+
 import pytest
 
+import redis
 from redis import exceptions
-from tests.conftest import skip_if_server_version_lt
+from redis.commands.core import ScriptRegistry
+from tests.conftest import _get_client, skip_if_server_version_lt
 
 multiply_script = """
 local value = redis.call('GET', KEYS[1])
@@ -125,6 +130,30 @@ class TestScripting:
         assert pipe.execute() == [True, b"2", 6]
         assert r.script_exists(multiply.sha) == [True]
 
+    def test_script_object_in_auto_flushing_pipeline(self, r):
+        r.set("a", 2)
+        multiply = r.register_script(multiply_script)
+        results = []
+        with r.pipeline(
+            transaction=False,
+            max_batch=2,
+            result_callback=lambda i, res: results.append(res),
+        ) as pipe:
+            with mock.patch.object(
+                pipe,
+                "immediate_execute_command",
+                wraps=pipe.immediate_execute_command,
+            ) as immediate:
+                for _ in range(3):
+                    multiply(keys=["a"], args=[3], client=pipe)
+                    pipe.get("a")
+                # the scripts are only checked by the first flush
+                assert immediate.call_args_list[0] == mock.call(
+                    "SCRIPT EXISTS", multiply.sha
+                )
+                assert immediate.call_count == 2
+        assert results == [6, b"2"] * 3
+
     def test_eval_msgpack_pipeline_error_in_lua(self, r):
         msgpack_hello = r.register_script(msgpack_hello_script)
         assert msgpack_hello.sha
@@ -147,3 +176,100 @@ class TestScripting:
         with pytest.raises(exceptions.ResponseError) as excinfo:
             pipe.execute()
         assert excinfo.type == exceptions.ResponseError
+
+
+@pytest.mark.onlynoncluster
+class TestScriptRegistry:
+    @pytest.fixture()
+    def registry(self):
+        return ScriptRegistry()
+
+    @pytest.fixture()
+    def rr(self, request, registry):
+        with _get_client(redis.Redis, request, script_registry=registry) as client:
+            client.script_flush()
+            yield client
+
+    def test_script_load_and_flush(self, rr, registry):
+        sha = rr.script_load(multiply_script)
+        assert sha in registry
+        rr.script_flush()
+        assert sha not in registry
+        assert len(registry) == 0
+
+    def test_clear_libraries(self, registry):
+        registry.add("script")
+        registry.add_library("library")
+        registry.clear_libraries()
+        assert "script" in registry
+        assert "library" not in registry
+
+    def test_pipeline_skips_script_exists(self, rr, registry):
+        rr.set("a", 2)
+        multiply = rr.register_script(multiply_script)
+        for _ in range(2):
+            pipe = rr.pipeline()
+            multiply(keys=["a"], args=[3], client=pipe)
+            with mock.patch.object(
+                pipe,
+                "immediate_execute_command",
+                wraps=pipe.immediate_execute_command,
+            ) as immediate:
+                assert pipe.execute() == [6]
+        # SCRIPT EXISTS and SCRIPT LOAD were only sent by the first pipeline
+        immediate.assert_not_called()
+        assert multiply.sha in registry
+
+    def test_noscript_error_discards_sha(self, rr, r, registry):
+        rr.set("a", 2)
+        multiply = rr.register_script(multiply_script)
+        registry.add(multiply.sha)
+        # the registry is not aware of this flush
+        r.script_flush()
+        with mock.patch.object(registry, "discard", wraps=registry.discard) as discard:
+            assert multiply(keys=["a"], args=[3]) == 6
+            discard.assert_called_once_with(multiply.sha)
+        assert multiply.sha in registry
+
+    @pytest.mark.parametrize("transaction", [False, True])
+    def test_pipeline_noscript_error_forgets_script(self, rr, r, registry, transaction):
+        rr.set("a", 2)
+        multiply = rr.register_script(multiply_script)
+        pipe = rr.pipeline(transaction=transaction)
+        multiply(keys=["a"], args=[3], client=pipe)
+        assert pipe.execute() == [6]
+        # the registry is not aware of this flush
+        r.script_flush()
+        pipe.set("b", 1)
+        multiply(keys=["a"], args=[3], client=pipe)
+        # the commands that followed have run, the pipeline can't be run
+        # again in part
+        with pytest.raises(exceptions.NoScriptError):
+            pipe.execute()
+        assert multiply.sha not in registry
+        multiply(keys=["a"], args=[3], client=pipe)
+        assert pipe.execute() == [6]
+        assert multiply.sha in registry
+
+    def test_reconnect_clears_registry(self, rr, registry):
+        sha = rr.script_load(multiply_script)
+        rr.connection.disconnect()
+        rr.ping()
+        assert sha not in registry
+
+    def test_preload(self, request, r):
+        registry = ScriptRegistry()
+        registry.preload(multiply_script)
+        sha = r.script_load(multiply_script)
+        r.script_flush()
+        with _get_client(redis.Redis, request, script_registry=registry) as client:
+            client.ping()
+            assert sha in registry
+            assert r.script_exists(sha) == [True]
+
+    def test_deepcopy_starts_empty(self, registry):
+        registry.preload(multiply_script)
+        registry.add("abc")
+        registry_copy = copy.deepcopy(registry)
+        assert "abc" not in registry_copy
+        assert registry_copy._preload == [multiply_script]